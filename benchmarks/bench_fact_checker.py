@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""Benchmark FactChecker.check_blog_post on synthetic posts of growing size.
+
+Generates blog posts of each requested size, mixing cited and uncited
+claims with plain prose, checks them against a synthetic week and reports
+the best check time per size as JSON, with the time per KB so growth with
+post length can be read off directly.
+
+    python -m benchmarks.bench_fact_checker --sizes-kb 25,50,100,200,400
+    python -m benchmarks.bench_fact_checker --docs 40 --repeat 5 --output facts.json
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+if __package__ in (None, ""):
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.bench_loaders import SOURCES, TOPICS, WORDS, _paragraphs
+from src.thinking_engine.document_loaders import Document
+from src.thinking_engine.fact_checker import FactChecker
+
+
+def generate_docs(count: int, size_kb: int, seed: int = 0) -> List[Document]:
+    rng = random.Random(seed)
+    docs = []
+    for i in range(count):
+        source = rng.choice(SOURCES)
+        topic = rng.choice(TOPICS)
+        text = "\n\n".join(_paragraphs(rng, size_kb * 1024))
+        docs.append(Document(f"article-{i + 1:03d}-{source}-{topic}.md", text, source))
+    return docs
+
+
+def generate_post(docs: List[Document], size_kb: int, seed: int = 0) -> str:
+    """A post of about `size_kb` KB: claims, some cited, between prose sentences."""
+    rng = random.Random(seed)
+    parts = []
+    total = 0
+    while total < size_kb * 1024:
+        words = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(8, 16)))
+        roll = rng.random()
+        if roll < 0.3:
+            sentence = f"{words.capitalize()} rose {rng.randint(1, 99)}% [Source: {rng.choice(docs).title}]."
+        elif roll < 0.5:
+            sentence = f"{words.capitalize()} reached ${rng.randint(1, 900)} million this week."
+        elif roll < 0.55:
+            sentence = f"{words.capitalize()} [Source: Unknown Report {rng.randint(1, 9)}]."
+        else:
+            sentence = f"{words.capitalize()}."
+        parts.append(sentence)
+        total += len(sentence) + 1
+        if rng.random() < 0.1:
+            parts.append(f"\n\n## {rng.choice(WORDS).title()}\n\n")
+    return ' '.join(parts)
+
+
+def run_benchmark(sizes_kb: List[int], docs: int = 20, doc_size_kb: int = 20, repeat: int = 3,
+                  seed: int = 0) -> Dict:
+    week = generate_docs(docs, doc_size_kb, seed)
+    # Build the shared claim index up front; it is reused across checks.
+    FactChecker(week).index
+
+    results = []
+    for size_kb in sizes_kb:
+        post = generate_post(week, size_kb, seed)
+        times = []
+        for _ in range(repeat):
+            checker = FactChecker(week)
+            start = time.perf_counter()
+            report = checker.check_blog_post(post)
+            times.append(time.perf_counter() - start)
+        best = min(times)
+        results.append({
+            'size_kb': round(len(post) / 1024, 1),
+            'seconds': round(best, 5),
+            'us_per_kb': round(best * 1e6 / (len(post) / 1024), 2),
+            'citations': report['citation_count'],
+            'evidenced_claims': len(report['evidence']),
+        })
+
+    per_kb = [r['us_per_kb'] for r in results]
+    return {
+        'docs': docs,
+        'doc_size_kb': doc_size_kb,
+        'posts': results,
+        # Near 1 when check time grows linearly with post length.
+        'per_kb_growth': round(per_kb[-1] / per_kb[0], 3) if per_kb and per_kb[0] else 0.0,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes-kb", default="25,50,100,200,400", help="Post sizes to check (KB)")
+    parser.add_argument("--docs", type=int, default=20, help="Documents in the synthetic week")
+    parser.add_argument("--doc-size-kb", type=int, default=20, help="Text size per document (KB)")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed checks per size (best is reported)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes_kb.split(',')]
+    results = run_benchmark(sizes, args.docs, args.doc_size_kb, args.repeat, args.seed)
+    results['params'] = vars(args)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + "\n", encoding='utf-8')
+    print(output)
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""Benchmark DocumentLoader on synthetic week folders.
+
+Generates a week folder with a configurable size and format mix, loads it
+with `DocumentLoader.load_week_folder` and reports files/sec, MB/sec, peak
+traced memory and per-format extraction latency as JSON.
+
+    python -m benchmarks.bench_loaders --files 40 --size-kb 200 --mix md=4,html=2,pdf=2,txt=2
+    python -m benchmarks.bench_loaders --workers 4 --output bench.json
+"""
+
+import argparse
+import contextlib
+import json
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Dict, List
+
+if __package__ in (None, ""):
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.thinking_engine.document_loaders import DocumentLoader
+
+WEEK_FOLDER = "week-2099-01-01"
+SOURCES = ["coindesk", "theblock", "delphi", "fintechtakes"]
+TOPICS = ["bitcoin", "ethereum", "defi", "stablecoins", "layer2", "regulation", "payments"]
+WORDS = (
+    "bitcoin ethereum stablecoin liquidity protocol yield validator rollup "
+    "treasury exchange custody settlement volume market adoption institutional "
+    "regulatory issuance lending borrowing collateral governance token network"
+).split()
+
+
+def parse_mix(mix: str) -> Dict[str, int]:
+    weights = {}
+    for part in mix.split(','):
+        ext, _, weight = part.partition('=')
+        weights['.' + ext.strip().lstrip('.')] = int(weight or 1)
+    return weights
+
+
+def _sentence(rng: random.Random) -> str:
+    words = [rng.choice(WORDS) for _ in range(rng.randint(8, 18))]
+    number = f"{rng.randint(1, 99)}%" if rng.random() < 0.3 else f"${rng.randint(1, 900)} million"
+    words.insert(rng.randint(1, len(words) - 1), number)
+    return ' '.join(words).capitalize() + '.'
+
+
+def _paragraphs(rng: random.Random, size_bytes: int) -> List[str]:
+    paragraphs = []
+    total = 0
+    while total < size_bytes:
+        paragraph = ' '.join(_sentence(rng) for _ in range(rng.randint(3, 6)))
+        paragraphs.append(paragraph)
+        total += len(paragraph) + 2
+    return paragraphs
+
+
+def _markdown(rng: random.Random, title: str, paragraphs: List[str]) -> str:
+    lines = [f"# {title}", "", "**Source:** Synthetic  ", "**Date:** January 1, 2099", ""]
+    for i, paragraph in enumerate(paragraphs):
+        if i % 5 == 0:
+            lines += [f"## Section {i // 5 + 1}", ""]
+        if i % 4 == 3:
+            lines += [f"- **{rng.choice(WORDS).title()}**: {s}" for s in paragraph.split('. ')[:3]]
+        else:
+            lines.append(paragraph)
+        lines.append("")
+    return '\n'.join(lines)
+
+
+def _html(rng: random.Random, title: str, paragraphs: List[str]) -> str:
+    body = []
+    for i, paragraph in enumerate(paragraphs):
+        if i % 5 == 0:
+            body.append(f"<h2>Section {i // 5 + 1}</h2>")
+        body.append(f"<p>{paragraph.replace(' market ', ' <strong>market</strong> ')}</p>")
+    return (
+        f"<html><head><title>{title}</title><style>p {{ margin: 0 }}</style>"
+        f"<script>var tracking = true;</script></head><body><h1>{title}</h1>"
+        + '\n'.join(body) + "</body></html>"
+    )
+
+
+def _pdf(paragraphs: List[str]) -> bytes:
+    """Write a minimal multi-page PDF with real text content streams."""
+    lines = []
+    for paragraph in paragraphs:
+        words = paragraph.split()
+        for i in range(0, len(words), 12):
+            lines.append(' '.join(words[i:i + 12]))
+        lines.append('')
+    pages = [lines[i:i + 50] for i in range(0, len(lines), 50)] or [[""]]
+
+    objects = []
+    page_ids = [4 + 2 * i for i in range(len(pages))]
+    objects.append(b"<< /Type /Catalog /Pages 2 0 R >>")
+    kids = ' '.join(f"{pid} 0 R" for pid in page_ids)
+    objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {len(pages)} >>".encode())
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    for pid, page_lines in zip(page_ids, pages):
+        ops = ["BT", "/F1 9 Tf", "11 TL", "50 760 Td"]
+        for line in page_lines:
+            escaped = line.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+            ops.append(f"({escaped}) Tj T*")
+        ops.append("ET")
+        stream = '\n'.join(ops).encode('latin-1', errors='replace')
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {pid + 1} 0 R >>".encode()
+        )
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def generate_corpus(base_path: Path, files: int, size_kb: int, mix: Dict[str, int],
+                    seed: int = 0) -> Path:
+    rng = random.Random(seed)
+    week_path = base_path / WEEK_FOLDER
+    week_path.mkdir(parents=True, exist_ok=True)
+
+    formats = [ext for ext, weight in mix.items() for _ in range(weight)]
+    for i in range(files):
+        ext = formats[i % len(formats)]
+        source = rng.choice(SOURCES)
+        topic = rng.choice(TOPICS)
+        kind = "report" if ext == '.pdf' else "article"
+        title = f"{topic.title()} Weekly {i + 1}"
+        # Vary sizes so per-format latency covers small and large inputs.
+        paragraphs = _paragraphs(rng, int(size_kb * 1024 * rng.uniform(0.5, 1.5)))
+        path = week_path / f"{kind}-{i + 1:03d}-{source}-{topic}{ext}"
+
+        if ext == '.md':
+            path.write_text(_markdown(rng, title, paragraphs), encoding='utf-8')
+        elif ext == '.html':
+            path.write_text(_html(rng, title, paragraphs), encoding='utf-8')
+        elif ext == '.pdf':
+            path.write_bytes(_pdf(paragraphs))
+        else:
+            path.write_text(f"{title}\n\n" + '\n\n'.join(paragraphs), encoding='utf-8')
+    return week_path
+
+
+def _latency_stats(samples: List[float]) -> Dict:
+    ordered = sorted(samples)
+    return {
+        'count': len(ordered),
+        'mean_ms': round(statistics.mean(ordered) * 1000, 3),
+        'p50_ms': round(ordered[len(ordered) // 2] * 1000, 3),
+        'max_ms': round(ordered[-1] * 1000, 3),
+    }
+
+
+def run_benchmark(base_path: Path, workers: int = 1, cache_dir: str = "", repeat: int = 3) -> Dict:
+    week_path = base_path / WEEK_FOLDER
+    files = sorted(p for p in week_path.iterdir() if p.is_file())
+    total_bytes = sum(p.stat().st_size for p in files)
+
+    def make_loader():
+        return DocumentLoader(base_path=str(base_path), workers=workers, cache_dir=cache_dir)
+
+    # Throughput: whole-folder loads, plus materializing every document's text
+    # since lazily backed documents defer part of the work to first access.
+    load_times = []
+    materialize_times = []
+    for _ in range(repeat):
+        loader = make_loader()
+        start = time.perf_counter()
+        docs = loader.load_week_folder(WEEK_FOLDER)
+        loaded = time.perf_counter()
+        for doc in docs:
+            doc.content
+        load_times.append(loaded - start)
+        materialize_times.append(time.perf_counter() - loaded)
+    best = min(load_times)
+
+    # Peak memory is measured in a separate pass: tracemalloc slows allocation.
+    tracemalloc.start()
+    docs = make_loader().load_week_folder(WEEK_FOLDER)
+    for doc in docs:
+        doc.content
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    per_format: Dict[str, List[float]] = {}
+    per_format_bytes: Dict[str, int] = {}
+    loader = DocumentLoader(base_path=str(base_path), cache_dir="")
+    for path in files:
+        start = time.perf_counter()
+        loader.load_document(str(path)).content
+        per_format.setdefault(path.suffix, []).append(time.perf_counter() - start)
+        per_format_bytes[path.suffix] = per_format_bytes.get(path.suffix, 0) + path.stat().st_size
+
+    return {
+        'files': len(files),
+        'documents': len(docs),
+        'total_mb': round(total_bytes / (1024 * 1024), 3),
+        'workers': workers,
+        'cache': bool(cache_dir),
+        'load_seconds': round(best, 4),
+        'materialize_seconds': round(min(materialize_times), 4),
+        'files_per_sec': round(len(files) / best, 2),
+        'mb_per_sec': round(total_bytes / (1024 * 1024) / best, 3),
+        'peak_traced_mb': round(peak / (1024 * 1024), 3),
+        'per_format': {
+            ext: dict(_latency_stats(samples),
+                      mb_per_sec=round(per_format_bytes[ext] / (1024 * 1024) / sum(samples), 3))
+            for ext, samples in sorted(per_format.items())
+        },
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=20, help="Number of files to generate")
+    parser.add_argument("--size-kb", type=int, default=100, help="Average text size per file (KB)")
+    parser.add_argument("--mix", default="md=4,html=2,pdf=2,txt=2", help="Format weights, e.g. md=4,pdf=1")
+    parser.add_argument("--workers", type=int, default=1, help="LOADER_WORKERS for the loader")
+    parser.add_argument("--cache", action="store_true", help="Benchmark warm extraction-cache loads")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed loads (best is reported)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--corpus-dir", help="Keep the generated corpus here instead of a temp dir")
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args(argv)
+
+    base_path = Path(args.corpus_dir) if args.corpus_dir else Path(tempfile.mkdtemp(prefix="te-bench-"))
+    try:
+        # Loader warnings go to stderr so stdout stays machine-readable.
+        with contextlib.redirect_stdout(sys.stderr):
+            generate_corpus(base_path, args.files, args.size_kb, parse_mix(args.mix), args.seed)
+            cache_dir = str(base_path / ".cache") if args.cache else ""
+            if cache_dir:
+                DocumentLoader(base_path=str(base_path), cache_dir=cache_dir).load_week_folder(WEEK_FOLDER)
+            results = run_benchmark(base_path, args.workers, cache_dir, args.repeat)
+        results['params'] = vars(args)
+    finally:
+        if not args.corpus_dir:
+            shutil.rmtree(base_path, ignore_errors=True)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + "\n", encoding='utf-8')
+    print(output)
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""Local stand-in for the OpenAI chat completions API.
+
+Answers `POST /v1/chat/completions` (plain and streamed) with canned but
+well-formed summaries, blog posts and tweet lists built from the documents
+in the prompt, after a configurable latency, and injects 429s and 5xx
+errors at configurable rates. Repeated prompt prefixes are reported as
+cached tokens the way OpenAI's prompt cache does, and `GET /stats`
+returns what the server has seen. Point the app at it to load-test without
+spending quota:
+
+    python -m benchmarks.fake_openai --port 8100 --latency-ms 800 --rate-limit-rate 0.05
+    OPENAI_BASE_URL=http://127.0.0.1:8100/v1 OPENAI_API_KEY=fake python run_api.py
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+if __package__ in (None, ""):
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from benchmarks.bench_loaders import WORDS
+
+_TITLE_RE = re.compile(r"--- Document \d+: (.+?) \(Source: ([^)]*)\) ---")
+_TWEET_COUNT_RE = re.compile(r"generate EXACTLY (\d+)")
+
+# OpenAI caches prompt prefixes of at least this many tokens, in steps of 128.
+_CACHE_MIN_TOKENS = 1024
+_CACHE_STEP = 128
+_CACHED_PREFIXES = 4096
+
+
+def _tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def canned_reply(messages: List[Dict[str, str]], rng: random.Random) -> str:
+    """A reply in the shape the prompt asks for, citing the documents it carries."""
+    prompt = messages[-1]['content'] if messages else ""
+    documents = _TITLE_RE.findall("\n".join(m.get('content') or "" for m in messages))
+    titles = [title for title, _ in documents] or ["Weekly Market Report"]
+    sources = [source for _, source in documents] or ["research"]
+
+    count = _TWEET_COUNT_RE.search(prompt)
+    if count:
+        tweets = []
+        for i in range(int(count.group(1))):
+            title = titles[i % len(titles)]
+            # Random wording keeps the tweets clear of near-duplicate filtering.
+            words = ' '.join(rng.sample(WORDS, 8))
+            tweets.append(
+                f"{i + 1}. TWEET: {title}: {words} up {rng.randint(2, 99)}%\n"
+                f"HASHTAGS: {rng.choice(['#Bitcoin', '#Ethereum', '#DeFi', '#Stablecoins'])} $BTC\n"
+                f"SOURCE: {title}\n"
+            )
+        return "\n".join(tweets)
+
+    if "blog post" in prompt:
+        sections = [
+            f"## {title}\n\n{title} reports a {rng.randint(2, 40)}% move in activity over the week "
+            f"[Source: {title}]. Analysts at {source} expect the trend to continue [Source: {title}]."
+            for title, source in zip(titles, sources)
+        ]
+        return (
+            f"# This Week in Crypto: {titles[0]}\n\n"
+            f"**Executive Summary:** {len(titles)} sources point to rising on-chain activity "
+            f"[Source: {titles[0]}].\n\n" + "\n\n".join(sections) +
+            "\n\n## Key Takeaways\n\n" + "\n".join(f"- {title} [Source: {title}]" for title in titles)
+        )
+
+    return "\n".join(
+        f"- {title} (Source: {source}): activity rose {rng.randint(2, 40)}% week over week."
+        for title, source in zip(titles, sources)
+    )
+
+
+class FakeOpenAI:
+    """Configuration, prompt-cache state and counters of one fake server."""
+
+    def __init__(self, latency_ms: float = 500, jitter_ms: float = 100, token_delay_ms: float = 5,
+                 error_rate: float = 0.0, rate_limit_rate: float = 0.0, retry_after: float = 1.0,
+                 seed: int = 0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.token_delay_ms = token_delay_ms
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.rng = random.Random(seed)
+        self.stats = Counter()
+        self._prefixes: "OrderedDict[str, None]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def delay(self) -> float:
+        return max(0.0, self.latency_ms + self.rng.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+
+    def fault(self) -> Optional[JSONResponse]:
+        roll = self.rng.random()
+        if roll < self.rate_limit_rate:
+            self.stats['rate_limited'] += 1
+            return JSONResponse(
+                status_code=429,
+                headers={'retry-after': str(self.retry_after)},
+                content={'error': {'message': "Rate limit reached for requests", 'type': "requests",
+                                   'param': None, 'code': "rate_limit_exceeded"}},
+            )
+        if roll < self.rate_limit_rate + self.error_rate:
+            self.stats['server_errors'] += 1
+            return JSONResponse(
+                status_code=500,
+                content={'error': {'message': "The server had an error while processing your request.",
+                                   'type': "server_error", 'param': None, 'code': None}},
+            )
+        return None
+
+    def usage(self, messages: List[Dict[str, str]], reply: str) -> Dict:
+        prompt_tokens = sum(_tokens(m.get('content') or "") + 4 for m in messages)
+        # Everything before the final message is treated as the cacheable prefix.
+        prefix = messages[:-1]
+        prefix_tokens = sum(_tokens(m.get('content') or "") + 4 for m in prefix)
+        key = hashlib.sha256(json.dumps(prefix, sort_keys=True).encode('utf-8')).hexdigest()
+        with self._lock:
+            seen = key in self._prefixes
+            self._prefixes[key] = None
+            self._prefixes.move_to_end(key)
+            while len(self._prefixes) > _CACHED_PREFIXES:
+                self._prefixes.popitem(last=False)
+        cached = prefix_tokens // _CACHE_STEP * _CACHE_STEP if seen and prefix_tokens >= _CACHE_MIN_TOKENS else 0
+        completion_tokens = _tokens(reply)
+        self.stats['prompt_tokens'] += prompt_tokens
+        self.stats['cached_tokens'] += cached
+        self.stats['completion_tokens'] += completion_tokens
+        return {
+            'prompt_tokens': prompt_tokens,
+            'completion_tokens': completion_tokens,
+            'total_tokens': prompt_tokens + completion_tokens,
+            'prompt_tokens_details': {'cached_tokens': cached},
+        }
+
+
+def _pieces(text: str) -> List[str]:
+    return re.findall(r"\S+\s*|\s+", text)
+
+
+def create_app(fake: Optional[FakeOpenAI] = None) -> FastAPI:
+    fake = fake or FakeOpenAI()
+    app = FastAPI(title="Fake OpenAI")
+    app.state.fake = fake
+
+    @app.get("/stats")
+    async def stats():
+        return dict(fake.stats)
+
+    @app.get("/v1/models")
+    async def models():
+        return {'object': "list", 'data': [{'id': "gpt-4o", 'object': "model", 'owned_by': "fake"}]}
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        fake.stats['requests'] += 1
+        messages = body.get('messages') or []
+        model = body.get('model', "gpt-4o")
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        created = int(time.time())
+
+        await asyncio.sleep(fake.delay())
+        error = fake.fault()
+        if error is not None:
+            return error
+
+        reply = canned_reply(messages, fake.rng)
+        usage = fake.usage(messages, reply)
+        token_delay = fake.token_delay_ms / 1000
+
+        if not body.get('stream'):
+            await asyncio.sleep(token_delay * usage['completion_tokens'])
+            return {
+                'id': completion_id, 'object': "chat.completion", 'created': created, 'model': model,
+                'choices': [{'index': 0, 'message': {'role': "assistant", 'content': reply},
+                             'finish_reason': "stop"}],
+                'usage': usage,
+            }
+
+        include_usage = (body.get('stream_options') or {}).get('include_usage', False)
+
+        def chunk(choices: List[Dict], **extra) -> str:
+            data = dict({'id': completion_id, 'object': "chat.completion.chunk", 'created': created,
+                         'model': model, 'choices': choices}, **extra)
+            return f"data: {json.dumps(data)}\n\n"
+
+        async def events():
+            yield chunk([{'index': 0, 'delta': {'role': "assistant", 'content': ""}, 'finish_reason': None}])
+            for piece in _pieces(reply):
+                await asyncio.sleep(token_delay)
+                yield chunk([{'index': 0, 'delta': {'content': piece}, 'finish_reason': None}])
+            yield chunk([{'index': 0, 'delta': {}, 'finish_reason': "stop"}])
+            if include_usage:
+                yield chunk([], usage=usage)
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+
+def start_server(app: FastAPI, host: str = "127.0.0.1", port: int = 0) -> Tuple[uvicorn.Server, str]:
+    """Serve `app` on a background thread; returns the server and its base URL."""
+    server = uvicorn.Server(uvicorn.Config(app, host=host, port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError("fake OpenAI server failed to start")
+        time.sleep(0.01)
+    bound_port = server.servers[0].sockets[0].getsockname()[1]
+    return server, f"http://{host}:{bound_port}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency-ms", type=float, default=500, help="Mean time to first token")
+    parser.add_argument("--jitter-ms", type=float, default=100, help="Uniform jitter around the latency")
+    parser.add_argument("--token-delay-ms", type=float, default=5, help="Delay per generated token")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests failing with 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of requests failing with 429")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="retry-after seconds sent with 429s")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    fake = FakeOpenAI(args.latency_ms, args.jitter_ms, args.token_delay_ms, args.error_rate,
+                      args.rate_limit_rate, args.retry_after, args.seed)
+    print(f"Fake OpenAI at http://{args.host}:{args.port}/v1", file=sys.stderr)
+    uvicorn.run(create_app(fake), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
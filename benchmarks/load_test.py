@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""Drive the API's generation endpoints at a target concurrency.
+
+Keeps `--concurrency` requests in flight against `/api/generate/*`, picking
+endpoints by weight, and reports p50/p95/p99 latency, throughput and error
+rates per endpoint and overall as JSON. For streamed endpoints the time to
+the first byte is reported as well. Run the API against the fake OpenAI
+server (see `benchmarks.fake_openai`) to load-test without spending quota:
+
+    python -m benchmarks.load_test --week week-2025-01-15 --concurrency 16 --requests 200
+    python -m benchmarks.load_test --mix blog=1,blog/stream=1 --duration 60 --output load.json
+"""
+
+import argparse
+import json
+import math
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+if __package__ in (None, ""):
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+STREAM_SUFFIX = "/stream"
+
+
+def parse_mix(mix: str) -> Dict[str, int]:
+    weights = {}
+    for part in mix.split(','):
+        endpoint, _, weight = part.partition('=')
+        weights[endpoint.strip().strip('/')] = int(weight or 1)
+    return weights
+
+
+def percentile(ordered: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def _latency_stats(samples: List[float]) -> Dict:
+    ordered = sorted(samples)
+    return {
+        'p50_ms': round(percentile(ordered, 50) * 1000, 1),
+        'p95_ms': round(percentile(ordered, 95) * 1000, 1),
+        'p99_ms': round(percentile(ordered, 99) * 1000, 1),
+        'max_ms': round(ordered[-1] * 1000, 1) if ordered else 0.0,
+    }
+
+
+def send(base_url: str, endpoint: str, payload: Dict, timeout: float) -> Dict:
+    """POST one request and time it; never raises for HTTP or connection errors."""
+    request = urllib.request.Request(
+        f"{base_url.rstrip('/')}/{endpoint}",
+        data=json.dumps(payload).encode('utf-8'),
+        headers={'Content-Type': "application/json"},
+        method="POST",
+    )
+    start = time.perf_counter()
+    first_byte = None
+    status = 0
+    error = None
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            status = response.status
+            body = b""
+            while True:
+                piece = response.read1(65536)
+                if not piece:
+                    break
+                if first_byte is None:
+                    first_byte = time.perf_counter() - start
+                body += piece
+            # A streamed generation reports failures as an SSE event.
+            if endpoint.endswith(STREAM_SUFFIX) and b"event: error" in body:
+                error = "stream error event"
+    except urllib.error.HTTPError as e:
+        status = e.code
+        error = e.read().decode('utf-8', errors='replace')[:200]
+    except (urllib.error.URLError, OSError) as e:
+        error = str(e)
+    return {
+        'endpoint': endpoint,
+        'status': status,
+        'ok': error is None and 200 <= status < 300,
+        'latency': time.perf_counter() - start,
+        'first_byte': first_byte,
+        'error': error,
+    }
+
+
+def run_load(base_url: str, targets: List[Tuple[str, Dict]], weights: List[int], concurrency: int,
+             requests: int = 0, duration: float = 0.0, timeout: float = 600.0) -> Dict:
+    """Keep `concurrency` requests in flight until `requests` are sent or `duration` passes.
+
+    `targets` are (endpoint path, JSON payload) pairs, sent in a weighted
+    round-robin so every run sends the same mix.
+    """
+    schedule = [target for target, weight in zip(targets, weights) for _ in range(weight)]
+    if not requests and not duration:
+        raise ValueError("set requests or duration")
+    results = []
+    lock = threading.Lock()
+    issued = [0]
+    start = time.perf_counter()
+
+    def next_target() -> Optional[Tuple[str, Dict]]:
+        with lock:
+            if requests and issued[0] >= requests:
+                return None
+            if duration and time.perf_counter() - start >= duration:
+                return None
+            target = schedule[issued[0] % len(schedule)]
+            issued[0] += 1
+            return target
+
+    def worker():
+        while True:
+            target = next_target()
+            if target is None:
+                return
+            result = send(base_url, target[0], target[1], timeout)
+            with lock:
+                results.append(result)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for _ in range(concurrency):
+            pool.submit(worker)
+    elapsed = time.perf_counter() - start
+    return summarize(results, elapsed, concurrency)
+
+
+def _summary(results: List[Dict], elapsed: float) -> Dict:
+    errors = [r for r in results if not r['ok']]
+    stats = {
+        'requests': len(results),
+        'errors': len(errors),
+        'error_rate': round(len(errors) / len(results), 4) if results else 0.0,
+        'throughput_rps': round(len(results) / elapsed, 3) if elapsed else 0.0,
+        'status_codes': dict(sorted(Counter(str(r['status']) for r in results).items())),
+        'latency': _latency_stats([r['latency'] for r in results if r['ok']]),
+    }
+    first_bytes = [r['first_byte'] for r in results if r['ok'] and r['first_byte'] is not None
+                   and r['endpoint'].endswith(STREAM_SUFFIX)]
+    if first_bytes:
+        stats['time_to_first_byte'] = _latency_stats(first_bytes)
+    return stats
+
+
+def summarize(results: List[Dict], elapsed: float, concurrency: int) -> Dict:
+    by_endpoint: Dict[str, List[Dict]] = {}
+    for result in results:
+        by_endpoint.setdefault(result['endpoint'], []).append(result)
+    return {
+        'concurrency': concurrency,
+        'elapsed_seconds': round(elapsed, 3),
+        'overall': _summary(results, elapsed),
+        'endpoints': {endpoint: _summary(items, elapsed) for endpoint, items in sorted(by_endpoint.items())},
+        'sample_errors': [r['error'] for r in results if r['error']][:5],
+    }
+
+
+def _payload(endpoint: str, args) -> Dict:
+    payload = {'week_folder': args.week, 'priority': args.priority}
+    if endpoint.startswith("api/generate/tweets"):
+        payload['count'] = args.tweet_count
+    elif endpoint.startswith("api/generate/all"):
+        payload['tweet_count'] = args.tweet_count
+    return payload
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="API base URL")
+    parser.add_argument("--week", default="week-2025-01-15", help="Week folder to generate from")
+    parser.add_argument("--mix", default="blog=2,tweets=2,all=1,blog/stream=1",
+                        help="Endpoint weights under /api/generate/, e.g. blog=1,tweets=3")
+    parser.add_argument("--concurrency", type=int, default=8, help="Requests kept in flight")
+    parser.add_argument("--requests", type=int, default=0, help="Total requests to send")
+    parser.add_argument("--duration", type=float, default=0.0, help="Seconds to keep sending")
+    parser.add_argument("--tweet-count", type=int, default=10)
+    parser.add_argument("--priority", choices=["interactive", "batch"], default="interactive")
+    parser.add_argument("--timeout", type=float, default=600.0, help="Per-request timeout in seconds")
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args(argv)
+    if not args.requests and not args.duration:
+        args.requests = args.concurrency * 10
+
+    mix = parse_mix(args.mix)
+    endpoints = [f"api/generate/{name}" for name in mix]
+    targets = [(endpoint, _payload(endpoint, args)) for endpoint in endpoints]
+    results = run_load(args.url, targets, list(mix.values()), args.concurrency,
+                       args.requests, args.duration, args.timeout)
+    results['params'] = vars(args)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + "\n", encoding='utf-8')
+    print(output)
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,47 @@
 """REST API for Thinking Engine."""
 
+import asyncio
 import json
 import os
+from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import List, Optional, Dict, Any
+from typing import List, Literal, Optional, Dict, Any
 
 from fastapi import FastAPI, HTTPException, status
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.responses import JSONResponse, FileResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
 from dotenv import load_dotenv
 from openai import RateLimitError, APIError
 
-from .document_loaders import DocumentLoader
-from .llm_orchestrator import LLMOrchestrator
+from .document_loaders import Document, DocumentLoader
+from .llm_orchestrator import AsyncLLMOrchestrator, pooled_http_client
 from .blog_generator import BlogGenerator
+from .content_pipeline import ContentPipeline
+from .rate_limiter import RequestScheduler, request_priority
 from .tweet_generator import TweetGenerator
+from .week_watcher import WeekRegistry
 
 load_dotenv()
 
+_week_registry: Optional[WeekRegistry] = None
+_llm: Optional[AsyncLLMOrchestrator] = None
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global _llm
+    # One orchestrator, and so one connection pool, for the whole process.
+    if os.getenv("OPENAI_API_KEY"):
+        _llm = AsyncLLMOrchestrator(http_client=pooled_http_client())
+    yield
+    if _llm:
+        await _llm.aclose()
+        _llm = None
+    if _week_registry:
+        _week_registry.stop()
+
+
 BASE_URL = os.getenv("API_BASE_URL", "")
 servers = [{"url": BASE_URL}] if BASE_URL else []
 
@@ -26,7 +49,8 @@ app = FastAPI(
     title="Thinking Engine API",
     description="Generate blog posts and tweets from curated research",
     version="0.1.0",
-    servers=servers if servers else None
+    servers=servers if servers else None,
+    lifespan=lifespan
 )
 
 app.add_middleware(
@@ -49,6 +73,7 @@ class DocumentInfo(BaseModel):
     source: str
     file_path: str
     file_type: str
+    size_bytes: Optional[int] = None
 
 
 class WeekDocumentsResponse(BaseModel):
@@ -60,6 +85,7 @@ class WeekDocumentsResponse(BaseModel):
 class GenerateBlogRequest(BaseModel):
     week_folder: str
     return_content: bool = True
+    priority: Literal["interactive", "batch"] = "interactive"
 
 
 class GenerateBlogResponse(BaseModel):
@@ -70,6 +96,7 @@ class GenerateBlogResponse(BaseModel):
     has_fact_check_issues: bool
     fact_check_issues: List[Dict[str, Any]]
     content: Optional[str] = None
+    summary_cached: bool = False
     message: str
 
 
@@ -77,6 +104,7 @@ class GenerateTweetsRequest(BaseModel):
     week_folder: str
     count: int = Field(25, ge=1, le=100)
     return_content: bool = True
+    priority: Literal["interactive", "batch"] = "interactive"
 
 
 class TweetIdea(BaseModel):
@@ -94,6 +122,7 @@ class GenerateTweetsResponse(BaseModel):
     has_fact_check_issues: bool
     fact_check_issues: List[Dict[str, Any]]
     tweets: Optional[List[TweetIdea]] = None
+    summary_cached: bool = False
     message: str
 
 
@@ -101,6 +130,7 @@ class GenerateAllRequest(BaseModel):
     week_folder: str
     tweet_count: int = Field(25, ge=1, le=100)
     return_content: bool = True
+    priority: Literal["interactive", "batch"] = "interactive"
 
 
 class GenerateAllResponse(BaseModel):
@@ -115,13 +145,25 @@ def _get_loader() -> DocumentLoader:
     return DocumentLoader()
 
 
-def _get_llm() -> LLMOrchestrator:
-    if not os.getenv("OPENAI_API_KEY"):
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="OPENAI_API_KEY not set"
-        )
-    return LLMOrchestrator()
+def _load_week(week_folder: str) -> List[Document]:
+    # Week folders are ingested incrementally: only files added or changed
+    # since the last request are extracted again.
+    global _week_registry
+    if _week_registry is None:
+        _week_registry = WeekRegistry(_get_loader())
+    return _week_registry.load(week_folder)
+
+
+def _get_llm() -> AsyncLLMOrchestrator:
+    global _llm
+    if _llm is None:
+        if not os.getenv("OPENAI_API_KEY"):
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="OPENAI_API_KEY not set"
+            )
+        _llm = AsyncLLMOrchestrator(http_client=pooled_http_client())
+    return _llm
 
 
 def _handle_openai_error(e: Exception) -> HTTPException:
@@ -150,8 +192,11 @@ async def root():
             "weeks": "/api/weeks",
             "documents": "/api/weeks/{week_folder}/documents",
             "generate_blog": "/api/generate/blog",
+            "generate_blog_stream": "/api/generate/blog/stream",
             "generate_tweets": "/api/generate/tweets",
-            "generate_all": "/api/generate/all"
+            "generate_all": "/api/generate/all",
+            "scheduler": "/api/scheduler",
+            "usage": "/api/usage"
         }
     }
 
@@ -166,6 +211,18 @@ async def health_check():
     }
 
 
+@app.get("/api/scheduler")
+async def scheduler_stats():
+    """Queue depth, wait times and retries of the OpenAI request scheduler."""
+    return RequestScheduler.default().stats()
+
+
+@app.get("/api/usage")
+async def usage_stats():
+    """Tokens used so far and how many prompt tokens the provider served from its cache."""
+    return _get_llm().usage_stats()
+
+
 @app.get("/api/weeks", response_model=WeekFolderResponse)
 async def list_week_folders():
     loader = _get_loader()
@@ -176,17 +233,12 @@ async def list_week_folders():
 @app.get("/api/weeks/{week_folder}/documents", response_model=WeekDocumentsResponse)
 async def get_week_documents(week_folder: str):
     loader = _get_loader()
-    docs = loader.load_week_folder(week_folder)
+    try:
+        listing = loader.list_documents(week_folder)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
     
-    document_info = [
-        DocumentInfo(
-            title=doc.title,
-            source=doc.source,
-            file_path=doc.file_path,
-            file_type=doc.file_type
-        )
-        for doc in docs
-    ]
+    document_info = [DocumentInfo(**item) for item in listing]
     
     return WeekDocumentsResponse(
         week_folder=week_folder,
@@ -198,8 +250,7 @@ async def get_week_documents(week_folder: str):
 @app.post("/api/generate/blog", response_model=GenerateBlogResponse)
 async def generate_blog(request: GenerateBlogRequest):
     try:
-        loader = _get_loader()
-        docs = loader.load_week_folder(request.week_folder)
+        docs = await asyncio.to_thread(_load_week, request.week_folder)
         
         if not docs:
             raise HTTPException(
@@ -210,7 +261,8 @@ async def generate_blog(request: GenerateBlogRequest):
         llm = _get_llm()
         blog_gen = BlogGenerator(llm)
         output_path = f"output/{request.week_folder}/blog-post.md"
-        result = blog_gen.generate(docs, output_path)
+        with request_priority(request.priority):
+            result = await blog_gen.agenerate(docs, output_path)
         
         content = None
         if request.return_content:
@@ -226,6 +278,7 @@ async def generate_blog(request: GenerateBlogRequest):
             has_fact_check_issues=result['fact_check']['has_issues'],
             fact_check_issues=result['fact_check'].get('issues', []),
             content=content,
+            summary_cached=result['summary_cached'],
             message="Blog post generated successfully"
         )
     except HTTPException:
@@ -241,11 +294,54 @@ async def generate_blog(request: GenerateBlogRequest):
         )
 
 
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@app.post("/api/generate/blog/stream")
+async def generate_blog_stream(request: GenerateBlogRequest):
+    """Stream the blog post as Server-Sent Events.
+    
+    Events: `summary`, then one `token` per piece of the post as the model
+    produces it, `metrics` (ttft_ms, total_ms), and a final `done` with the
+    fact-check once the post is saved. Failures after the stream has started
+    arrive as an `error` event.
+    """
+    try:
+        docs = await asyncio.to_thread(_load_week, request.week_folder)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    
+    if not docs:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No documents found in week folder: {request.week_folder}"
+        )
+    
+    blog_gen = BlogGenerator(_get_llm())
+    output_path = f"output/{request.week_folder}/blog-post.md"
+    
+    async def events():
+        try:
+            with request_priority(request.priority):
+                async for item in blog_gen.astream(docs, output_path):
+                    yield _sse(item['event'], item['data'])
+        except (RateLimitError, APIError) as e:
+            yield _sse("error", _handle_openai_error(e).detail)
+        except Exception as e:
+            yield _sse("error", {"error": "Error generating blog post", "message": str(e)})
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @app.post("/api/generate/tweets", response_model=GenerateTweetsResponse)
 async def generate_tweets(request: GenerateTweetsRequest):
     try:
-        loader = _get_loader()
-        docs = loader.load_week_folder(request.week_folder)
+        docs = await asyncio.to_thread(_load_week, request.week_folder)
         
         if not docs:
             raise HTTPException(
@@ -256,7 +352,8 @@ async def generate_tweets(request: GenerateTweetsRequest):
         llm = _get_llm()
         tweet_gen = TweetGenerator(llm, count=request.count)
         output_dir = f"output/{request.week_folder}"
-        result = tweet_gen.generate(docs, output_dir)
+        with request_priority(request.priority):
+            result = await tweet_gen.agenerate(docs, output_dir)
         
         tweets = None
         if request.return_content:
@@ -274,6 +371,7 @@ async def generate_tweets(request: GenerateTweetsRequest):
             has_fact_check_issues=result['fact_check']['has_issues'],
             fact_check_issues=result['fact_check'].get('issues', []),
             tweets=tweets,
+            summary_cached=result['summary_cached'],
             message=f"Generated {result['tweet_count']} tweet ideas successfully"
         )
     except HTTPException:
@@ -292,8 +390,7 @@ async def generate_tweets(request: GenerateTweetsRequest):
 @app.post("/api/generate/all", response_model=GenerateAllResponse)
 async def generate_all(request: GenerateAllRequest):
     try:
-        loader = _get_loader()
-        docs = loader.load_week_folder(request.week_folder)
+        docs = await asyncio.to_thread(_load_week, request.week_folder)
         
         if not docs:
             raise HTTPException(
@@ -303,16 +400,23 @@ async def generate_all(request: GenerateAllRequest):
         
         llm = _get_llm()
         
-        # Generate blog post
-        blog_gen = BlogGenerator(llm)
-        blog_output_path = f"output/{request.week_folder}/blog-post.md"
-        blog_result = blog_gen.generate(docs, blog_output_path)
+        # One shared summary, then the blog post and tweets concurrently.
+        pipeline = ContentPipeline(llm, tweet_count=request.tweet_count)
+        with request_priority(request.priority):
+            result = await pipeline.agenerate(
+                docs,
+                f"output/{request.week_folder}/blog-post.md",
+                f"output/{request.week_folder}"
+            )
+        blog_result = result['blog']
+        tweet_result = result['tweets']
         
         blog_response = {
             "output_file": blog_result['output_file'],
             "citation_count": blog_result['fact_check']['citation_count'],
             "has_fact_check_issues": blog_result['fact_check']['has_issues'],
-            "fact_check_issues": blog_result['fact_check'].get('issues', [])
+            "fact_check_issues": blog_result['fact_check'].get('issues', []),
+            "summary_cached": blog_result['summary_cached']
         }
         
         if request.return_content:
@@ -320,17 +424,13 @@ async def generate_all(request: GenerateAllRequest):
             if blog_file.exists():
                 blog_response['content'] = blog_file.read_text(encoding='utf-8')
         
-        # Generate tweets
-        tweet_gen = TweetGenerator(llm, count=request.tweet_count)
-        tweet_output_dir = f"output/{request.week_folder}"
-        tweet_result = tweet_gen.generate(docs, tweet_output_dir)
-        
         tweet_response = {
             "json_file": tweet_result['json_file'],
             "txt_file": tweet_result['txt_file'],
             "tweet_count": tweet_result['tweet_count'],
             "has_fact_check_issues": tweet_result['fact_check']['has_issues'],
-            "fact_check_issues": tweet_result['fact_check'].get('issues', [])
+            "fact_check_issues": tweet_result['fact_check'].get('issues', []),
+            "summary_cached": tweet_result['summary_cached']
         }
         
         if request.return_content:
@@ -1,14 +1,16 @@
 """Blog post generation."""
 
-from typing import List, Dict
+import asyncio
+import time
+from typing import AsyncIterator, List, Dict, Union
 from pathlib import Path
 from .document_loaders import Document
-from .llm_orchestrator import LLMOrchestrator
+from .llm_orchestrator import AsyncLLMOrchestrator, LLMOrchestrator
 from .fact_checker import FactChecker
 
 
 class BlogGenerator:
-    def __init__(self, llm: LLMOrchestrator):
+    def __init__(self, llm: Union[LLMOrchestrator, AsyncLLMOrchestrator]):
         self.llm = llm
     
     def generate(self, docs: List[Document], output_path: str) -> Dict:
@@ -16,11 +18,79 @@ class BlogGenerator:
             raise ValueError("No documents provided for blog generation")
         
         print("Analyzing documents...")
-        summary = self.llm.summarize_documents(docs)
+        summary, summary_cached = self.llm.summarize_cached(docs)
+        return self.generate_from_summary(docs, summary, summary_cached, output_path)
+    
+    async def agenerate(self, docs: List[Document], output_path: str) -> Dict:
+        if not docs:
+            raise ValueError("No documents provided for blog generation")
+        
+        print("Analyzing documents...")
+        summary, summary_cached = await self.llm.summarize_cached(docs)
+        return await self.agenerate_from_summary(docs, summary, summary_cached, output_path)
+    
+    async def astream(self, docs: List[Document], output_path: str) -> AsyncIterator[Dict]:
+        """Generate a blog post as a sequence of events.
+        
+        Yields {'event': name, 'data': dict} with, in order: 'summary' once the
+        research summary is ready, 'token' for every piece of the post as the
+        model streams it, 'metrics' with time-to-first-token and total
+        latency, and 'done' with the fact-check once the post is saved.
+        """
+        if not docs:
+            raise ValueError("No documents provided for blog generation")
+        
+        start = time.perf_counter()
+        print("Analyzing documents...")
+        summary, summary_cached = await self.llm.summarize_cached(docs)
+        yield {'event': 'summary', 'data': {'summary_cached': summary_cached,
+                                            'elapsed_ms': _ms(time.perf_counter() - start)}}
         
         print("Generating blog post...")
+        generation_start = time.perf_counter()
+        first_token = None
+        pieces = []
+        async for piece in self.llm.stream_blog_post(docs, summary):
+            if first_token is None:
+                first_token = time.perf_counter()
+            pieces.append(piece)
+            yield {'event': 'token', 'data': {'text': piece}}
+        end = time.perf_counter()
+        
+        first_token = first_token or end
+        yield {'event': 'metrics', 'data': {
+            'ttft_ms': _ms(first_token - start),
+            'generation_ttft_ms': _ms(first_token - generation_start),
+            'total_ms': _ms(end - start),
+        }}
+        
+        result = await asyncio.to_thread(self._save, docs, ''.join(pieces), summary, summary_cached, output_path)
+        yield {'event': 'done', 'data': {
+            'output_file': result['output_file'],
+            'citation_count': result['fact_check']['citation_count'],
+            'has_fact_check_issues': result['fact_check']['has_issues'],
+            'fact_check_issues': result['fact_check'].get('issues', []),
+            'summary_cached': summary_cached,
+            'total_ms': _ms(time.perf_counter() - start),
+        }}
+    
+    def generate_from_summary(self, docs: List[Document], summary: str, summary_cached: bool,
+                              output_path: str) -> Dict:
+        print("Generating blog post...")
         content = self.llm.generate_blog_post(docs, summary)
         
+        return self._save(docs, content, summary, summary_cached, output_path)
+    
+    async def agenerate_from_summary(self, docs: List[Document], summary: str, summary_cached: bool,
+                                     output_path: str) -> Dict:
+        print("Generating blog post...")
+        content = await self.llm.generate_blog_post(docs, summary)
+        
+        # Fact-checking scans every document, so keep it off the event loop.
+        return await asyncio.to_thread(self._save, docs, content, summary, summary_cached, output_path)
+    
+    def _save(self, docs: List[Document], content: str, summary: str, summary_cached: bool,
+              output_path: str) -> Dict:
         print("Fact-checking blog post...")
         checker = FactChecker(docs)
         fact_check = checker.check_blog_post(content)
@@ -43,5 +113,10 @@ class BlogGenerator:
         return {
             'output_file': str(output_file),
             'fact_check': fact_check,
-            'summary': summary
+            'summary': summary,
+            'summary_cached': summary_cached
         }
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 1)
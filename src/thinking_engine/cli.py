@@ -11,6 +11,7 @@ from dotenv import load_dotenv
 from .document_loaders import DocumentLoader
 from .llm_orchestrator import LLMOrchestrator
 from .blog_generator import BlogGenerator
+from .content_pipeline import ContentPipeline
 from .tweet_generator import TweetGenerator
 
 load_dotenv()
@@ -37,14 +38,7 @@ def _select_week_folder(loader: DocumentLoader) -> str:
         return choice
 
 
-@app.command()
-def generate_blog(week_folder: Optional[str] = typer.Argument(None, help="Week folder name")):
-    """Generate a blog post from curated documents."""
-    loader = DocumentLoader()
-    
-    if not week_folder:
-        week_folder = _select_week_folder(loader)
-    
+def _load_docs(loader: DocumentLoader, week_folder: str):
     console.print(f"\n[cyan]Loading documents from {week_folder}...[/cyan]")
     try:
         docs = loader.load_week_folder(week_folder)
@@ -57,28 +51,75 @@ def generate_blog(week_folder: Optional[str] = typer.Argument(None, help="Week f
         raise typer.Exit(1)
     
     console.print(f"[green]Loaded {len(docs)} documents[/green]")
-    for doc in docs:
-        console.print(f"  • {doc.title} ({doc.source})")
-    
+    return docs
+
+
+def _get_llm() -> LLMOrchestrator:
     try:
-        llm = LLMOrchestrator()
-        blog_gen = BlogGenerator(llm)
+        return LLMOrchestrator()
     except ValueError as e:
         console.print(f"[red]Error: {e}[/red]")
         console.print("[yellow]Make sure OPENAI_API_KEY is set in .env file[/yellow]")
         raise typer.Exit(1)
+
+
+def _print_blog_result(result: dict):
+    console.print(f"\n[green]✓ Blog post generated![/green]")
+    console.print(f"  Output: {result['output_file']}")
+    console.print(f"  Citations: {result['fact_check']['citation_count']}")
+    if result['summary_cached']:
+        console.print("  Summary: reused from cache")
+    
+    if result['fact_check']['has_issues']:
+        console.print(f"\n[yellow]⚠ Fact-check found some issues - please review[/yellow]")
+
+
+def _print_tweet_result(result: dict):
+    console.print(f"\n[green]✓ Tweet ideas generated![/green]")
+    console.print(f"  JSON: {result['json_file']}")
+    console.print(f"  Text: {result['txt_file']}")
+    console.print(f"  Count: {result['tweet_count']}")
+    if result['summary_cached']:
+        console.print("  Summary: reused from cache")
+    
+    if result['fact_check']['has_issues']:
+        console.print(f"\n[yellow]⚠ Fact-check found some issues - please review[/yellow]")
+
+
+def _print_usage(llm: LLMOrchestrator):
+    usage = llm.usage_stats()
+    if usage['prompt_tokens']:
+        console.print(f"  Prompt tokens: {usage['prompt_tokens']} ({usage['cached_tokens']} served from the provider's prompt cache)")
+    for stage, stats in usage['stages'].items():
+        if stats['requests']:
+            console.print(
+                f"  {stage.capitalize()} ({stats['model']}): {stats['requests']} calls, "
+                f"avg {stats['avg_latency_ms']:.0f} ms, {stats['prompt_tokens']} prompt / "
+                f"{stats['completion_tokens']} completion tokens"
+            )
+
+
+@app.command()
+def generate_blog(week_folder: Optional[str] = typer.Argument(None, help="Week folder name")):
+    """Generate a blog post from curated documents."""
+    loader = DocumentLoader()
+    
+    if not week_folder:
+        week_folder = _select_week_folder(loader)
+    
+    docs = _load_docs(loader, week_folder)
+    for doc in docs:
+        console.print(f"  • {doc.title} ({doc.source})")
+    
+    llm = _get_llm()
+    blog_gen = BlogGenerator(llm)
     
     output_path = f"output/{week_folder}/blog-post.md"
     console.print(f"\n[bold]Generating blog post...[/bold]")
     
     try:
-        result = blog_gen.generate(docs, output_path)
-        console.print(f"\n[green]✓ Blog post generated![/green]")
-        console.print(f"  Output: {result['output_file']}")
-        console.print(f"  Citations: {result['fact_check']['citation_count']}")
-        
-        if result['fact_check']['has_issues']:
-            console.print(f"\n[yellow]⚠ Fact-check found some issues - please review[/yellow]")
+        _print_blog_result(blog_gen.generate(docs, output_path))
+        _print_usage(llm)
     except Exception as e:
         console.print(f"[red]Error generating blog post: {e}[/red]")
         raise typer.Exit(1)
@@ -95,39 +136,16 @@ def generate_tweets(
     if not week_folder:
         week_folder = _select_week_folder(loader)
     
-    console.print(f"\n[cyan]Loading documents from {week_folder}...[/cyan]")
-    try:
-        docs = loader.load_week_folder(week_folder)
-    except ValueError as e:
-        console.print(f"[red]Error: {e}[/red]")
-        raise typer.Exit(1)
-    
-    if not docs:
-        console.print("[red]No documents found in the selected folder[/red]")
-        raise typer.Exit(1)
-    
-    console.print(f"[green]Loaded {len(docs)} documents[/green]")
-    
-    try:
-        llm = LLMOrchestrator()
-        tweet_gen = TweetGenerator(llm, count=count)
-    except ValueError as e:
-        console.print(f"[red]Error: {e}[/red]")
-        console.print("[yellow]Make sure OPENAI_API_KEY is set in .env file[/yellow]")
-        raise typer.Exit(1)
+    docs = _load_docs(loader, week_folder)
+    llm = _get_llm()
+    tweet_gen = TweetGenerator(llm, count=count)
     
     output_dir = f"output/{week_folder}"
     console.print(f"\n[bold]Generating {count} tweet ideas...[/bold]")
     
     try:
-        result = tweet_gen.generate(docs, output_dir)
-        console.print(f"\n[green]✓ Tweet ideas generated![/green]")
-        console.print(f"  JSON: {result['json_file']}")
-        console.print(f"  Text: {result['txt_file']}")
-        console.print(f"  Count: {result['tweet_count']}")
-        
-        if result['fact_check']['has_issues']:
-            console.print(f"\n[yellow]⚠ Fact-check found some issues - please review[/yellow]")
+        _print_tweet_result(tweet_gen.generate(docs, output_dir))
+        _print_usage(llm)
     except Exception as e:
         console.print(f"[red]Error generating tweets: {e}[/red]")
         raise typer.Exit(1)
@@ -139,8 +157,28 @@ def generate_all(
     tweet_count: int = typer.Option(25, "--tweet-count", "-c", help="Number of tweet ideas")
 ):
     """Generate both blog post and tweet ideas."""
-    generate_blog(week_folder)
-    generate_tweets(week_folder, tweet_count)
+    loader = DocumentLoader()
+    
+    if not week_folder:
+        week_folder = _select_week_folder(loader)
+    
+    docs = _load_docs(loader, week_folder)
+    for doc in docs:
+        console.print(f"  • {doc.title} ({doc.source})")
+    
+    llm = _get_llm()
+    pipeline = ContentPipeline(llm, tweet_count=tweet_count)
+    console.print(f"\n[bold]Generating blog post and {tweet_count} tweet ideas...[/bold]")
+    
+    try:
+        result = pipeline.generate(docs, f"output/{week_folder}/blog-post.md", f"output/{week_folder}")
+    except Exception as e:
+        console.print(f"[red]Error generating content: {e}[/red]")
+        raise typer.Exit(1)
+    
+    _print_blog_result(result['blog'])
+    _print_tweet_result(result['tweets'])
+    _print_usage(llm)
     console.print("\n[bold green]✓ All content generated![/bold green]")
 
 
@@ -158,13 +196,15 @@ def list_weeks():
     table = Table(title="Available Week Folders")
     table.add_column("Week Folder", style="cyan")
     table.add_column("Status", style="green")
+    table.add_column("Size", style="magenta", justify="right")
     
     for folder in folders:
         try:
-            docs = loader.load_week_folder(folder)
-            table.add_row(folder, f"{len(docs)} documents")
+            listing = loader.list_documents(folder)
+            size_mb = sum(item['size_bytes'] for item in listing) / (1024 * 1024)
+            table.add_row(folder, f"{len(listing)} documents", f"{size_mb:.1f} MB")
         except:
-            table.add_row(folder, "Error loading")
+            table.add_row(folder, "Error loading", "")
     
     console.print(table)
 
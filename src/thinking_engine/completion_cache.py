@@ -0,0 +1,125 @@
+"""Content-addressed on-disk cache of chat completions."""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+class CompletionCacheMiss(RuntimeError):
+    """Raised in replay mode when a request has no recorded completion."""
+
+
+class CompletionCache:
+    """Chat completions stored on disk by hash of (model, messages, temperature).
+
+    Modes:
+      record - serve cached completions and store new ones
+      replay - serve cached completions only; a miss raises CompletionCacheMiss
+
+    Entries expire after `ttl` seconds (0 keeps them forever) and the least
+    recently used are deleted once the directory grows past `max_bytes`.
+    Replay ignores the TTL so recorded runs stay reproducible.
+    """
+
+    MODES = ("record", "replay")
+
+    _default: Optional["CompletionCache"] = None
+    _default_loaded = False
+    _default_lock = threading.Lock()
+
+    def __init__(self, cache_dir: str, mode: str = "record", ttl: float = 7 * 24 * 3600,
+                 max_bytes: int = 200 * 1024 * 1024):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown completion cache mode: {mode} (expected one of {', '.join(self.MODES)})")
+        self.cache_dir = Path(cache_dir)
+        self.mode = mode
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def default(cls) -> Optional["CompletionCache"]:
+        """Process-wide cache from LLM_CACHE_MODE; None when caching is off."""
+        with cls._default_lock:
+            if not cls._default_loaded:
+                mode = os.getenv("LLM_CACHE_MODE", "off").lower()
+                if mode != "off":
+                    cls._default = cls(
+                        os.getenv("LLM_CACHE_DIR", ".cache/completions"),
+                        mode=mode,
+                        ttl=float(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600))),
+                        max_bytes=int(os.getenv("LLM_CACHE_MAX_MB", "200")) * 1024 * 1024,
+                    )
+                cls._default_loaded = True
+            return cls._default
+
+    @staticmethod
+    def make_key(model: str, messages: List[Dict[str, str]], temperature: float) -> str:
+        payload = json.dumps(
+            {'model': model, 'messages': messages, 'temperature': round(temperature, 6)},
+            sort_keys=True, ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        path = self._path(key)
+        try:
+            entry = json.loads(path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            entry = None
+
+        if entry is not None and self.mode != "replay" and self.ttl \
+                and time.time() - entry.get('created', 0) > self.ttl:
+            entry = None
+
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if entry is None:
+            if self.mode == "replay":
+                raise CompletionCacheMiss(f"No recorded completion for key {key[:12]} in {self.cache_dir}")
+            return None
+        try:
+            os.utime(path)  # mtime doubles as last access for eviction
+        except OSError:
+            pass
+        return entry['content']
+
+    def put(self, key: str, content: str, model: str = ""):
+        if self.mode == "replay":
+            return
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp = self.cache_dir / f"{key}.tmp"
+            tmp.write_text(json.dumps({'created': time.time(), 'model': model, 'content': content}),
+                           encoding='utf-8')
+            os.replace(tmp, self._path(key))
+            self._evict()
+        except OSError as e:
+            print(f"Warning: Could not store completion in cache: {e}")
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {'mode': self.mode, 'hits': self.hits, 'misses': self.misses}
+
+    def _evict(self):
+        files = [(p, p.stat()) for p in self.cache_dir.glob("*.json")]
+        total = sum(st.st_size for _, st in files)
+        if total <= self.max_bytes:
+            return
+        for path, st in sorted(files, key=lambda item: item[1].st_mtime):
+            if total <= self.max_bytes:
+                break
+            path.unlink()
+            total -= st.st_size
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
@@ -0,0 +1,69 @@
+"""Combined blog post and tweet generation."""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Generator, List, Union
+
+from .blog_generator import BlogGenerator
+from .document_loaders import Document
+from .llm_orchestrator import AsyncLLMOrchestrator, LLMOrchestrator
+from .tweet_generator import TweetGenerator
+
+
+class ContentPipeline:
+    """Generates the blog post and tweet ideas for one document set.
+
+    The research summary and the document context are computed once and
+    shared; the blog post and the tweet ideas only depend on them, so both
+    run concurrently and the combined latency is close to the slower of the
+    two rather than their sum.
+    """
+
+    def __init__(self, llm: Union[LLMOrchestrator, AsyncLLMOrchestrator], tweet_count: int = 25):
+        self.llm = llm
+        self.blog_gen = BlogGenerator(llm)
+        self.tweet_gen = TweetGenerator(llm, count=tweet_count)
+
+    def generate(self, docs: List[Document], blog_output_path: str, tweet_output_dir: str) -> Dict:
+        flow = self._flow(docs, blog_output_path, tweet_output_dir, asynchronous=False)
+        steps = next(flow)
+        while True:
+            with ThreadPoolExecutor(max_workers=len(steps)) as pool:
+                results = list(pool.map(lambda step: step(), steps))
+            try:
+                steps = flow.send(results)
+            except StopIteration as done:
+                return done.value
+
+    async def agenerate(self, docs: List[Document], blog_output_path: str, tweet_output_dir: str) -> Dict:
+        flow = self._flow(docs, blog_output_path, tweet_output_dir, asynchronous=True)
+        steps = next(flow)
+        while True:
+            results = list(await asyncio.gather(*(step() for step in steps)))
+            try:
+                steps = flow.send(results)
+            except StopIteration as done:
+                return done.value
+
+    def _flow(self, docs: List[Document], blog_output_path: str, tweet_output_dir: str,
+              asynchronous: bool) -> Generator[List[Callable], List, Dict]:
+        """The pipeline for both `generate` and `agenerate`.
+
+        Yields lists of steps to run concurrently and is sent back their
+        results. The documents are the caller's and are left loaded.
+        """
+        if not docs:
+            raise ValueError("No documents provided for content generation")
+        if asynchronous:
+            blog_step, tweet_step = self.blog_gen.agenerate_from_summary, self.tweet_gen.agenerate_from_summary
+        else:
+            blog_step, tweet_step = self.blog_gen.generate_from_summary, self.tweet_gen.generate_from_summary
+
+        print("Analyzing documents...")
+        [(summary, summary_cached)] = yield [lambda: self.llm.prepare(docs)]
+
+        blog, tweets = yield [
+            lambda: blog_step(docs, summary, summary_cached, blog_output_path),
+            lambda: tweet_step(docs, summary, summary_cached, tweet_output_dir),
+        ]
+        return {'blog': blog, 'tweets': tweets, 'summary_cached': summary_cached}
@@ -1,22 +1,230 @@
 """Document loaders for various file formats."""
 
+import hashlib
+import html
+import os
 import re
+import stat
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FuturesTimeoutError
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, Iterator, List, Optional
 import markdown
 from bs4 import BeautifulSoup
 import PyPDF2
 
+from .extraction_cache import ExtractionCache
+from . import text_stream
+
+# Bump whenever extractor output changes so cached text is not reused.
+EXTRACTION_VERSION = 3
+
+_SKIPPED_PAGES_RE = re.compile(r'\[\.\.\. (\d+) of \d+ pages skipped \.\.\.\]')
+
+# Single-pass Markdown stripping. Markup that would start a new HTML text
+# node is replaced by a boundary marker, so splitting on it reproduces the
+# `get_text(separator='\n', strip=True)` output of the render-and-parse path.
+_MD_BOUNDARY = '\x00'
+_MD_HEADING_RE = re.compile(r'^\s{0,3}(?:#{1,6}(?=\s|$)|(?:>\s?)+)\s*')
+_MD_LIST_RE = re.compile(r'^\s*(?:[-*+]|\d+[.)])\s+')
+_MD_RULE_RE = re.compile(r'^\s{0,3}(?:[-*_=]\s*){3,}$')
+_MD_FENCE_RE = re.compile(r'^\s{0,3}(`{3,}|~{3,})')
+_MD_INLINE_RE = re.compile(
+    r'!\[[^\]]*\]\([^)]*\)'                 # images carry no text
+    r'|\[([^\]]+)\]\([^)]*\)'               # links keep their text
+    r'|(`+)(.+?)\2'                         # code spans
+    r'|<((?:[Ff]|[Hh][Tt])[Tt][Pp][Ss]?://[^<>]*)>'  # autolinks keep their address
+    r'|<(?:mailto:)?([^<> !]+@[^@<> ]+)>'
+    r'|<[^>\n]+>'                           # inline HTML tags
+    r'|(\*\*|__)(?=\S)([^\x00]+?)(?<=\S)\6'  # strong
+    r'|\*(?=\S)([^\x00]+?)(?<=\S)\*'         # emphasis; a lone * is literal
+    r'|(?<!\w)_(?=\S)([^\x00]+?)(?<=\S)_(?!\w)'
+)
+_MD_ESCAPE_RE = re.compile(r'\\([\\`*_{}\[\]()#+\-.!])')
+
+
+def _strip_inline(match: re.Match) -> str:
+    for group in (1, 7, 8, 9):
+        if match.group(group) is not None:
+            inner = _MD_INLINE_RE.sub(_strip_inline, match.group(group))
+            return _MD_BOUNDARY + inner + _MD_BOUNDARY
+    for group in (3, 4, 5):
+        if match.group(group) is not None:
+            return _MD_BOUNDARY + match.group(group) + _MD_BOUNDARY
+    return _MD_BOUNDARY
+
+
+def _inline_segments(text: str) -> Iterator[str]:
+    text = _MD_INLINE_RE.sub(_strip_inline, text)
+    text = _MD_ESCAPE_RE.sub(r'\1', text)
+    for segment in text.split(_MD_BOUNDARY):
+        yield html.unescape(segment.strip())
+
+
+def markdown_to_text(md_content: str) -> str:
+    segments = []
+    parts = []
+    code = []
+    fence = None
+    
+    def end_paragraphs():
+        segments.extend(_inline_segments(''.join(parts)))
+        parts.clear()
+    
+    def end_code():
+        # Code is kept verbatim: no inline markup, escapes or entities.
+        segments.append('\n'.join(code).strip())
+        code.clear()
+    
+    # A list marker only opens a list after a blank line, a heading or
+    # another list item; otherwise it is literal paragraph text.
+    list_allowed = True
+    in_list = False
+    for line in md_content.splitlines():
+        if fence:
+            if line.strip().startswith(fence) and not line.strip().strip(fence[0]):
+                end_code()
+                fence = None
+            else:
+                code.append(line)
+            continue
+        opening = _MD_FENCE_RE.match(line)
+        if opening:
+            end_paragraphs()
+            fence = opening.group(1)
+            list_allowed = True
+            continue
+        
+        indented = line.startswith('    ') or line.startswith('\t')
+        if code and (indented or not line.strip()):
+            code.append(line[4:] if line.startswith('    ') else line[1:])
+            continue
+        if code:
+            end_code()
+            list_allowed = True
+        elif indented and list_allowed and not in_list and line.strip():
+            end_paragraphs()
+            code.append(line[4:] if line.startswith('    ') else line[1:])
+            continue
+        
+        if not line.strip() or _MD_RULE_RE.match(line):
+            parts.append(_MD_BOUNDARY)
+            list_allowed = True
+            continue
+        
+        block = _MD_HEADING_RE.match(line)
+        item = None if block else _MD_LIST_RE.match(line)
+        if item and (list_allowed or in_list):
+            block = item
+            in_list = True
+        elif list_allowed and not line[:1].isspace():
+            in_list = False  # an unindented paragraph after a blank line ends the list
+        list_allowed = bool(block) and block is not item
+        
+        hard_break = line.endswith('  ')
+        if block:
+            parts.append(_MD_BOUNDARY)
+            line = line[block.end():]
+            if block is not item and block.group(0).lstrip().startswith('#'):
+                line = line.rstrip().rstrip('#')
+        parts.append(line.strip())
+        parts.append(_MD_BOUNDARY if hard_break or block else '\n')
+    
+    if code:
+        end_code()
+    end_paragraphs()
+    return '\n'.join(segment for segment in segments if segment)
+
 
 class Document:
-    def __init__(self, file_path: str, content: str, source: str, title: Optional[str] = None):
+    """A loaded document.
+
+    `content` may be backed by a UTF-8 text file (an extraction cache entry or
+    the original .txt) instead of a string, in which case it is read on first
+    access and can be dropped again with `release()`. `head()`/`tail()` and
+    `length` avoid reading the whole file where possible.
+    """
+    
+    def __init__(self, file_path: str, content: Optional[str], source: str, title: Optional[str] = None,
+                 pages_skipped: int = 0, text_path: Optional[str] = None, length: Optional[int] = None,
+                 text_encoding: str = 'utf-8'):
         self.file_path = file_path
-        self.content = content
+        self._content = content
+        self._text_path = text_path
+        self._text_encoding = text_encoding
+        self._hash = None
+        self._length = len(content) if content is not None else length
         self.source = source
         self.title = title or self._extract_title(file_path)
         self.file_type = Path(file_path).suffix.lower()
+        self.pages_skipped = pages_skipped
+    
+    @property
+    def content(self) -> str:
+        if self._content is None:
+            self._content = self._read_text() if self._text_path else ""
+            self._length = len(self._content)
+        return self._content
+    
+    @content.setter
+    def content(self, value: str):
+        self._content = value
+        self._length = len(value)
+        self._hash = None
+    
+    @property
+    def is_loaded(self) -> bool:
+        return self._content is not None
+    
+    @property
+    def length(self) -> int:
+        if self._length is None:
+            if self._text_path:
+                self._length = self._count_chars()
+            else:
+                self._length = len(self.content)
+        return self._length
+    
+    def content_hash(self) -> str:
+        if self._hash is None:
+            h = hashlib.sha256()
+            for chunk in self.iter_text():
+                h.update(chunk.encode('utf-8'))
+            self._hash = h.hexdigest()
+        return self._hash
     
-    def _extract_title(self, file_path: str) -> str:
+    def release(self):
+        if self._text_path:
+            self._content = None
+    
+    def head(self, n: int) -> str:
+        if self._content is not None or not self._text_path:
+            return self.content[:max(0, n)]
+        return text_stream.read_head(self._text_path, n, self._text_encoding)
+    
+    def tail(self, n: int) -> str:
+        if n <= 0:
+            return ""
+        if self._content is not None or not self._text_path:
+            return self.content[-n:]
+        return text_stream.read_tail(self._text_path, n, self._text_encoding)
+    
+    def iter_text(self, chunk_size: int = text_stream.CHUNK_SIZE) -> Iterator[str]:
+        if self._content is not None or not self._text_path:
+            content = self.content
+            for i in range(0, len(content), chunk_size):
+                yield content[i:i + chunk_size]
+            return
+        yield from text_stream.iter_text(self._text_path, self._text_encoding, chunk_size)
+    
+    def _read_text(self) -> str:
+        return ''.join(text_stream.iter_text(self._text_path, self._text_encoding))
+    
+    def _count_chars(self) -> int:
+        return text_stream.count_chars(self._text_path, self._text_encoding)
+    
+    @staticmethod
+    def _extract_title(file_path: str) -> str:
         filename = Path(file_path).stem
         title = re.sub(r'^(article|report)-\d+-', '', filename)
         title = title.replace('-', ' ').replace('_', ' ')
@@ -27,8 +235,45 @@ class Document:
 
 
 class DocumentLoader:
-    def __init__(self, base_path: str = "data"):
+    SUPPORTED_EXTENSIONS = ('.md', '.html', '.pdf', '.txt')
+    
+    def __init__(self, base_path: str = "data", workers: Optional[int] = None,
+                 file_timeout: Optional[float] = None, cache_dir: Optional[str] = None,
+                 pdf_char_budget: Optional[int] = None, markdown_engine: Optional[str] = None,
+                 html_parser: Optional[str] = None):
         self.base_path = Path(base_path)
+        self.workers = workers or int(os.getenv("LOADER_WORKERS", "1"))
+        self.file_timeout = file_timeout or float(os.getenv("LOADER_FILE_TIMEOUT", "120"))
+        
+        # Budget mode only extracts as many PDF pages as the context builder keeps.
+        if pdf_char_budget is None and os.getenv("PDF_BUDGET_EXTRACTION", "false").lower() == "true":
+            pdf_char_budget = int(os.getenv("MAX_CHARS_PER_DOCUMENT", "12000"))
+        self.pdf_char_budget = pdf_char_budget
+        
+        # "render" goes through HTML; "fast" strips Markdown in one pass.
+        self.markdown_engine = markdown_engine or os.getenv("MARKDOWN_EXTRACTOR", "render")
+        # Any BeautifulSoup tree builder, e.g. "lxml" for C-speed parsing.
+        self.html_parser = html_parser or os.getenv("HTML_PARSER", "html.parser")
+        
+        # Caching extracted text is opt-in: it writes to disk.
+        if cache_dir is None:
+            cache_dir = os.getenv("EXTRACTION_CACHE_DIR", "")
+        self.cache = None
+        self._batch = threading.local()
+        if cache_dir:
+            max_mb = int(os.getenv("EXTRACTION_CACHE_MAX_MB", "500"))
+            self.cache = ExtractionCache(cache_dir, max_bytes=max_mb * 1024 * 1024)
+    
+    def __getstate__(self):
+        # Pool workers only extract; cache reads and writes stay in the parent.
+        state = self.__dict__.copy()
+        state['cache'] = None
+        state.pop('_batch', None)
+        return state
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._batch = threading.local()
     
     def load_week_folder(self, week_folder: str) -> List[Document]:
         week_path = self.base_path / week_folder
@@ -36,26 +281,41 @@ class DocumentLoader:
         if not week_path.exists():
             raise ValueError(f"Week folder not found: {week_path}")
         
-        docs = []
+        paths = [file_path for file_path in sorted(week_path.iterdir()) if file_path.is_file()]
+        return [doc for doc in self.load_files(paths) if doc]
+    
+    def load_files(self, paths: List[Path]) -> List[Optional[Document]]:
+        """Load the given files, returning one entry (or None) per path in order."""
+        to_load = []
         large_files = []
         
-        for file_path in sorted(week_path.iterdir()):
-            if not file_path.is_file():
-                continue
-                
+        for file_path in paths:
             try:
                 file_size_mb = file_path.stat().st_size / (1024 * 1024)
-                if file_size_mb > 5:
-                    large_files.append((file_path.name, file_size_mb))
-                
-                doc = self.load_document(str(file_path))
-                if doc:
-                    content_mb = len(doc.content) / (1024 * 1024)
-                    if content_mb > 2:
-                        print(f"⚠️  Large document: {doc.title} ({content_mb:.1f} MB text)")
-                    docs.append(doc)
-            except Exception as e:
+            except OSError as e:
                 print(f"Warning: Failed to load {file_path}: {e}")
+                continue
+            if file_size_mb > 5:
+                large_files.append((file_path.name, file_size_mb))
+            to_load.append(file_path)
+        
+        # The cache index is written once for the whole batch, not per file.
+        self._batch.active = True
+        try:
+            if self.workers > 1 and len(to_load) > 1:
+                loaded = self._load_parallel(to_load)
+            else:
+                loaded = [self._load_safely(file_path) for file_path in to_load]
+        finally:
+            self._batch.active = False
+            if self.cache:
+                self.cache.flush()
+        
+        for doc in loaded:
+            if doc:
+                content_mb = doc.length / (1024 * 1024)
+                if content_mb > 2:
+                    print(f"⚠️  Large document: {doc.title} ({content_mb:.1f} MB text)")
         
         if large_files:
             print(f"\n⚠️  Found {len(large_files)} large file(s) (>5MB):")
@@ -65,7 +325,130 @@ class DocumentLoader:
                 print(f"   ... and {len(large_files) - 5} more")
             print("   Large files will be truncated to fit token limits.\n")
         
-        return docs
+        by_path = dict(zip(to_load, loaded))
+        return [by_path.get(file_path) for file_path in paths]
+    
+    def _load_safely(self, file_path: Path) -> Optional[Document]:
+        try:
+            return self.load_document(str(file_path))
+        except Exception as e:
+            print(f"Warning: Failed to load {file_path}: {e}")
+            return None
+    
+    def _load_parallel(self, paths: List[Path]) -> List[Optional[Document]]:
+        # Results are collected in submission order so the returned documents
+        # match the serial loader exactly. A worker stuck on a pathological
+        # file cannot be interrupted; we stop waiting for it, move on, and
+        # terminate the pool's processes once the other files are done.
+        results = {}
+        pending = []
+        for file_path in paths:
+            ext = file_path.suffix.lower()
+            doc = None
+            if ext == '.txt' or ext not in self.SUPPORTED_EXTENSIONS:
+                results[file_path] = self._load_safely(file_path)
+                continue
+            if self.cache:
+                doc = self._load_cached(file_path)
+            if doc:
+                results[file_path] = doc
+            else:
+                pending.append(file_path)
+        
+        if pending:
+            executor = ProcessPoolExecutor(max_workers=min(self.workers, len(pending)))
+            timed_out = False
+            try:
+                futures = [executor.submit(self._extract, str(p)) for p in pending]
+                for file_path, future in zip(pending, futures):
+                    try:
+                        content = future.result(timeout=self.file_timeout)
+                    except FuturesTimeoutError:
+                        future.cancel()
+                        timed_out = True
+                        print(f"Warning: Timed out loading {file_path} after {self.file_timeout:.0f}s")
+                        continue
+                    except Exception as e:
+                        print(f"Warning: Failed to load {file_path}: {e}")
+                        continue
+                    results[file_path] = self._finish(file_path, content)
+            finally:
+                if timed_out:
+                    self._terminate_workers(executor)
+                executor.shutdown(wait=False, cancel_futures=True)
+        
+        return [results.get(file_path) for file_path in paths]
+    
+    @staticmethod
+    def _terminate_workers(executor: ProcessPoolExecutor):
+        # ProcessPoolExecutor has no public way to stop a running task, so
+        # end its worker processes directly.
+        processes = list((getattr(executor, '_processes', None) or {}).values())
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.kill()
+    
+    def _load_cached(self, file_path: Path) -> Optional[Document]:
+        entry = self.cache.lookup(str(file_path), self._cache_variant(file_path))
+        if entry is None:
+            return None
+        doc = Document(
+            str(file_path), None, self._get_source(file_path.name),
+            pages_skipped=entry['meta'].get('pages_skipped', 0),
+            text_path=entry['path'], length=entry['chars']
+        )
+        return doc if self.cache.pin(entry['blob'], doc) else None
+    
+    def _finish(self, file_path: Path, content: Optional[str]) -> Optional[Document]:
+        if not content or not content.strip():
+            return None
+        
+        pages_skipped = 0
+        if file_path.suffix.lower() == '.pdf':
+            match = _SKIPPED_PAGES_RE.search(content)
+            if match:
+                pages_skipped = int(match.group(1))
+        
+        source = self._get_source(file_path.name)
+        if self.cache:
+            # Hand back a document backed by the cache entry so the parsed
+            # text does not stay resident for the rest of the request.
+            entry = self.cache.put(str(file_path), content, self._cache_variant(file_path),
+                                   meta={'pages_skipped': pages_skipped})
+            if entry:
+                doc = Document(str(file_path), None, source, pages_skipped=pages_skipped,
+                               text_path=entry['path'], length=len(content))
+                # The document reads its text back from the blob, so eviction must skip it.
+                if self.cache.pin(entry['blob'], doc):
+                    return doc
+        return Document(str(file_path), content, source, pages_skipped=pages_skipped)
+    
+    def _load_text_document(self, file_path: Path) -> Optional[Document]:
+        # Plain text needs no extraction: it is decoded from disk in bounded
+        # chunks whenever the content, its length or a head/tail is needed.
+        if file_path.stat().st_size == 0:
+            return None
+        doc = Document(str(file_path), None, self._get_source(file_path.name), text_path=str(file_path),
+                       text_encoding=text_stream.sniff_encoding(str(file_path)))
+        if not any(chunk.strip() for chunk in doc.iter_text()):
+            return None
+        return doc
+    
+    def _cache_variant(self, file_path: Path) -> str:
+        ext = file_path.suffix.lower()
+        variant = f"{ext}:v{EXTRACTION_VERSION}"
+        if ext == '.pdf' and self.pdf_char_budget:
+            variant += f":budget={self.pdf_char_budget}"
+        elif ext == '.md':
+            variant += f":{self.markdown_engine}"
+            if self.markdown_engine != "fast":
+                variant += f":{self.html_parser}"
+        elif ext == '.html':
+            variant += f":{self.html_parser}"
+        return variant
     
     def load_document(self, file_path: str) -> Optional[Document]:
         path = Path(file_path)
@@ -73,42 +456,53 @@ class DocumentLoader:
             return None
         
         ext = path.suffix.lower()
-        source = self._get_source(path.name)
+        if ext not in self.SUPPORTED_EXTENSIONS:
+            print(f"Unsupported file type: {ext}")
+            return None
         
+        if ext == '.txt':
+            return self._load_text_document(path)
+        
+        if self.cache:
+            doc = self._load_cached(path)
+            if doc:
+                return doc
+        
+        doc = self._finish(path, self._extract(file_path))
+        if self.cache and not getattr(self._batch, 'active', False):
+            self.cache.flush()
+        return doc
+    
+    def _extract(self, file_path: str) -> str:
         loaders = {
             '.md': self._load_markdown,
             '.html': self._load_html,
             '.pdf': self._load_pdf,
             '.txt': self._load_text,
         }
-        
-        loader = loaders.get(ext)
-        if not loader:
-            print(f"Unsupported file type: {ext}")
-            return None
-        
-        content = loader(file_path)
-        if not content or not content.strip():
-            return None
-        
-        return Document(file_path, content, source)
+        return loaders[Path(file_path).suffix.lower()](file_path)
     
     def _load_markdown(self, file_path: str) -> str:
         with open(file_path, 'r', encoding='utf-8') as f:
             md_content = f.read()
-        html = markdown.markdown(md_content)
-        soup = BeautifulSoup(html, 'html.parser')
+        if self.markdown_engine == "fast":
+            return markdown_to_text(md_content)
+        rendered = markdown.markdown(md_content, extensions=['fenced_code'])
+        soup = BeautifulSoup(rendered, self.html_parser)
         return soup.get_text(separator='\n', strip=True)
     
     def _load_html(self, file_path: str) -> str:
         with open(file_path, 'r', encoding='utf-8') as f:
             html_content = f.read()
-        soup = BeautifulSoup(html_content, 'html.parser')
+        soup = BeautifulSoup(html_content, self.html_parser)
         for tag in soup(["script", "style"]):
             tag.decompose()
         return soup.get_text(separator='\n', strip=True)
     
     def _load_pdf(self, file_path: str) -> str:
+        if self.pdf_char_budget:
+            return self._load_pdf_budgeted(file_path, self.pdf_char_budget)
+        
         parts = []
         try:
             with open(file_path, 'rb') as f:
@@ -121,9 +515,45 @@ class DocumentLoader:
             print(f"Error reading PDF {file_path}: {e}")
         return '\n\n'.join(parts)
     
+    def _load_pdf_budgeted(self, file_path: str, budget: int) -> str:
+        # Read pages from the front until half the budget is filled, then from
+        # the back for the other half, and skip whatever is left in between.
+        head, tail = [], []
+        head_chars = tail_chars = 0
+        head_budget = budget // 2
+        tail_budget = budget - head_budget
+        total = 0
+        front, back = 0, -1
+        try:
+            with open(file_path, 'rb') as f:
+                reader = PyPDF2.PdfReader(f)
+                total = len(reader.pages)
+                back = total - 1
+                while front <= back and (head_chars < head_budget or tail_chars < tail_budget):
+                    if head_chars < head_budget:
+                        text = reader.pages[front].extract_text()
+                        front += 1
+                        if text:
+                            head.append(text)
+                            head_chars += len(text)
+                    else:
+                        text = reader.pages[back].extract_text()
+                        back -= 1
+                        if text:
+                            tail.append(text)
+                            tail_chars += len(text)
+        except Exception as e:
+            print(f"Error reading PDF {file_path}: {e}")
+        
+        skipped = max(0, back - front + 1)
+        parts = head
+        if skipped and (head or tail):
+            parts = parts + [f"[... {skipped} of {total} pages skipped ...]"]
+        return '\n\n'.join(parts + tail[::-1])
+    
     def _load_text(self, file_path: str) -> str:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return f.read()
+        encoding = text_stream.sniff_encoding(file_path)
+        return ''.join(text_stream.iter_text(file_path, encoding))
     
     def _get_source(self, filename: str) -> str:
         match = re.search(r'-(coindesk|theblock|delphi|fintechtakes|block|digital|takes)-', filename.lower())
@@ -132,6 +562,33 @@ class DocumentLoader:
         stem = Path(filename).stem
         return stem.split('-')[0] if '-' in stem else "unknown"
     
+    def list_documents(self, week_folder: str) -> List[Dict]:
+        # Metadata only: titles and sources come from file names, so no file
+        # is opened. Files that would extract to empty text are still listed.
+        week_path = self.base_path / week_folder
+        
+        if not week_path.exists():
+            raise ValueError(f"Week folder not found: {week_path}")
+        
+        listing = []
+        for file_path in sorted(week_path.iterdir()):
+            if file_path.suffix.lower() not in self.SUPPORTED_EXTENSIONS:
+                continue
+            try:
+                st = file_path.stat()
+            except OSError:
+                continue
+            if not stat.S_ISREG(st.st_mode):
+                continue
+            listing.append({
+                'title': Document._extract_title(str(file_path)),
+                'source': self._get_source(file_path.name),
+                'file_path': str(file_path),
+                'file_type': file_path.suffix.lower(),
+                'size_bytes': st.st_size,
+            })
+        return listing
+    
     def list_week_folders(self) -> List[str]:
         if not self.base_path.exists():
             return []
@@ -0,0 +1,225 @@
+"""On-disk cache of extracted document text."""
+
+import hashlib
+import json
+import os
+import threading
+import time
+import weakref
+from pathlib import Path
+from typing import Dict, Optional
+
+
+class ExtractionCache:
+    """Content-addressed store of extracted text with a size-bounded LRU.
+
+    Entries are found by (path, size, mtime) first, so an unchanged file costs
+    a single stat. When the stat changes but the bytes do not (a `touch`, a
+    re-copy), the content hash still finds the cached text without a re-parse.
+    Blobs pinned by a live Document are never evicted, so the bound may be
+    exceeded until those documents are dropped.
+
+    Safe to share between threads.
+    """
+
+    INDEX_FILE = "index.json"
+
+    def __init__(self, cache_dir: str, max_bytes: int = 500 * 1024 * 1024):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._files: Dict[str, Dict] = {}
+        self._blobs: Dict[str, Dict] = {}
+        self._dirty = False
+        self._digests: Dict[str, tuple] = {}
+        self._pins: Dict[str, weakref.WeakSet] = {}
+        self._lock = threading.Lock()
+        self._load_index()
+
+    def get(self, file_path: str, variant: str = "") -> Optional[str]:
+        entry = self.lookup(file_path, variant)
+        if entry is None:
+            return None
+        try:
+            return Path(entry['path']).read_text(encoding='utf-8')
+        except OSError:
+            return None
+
+    def lookup(self, file_path: str, variant: str = "") -> Optional[Dict]:
+        """Find cached text without reading it.
+
+        Returns the blob path, its length in characters and any metadata
+        stored with it, or None on a miss.
+        """
+        path = Path(file_path).resolve()
+        try:
+            st = path.stat()
+        except OSError:
+            return None
+
+        with self._lock:
+            entry = self._files.get(str(path))
+            if entry and entry['size'] == st.st_size and entry['mtime_ns'] == st.st_mtime_ns \
+                    and entry['variant'] == variant:
+                found = self._touch_blob(entry['blob'])
+                if found is not None:
+                    self.hits += 1
+                    return found
+
+        # Stat changed (or first sighting of this path): fall back to the hash,
+        # computed outside the lock since it reads the whole file.
+        blob = self._blob_key(self._digest(path, st), variant)
+        with self._lock:
+            found = self._touch_blob(blob)
+            if found is None:
+                self.misses += 1
+                return None
+
+            self._remember(path, st, blob, variant)
+            self.hits += 1
+            return found
+
+    def put(self, file_path: str, text: str, variant: str = "",
+            meta: Optional[Dict] = None) -> Optional[Dict]:
+        path = Path(file_path).resolve()
+        data = text.encode('utf-8')
+        try:
+            st = path.stat()
+            blob = self._blob_key(self._digest(path, st), variant)
+        except OSError as e:
+            print(f"Warning: Could not cache extracted text for {file_path}: {e}")
+            return None
+
+        with self._lock:
+            try:
+                self.cache_dir.mkdir(parents=True, exist_ok=True)
+                tmp = self._blob_path(blob).with_suffix('.tmp')
+                tmp.write_bytes(data)
+                os.replace(tmp, self._blob_path(blob))
+            except OSError as e:
+                print(f"Warning: Could not cache extracted text for {file_path}: {e}")
+                return None
+
+            self._blobs[blob] = {
+                'bytes': len(data),
+                'chars': len(text),
+                'meta': meta or {},
+                'last_access': time.time(),
+            }
+            self._remember(path, st, blob, variant)
+            self._evict(keep=blob)
+            return self._touch_blob(blob)
+
+    def pin(self, blob: str, owner: object) -> bool:
+        """Keep `blob` on disk for as long as `owner` is alive.
+
+        False if another thread evicted it after it was looked up or put.
+        """
+        with self._lock:
+            if blob not in self._blobs:
+                return False
+            self._pins.setdefault(blob, weakref.WeakSet()).add(owner)
+            return True
+
+    def flush(self):
+        """Write the index if it changed; callers flush once per batch of puts."""
+        with self._lock:
+            if not self._dirty:
+                return
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp = self.cache_dir / (self.INDEX_FILE + '.tmp')
+            tmp.write_text(json.dumps({'files': self._files, 'blobs': self._blobs}), encoding='utf-8')
+            os.replace(tmp, self.cache_dir / self.INDEX_FILE)
+            self._dirty = False
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'entries': len(self._blobs),
+                'bytes': sum(b['bytes'] for b in self._blobs.values()),
+            }
+
+    def _remember(self, path: Path, st: os.stat_result, blob: str, variant: str):
+        self._files[str(path)] = {
+            'size': st.st_size,
+            'mtime_ns': st.st_mtime_ns,
+            'blob': blob,
+            'variant': variant,
+        }
+        self._dirty = True
+
+    def _digest(self, path: Path, st: os.stat_result) -> str:
+        # A miss is normally followed by a put for the same file; remember the
+        # hash so the file is only read once.
+        stamp = (st.st_size, st.st_mtime_ns)
+        cached = self._digests.get(str(path))
+        if cached and cached[0] == stamp:
+            return cached[1]
+        digest = self._hash_file(path)
+        self._digests[str(path)] = (stamp, digest)
+        return digest
+
+    def _touch_blob(self, blob: str) -> Optional[Dict]:
+        meta = self._blobs.get(blob)
+        if meta is None:
+            return None
+        blob_path = self._blob_path(blob)
+        if not blob_path.exists():
+            del self._blobs[blob]
+            self._dirty = True
+            return None
+        meta['last_access'] = time.time()
+        self._dirty = True
+        return {'blob': blob, 'path': str(blob_path), 'chars': meta.get('chars'), 'meta': meta.get('meta', {})}
+
+    def _evict(self, keep: str = ""):
+        total = sum(b['bytes'] for b in self._blobs.values())
+        if total <= self.max_bytes:
+            return
+
+        for blob, meta in sorted(self._blobs.items(), key=lambda item: item[1]['last_access']):
+            if total <= self.max_bytes:
+                break
+            if blob == keep or self._pins.get(blob):
+                continue
+            self._pins.pop(blob, None)
+            try:
+                self._blob_path(blob).unlink()
+            except OSError:
+                pass
+            del self._blobs[blob]
+            total -= meta['bytes']
+
+        self._files = {p: e for p, e in self._files.items() if e['blob'] in self._blobs}
+        self._dirty = True
+
+    def _load_index(self):
+        index_path = self.cache_dir / self.INDEX_FILE
+        if not index_path.exists():
+            return
+        try:
+            data = json.loads(index_path.read_text(encoding='utf-8'))
+            self._files = data.get('files', {})
+            self._blobs = data.get('blobs', {})
+        except (OSError, ValueError) as e:
+            print(f"Warning: Ignoring unreadable extraction cache index {index_path}: {e}")
+
+    def _blob_path(self, blob: str) -> Path:
+        return self.cache_dir / f"{blob}.txt"
+
+    @staticmethod
+    def _blob_key(digest: str, variant: str) -> str:
+        if not variant:
+            return digest
+        return f"{digest}-{hashlib.sha1(variant.encode('utf-8')).hexdigest()[:12]}"
+
+    @staticmethod
+    def _hash_file(path: Path) -> str:
+        h = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                h.update(chunk)
+        return h.hexdigest()
@@ -1,31 +1,133 @@
 """Fact-checking layer."""
 
 import re
-from typing import List, Dict
+import threading
+from bisect import bisect_left
+from collections import Counter, OrderedDict
+from pathlib import Path
+from typing import Dict, List, Set, Tuple
 from .document_loaders import Document
 
+# Claim terms: whole words of four or more characters.
+_TERM_RE = re.compile(r'\w{4,}')
+_TRAILING_WORD_RE = re.compile(r'\w*$')
+
+_CITATION_RE = re.compile(r'\[Source:\s*([^\]]+)\]')
+_CITATION_MARK = '[Source:'
+# Sentences are the runs of text between terminators.
+_SENTENCE_RE = re.compile(r'[^.!?]+')
+_CLAIM_RE = re.compile(
+    r'\d+%'
+    r'|\$\d+'
+    r'|\d+\s*(million|billion|thousand)'
+    r'|(increased|decreased|rose|fell|grew|shrank)'
+    r'|(according to|data shows|research indicates)',
+    re.IGNORECASE
+)
+_SPECIFIC_CLAIM_RE = re.compile(
+    r'\d+%'
+    r'|\$\d+'
+    r'|\d+\s*(million|billion|thousand)'
+    r'|(is|are|was|were)\s+(up|down|increasing|decreasing)',
+    re.IGNORECASE
+)
+# Characters around a claim searched for a citation.
+_CITATION_WINDOW = 100
+
+
+class ClaimIndex:
+    """Inverted index from words to the documents containing them.
+    
+    Built in one pass over each document's text, so verifying a claim is a
+    handful of set lookups instead of a scan of every document.
+    """
+    
+    def __init__(self, docs: List[Document]):
+        self.doc_ids = [Path(doc.file_path).name for doc in docs]
+        self.postings: Dict[str, Set[int]] = {}
+        for i, doc in enumerate(docs):
+            for term in self._doc_terms(doc):
+                self.postings.setdefault(term, set()).add(i)
+    
+    @staticmethod
+    def _doc_terms(doc: Document) -> Set[str]:
+        words = set()
+        carry = ""
+        for piece in doc.iter_text():
+            text = (carry + piece).lower()
+            # The last word may continue in the next piece.
+            cut = _TRAILING_WORD_RE.search(text).start()
+            carry = text[cut:]
+            words.update(_TERM_RE.findall(text, 0, cut))
+        words.update(_TERM_RE.findall(carry))
+        return words
+    
+    def lookup(self, terms: List[str], min_matches: int = 2) -> List[str]:
+        """IDs of the documents containing at least `min_matches` of `terms`."""
+        counts = Counter()
+        for term in terms:
+            counts.update(self.postings.get(term, ()))
+        return [self.doc_ids[i] for i, matches in sorted(counts.items()) if matches >= min_matches]
+
+
+_indexes: "OrderedDict[tuple, ClaimIndex]" = OrderedDict()
+_indexes_lock = threading.Lock()
+_INDEX_MAX_ENTRIES = 8
+
+
+def get_claim_index(docs: List[Document]) -> ClaimIndex:
+    """Index for this exact document set, built once and shared by every check of it."""
+    key = tuple((doc.file_path, doc.content_hash()) for doc in docs)
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is not None:
+            _indexes.move_to_end(key)
+            return index
+    
+    index = ClaimIndex(docs)
+    with _indexes_lock:
+        _indexes[key] = index
+        while len(_indexes) > _INDEX_MAX_ENTRIES:
+            _indexes.popitem(last=False)
+    return index
+
 
 class FactChecker:
     def __init__(self, docs: List[Document]):
         self.docs = docs
+        self._index = None
+    
+    @property
+    def index(self) -> ClaimIndex:
+        if self._index is None:
+            self._index = get_claim_index(self.docs)
+        return self._index
     
     def check_blog_post(self, content: str) -> Dict:
         issues = []
         citations = self._extract_citations(content)
         
+        known: Dict[str, bool] = {}
         for citation in citations:
-            if not self._citation_exists(citation):
+            if citation not in known:
+                known[citation] = self._citation_exists(citation)
+            if not known[citation]:
                 issues.append({
                     'type': 'invalid_citation',
                     'citation': citation,
                     'severity': 'medium'
                 })
         
-        potential_claims = self._find_claims(content)
+        # Start offsets of every citation, for the nearby-citation lookups.
+        marks = self._citation_marks(content)
         uncited = []
-        for claim in potential_claims:
-            if not self._has_nearby_citation(content, claim):
-                if not self._verify_claim(claim):
+        evidence = []
+        for pos, claim in self._scan_claims(content):
+            if not self._has_nearby_citation(marks, pos, claim):
+                documents = self._claim_evidence(claim)
+                if documents:
+                    evidence.append({'claim': claim, 'documents': documents})
+                else:
                     uncited.append(claim)
         
         if uncited:
@@ -38,7 +140,8 @@ class FactChecker:
         return {
             'has_issues': len(issues) > 0,
             'issues': issues,
-            'citation_count': len(citations)
+            'citation_count': len(citations),
+            'evidence': evidence
         }
     
     def check_tweet_ideas(self, tweets: List[Dict[str, str]]) -> Dict:
@@ -52,7 +155,9 @@ class FactChecker:
             if self._has_specific_claim(text) and not source:
                 missing_sources.append({
                     'index': i + 1,
-                    'tweet': text[:100] + '...' if len(text) > 100 else text
+                    'tweet': text[:100] + '...' if len(text) > 100 else text,
+                    # Documents the claim could be sourced from.
+                    'evidence': self._claim_evidence(text)
                 })
         
         if missing_sources:
@@ -68,7 +173,7 @@ class FactChecker:
         }
     
     def _extract_citations(self, content: str) -> List[str]:
-        return re.findall(r'\[Source:\s*([^\]]+)\]', content)
+        return _CITATION_RE.findall(content)
     
     def _citation_exists(self, citation: str) -> bool:
         citation_lower = citation.lower()
@@ -77,62 +182,44 @@ class FactChecker:
                 return True
         return False
     
-    def _find_claims(self, content: str) -> List[str]:
-        sentences = re.split(r'[.!?]+', content)
+    @staticmethod
+    def _scan_claims(content: str) -> List[Tuple[int, str]]:
+        """(offset, text) of each sentence that reads like a factual claim, in one pass."""
         claims = []
-        
-        patterns = [
-            r'\d+%',
-            r'\$\d+',
-            r'\d+\s*(million|billion|thousand)',
-            r'(increased|decreased|rose|fell|grew|shrank)',
-            r'(according to|data shows|research indicates)'
-        ]
-        
-        for sentence in sentences:
-            sentence = sentence.strip()
-            if len(sentence) > 20:
-                for pattern in patterns:
-                    if re.search(pattern, sentence, re.IGNORECASE):
-                        claims.append(sentence[:200])
-                        break
-        
+        for match in _SENTENCE_RE.finditer(content):
+            sentence = match.group()
+            stripped = sentence.strip()
+            if len(stripped) > 20 and _CLAIM_RE.search(stripped):
+                pos = match.start() + len(sentence) - len(sentence.lstrip())
+                claims.append((pos, stripped[:200]))
         return claims
     
-    def _has_nearby_citation(self, content: str, claim: str) -> bool:
-        pos = content.find(claim)
-        if pos == -1:
-            return False
-        
-        start = max(0, pos - 100)
-        end = min(len(content), pos + len(claim) + 100)
-        nearby = content[start:end]
-        
-        return bool(re.search(r'\[Source:', nearby))
+    @staticmethod
+    def _citation_marks(content: str) -> List[int]:
+        marks = []
+        pos = content.find(_CITATION_MARK)
+        while pos != -1:
+            marks.append(pos)
+            pos = content.find(_CITATION_MARK, pos + 1)
+        return marks
+    
+    @staticmethod
+    def _has_nearby_citation(marks: List[int], pos: int, claim: str) -> bool:
+        """Whether a citation lies entirely within the window around the claim at `pos`."""
+        start = pos - _CITATION_WINDOW
+        latest = pos + len(claim) + _CITATION_WINDOW - len(_CITATION_MARK)
+        i = bisect_left(marks, start)
+        return i < len(marks) and marks[i] <= latest
     
     def _verify_claim(self, claim: str) -> bool:
-        terms = re.findall(r'\b\w{4,}\b', claim.lower())
+        return bool(self._claim_evidence(claim))
+    
+    def _claim_evidence(self, claim: str) -> List[str]:
+        """IDs of the documents sharing at least two of the claim's first five terms."""
+        terms = _TERM_RE.findall(claim.lower())[:5]
         if not terms:
-            return False
-        
-        for doc in self.docs:
-            doc_lower = doc.content.lower()
-            matches = sum(1 for term in terms[:5] if term in doc_lower)
-            if matches >= 2:
-                return True
-        
-        return False
+            return []
+        return self.index.lookup(terms)
     
     def _has_specific_claim(self, text: str) -> bool:
-        patterns = [
-            r'\d+%',
-            r'\$\d+',
-            r'\d+\s*(million|billion|thousand)',
-            r'(is|are|was|were)\s+(up|down|increasing|decreasing)'
-        ]
-        
-        for pattern in patterns:
-            if re.search(pattern, text, re.IGNORECASE):
-                return True
-        
-        return False
+        return bool(_SPECIFIC_CLAIM_RE.search(text))
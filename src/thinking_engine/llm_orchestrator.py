@@ -1,29 +1,238 @@
 """LLM orchestration for content generation."""
 
+import asyncio
 import os
 import re
-from typing import List, Dict
-from openai import OpenAI
+import threading
+import time
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Generator, List, Dict, NamedTuple, Optional, Tuple
+import openai
+from openai import AsyncOpenAI, OpenAI
 from dotenv import load_dotenv
 from .document_loaders import Document
+from .completion_cache import CompletionCache
+from .rate_limiter import BATCH, RequestScheduler
+from .retrieval import get_index, split_chunks
+from .summary_cache import SummaryCache
+from .token_budget import STAGE_OUTPUT_TOKENS, context_window, fit_tokens, get_tokenizer, input_budget, pack_document
 
 load_dotenv()
 
+# Bump when the summary prompt changes so cached summaries are not reused.
+SUMMARY_PROMPT_VERSION = 1
 
-class LLMOrchestrator:
-    def __init__(self, model: str = None, temperature: float = 0.3):
+# direct: one summary call over the truncated source text.
+# map_reduce: summarize each document in parallel, then summarize the notes.
+SUMMARY_MODES = ("direct", "map_reduce")
+
+# chars: budget context with MAX_CHARS_PER_DOCUMENT / MAX_TOTAL_CONTEXT_CHARS.
+# tokens: budget with the model's tokenizer against its context window.
+CONTEXT_BUDGETS = ("chars", "tokens")
+
+# head_tail: keep the start and end of long documents.
+# relevance: fill the budget with the chunks that rank highest against the prompt.
+CONTEXT_SELECTIONS = ("head_tail", "relevance")
+
+# Completion tokens assumed per request when reserving tokens-per-minute
+# budget; the reservation is corrected from the reported usage afterwards.
+EXPECTED_OUTPUT_TOKENS = 1024
+
+# Style focus of each tweet shard, cycled when there are more shards.
+TWEET_STYLES = (
+    "data-driven: lead with a specific number or statistic",
+    "opinion: take a clear, defensible position",
+    "questions: pose a question the research raises",
+    "insights: explain why a development matters",
+    "risks: point out a risk, caveat or contrarian angle",
+)
+
+# Extra requests for only the missing tweets when a round comes up short.
+TWEET_TOPUP_ROUNDS = 2
+
+# A top-up lists at most the last TWEET_AVOID_LIMIT tweets, each cut to 280
+# characters, and the tweet context reserves TWEET_AVOID_TOKENS per listed tweet.
+TWEET_AVOID_LIMIT = 20
+TWEET_AVOID_TOKENS = 120
+
+# prefix: every stage's prompt opens with the same system message and source
+# documents, so the provider's prompt cache serves them after the first call.
+# inline: the documents sit inside each stage's own instructions.
+PROMPT_LAYOUTS = ("prefix", "inline")
+
+SHARED_SYSTEM_PROMPT = (
+    "You are a careful crypto/fintech analyst and writer. "
+    "You only make claims supported by the provided source documents and always attribute them."
+)
+
+# Stages with their own model and temperature. "draft" only runs when
+# BLOG_DRAFT_MODEL is set: a fast model drafts the blog post and the blog
+# model polishes the draft.
+STAGES = ("summary", "blog", "tweets", "draft")
+
+# Shared contexts kept per orchestrator in the prefix layout.
+SHARED_CONTEXT_ENTRIES = 8
+
+_TWEET_WORD_RE = re.compile(r"[a-z0-9$%.]+")
+
+
+class _Calls(NamedTuple):
+    """Completions a flow waits for: (messages, stage, priority) each, run at most `concurrency` at a time."""
+    requests: List[Tuple[List[Dict[str, str]], str, Optional[int]]]
+    concurrency: int
+
+
+# A flow yields _Calls, is sent back the completions in the same order, and
+# returns its result. The sync and async orchestrators only differ in how
+# they run the calls.
+Flow = Generator[_Calls, List[str], object]
+
+
+class BaseLLMOrchestrator:
+    """Prompt construction, response parsing and the generation flows shared by the sync and async clients.
+    
+    Each operation is written once as a flow (see `Flow`) that yields the
+    completions it needs; subclasses drive flows with `_run` and implement
+    the transport in `_complete`.
+    """
+    
+    def __init__(self, model: str = None, temperature: float = 0.3,
+                 summary_cache: Optional[SummaryCache] = None,
+                 completion_cache: Optional[CompletionCache] = None,
+                 summary_mode: Optional[str] = None,
+                 scheduler: Optional[RequestScheduler] = None):
         api_key = os.getenv("OPENAI_API_KEY")
         if not api_key:
             raise ValueError("OPENAI_API_KEY not found in environment variables")
         
-        self.client = OpenAI(api_key=api_key)
+        self.api_key = api_key
         self.model = model or os.getenv("OPENAI_MODEL", "gpt-4o")
         self.temperature = temperature
+        self.summary_cache = summary_cache or SummaryCache.default()
+        self.completion_cache = completion_cache or CompletionCache.default()
+        # Retries happen in the scheduler, so the clients are built with max_retries=0.
+        self.scheduler = scheduler or RequestScheduler.default()
+        self.summary_mode = (summary_mode or os.getenv("SUMMARY_MODE", "direct")).lower()
+        if self.summary_mode not in SUMMARY_MODES:
+            raise ValueError(f"Unknown summary mode: {self.summary_mode} (expected one of {', '.join(SUMMARY_MODES)})")
+        self.context_budget = os.getenv("CONTEXT_BUDGET", "chars").lower()
+        if self.context_budget not in CONTEXT_BUDGETS:
+            raise ValueError(f"Unknown context budget: {self.context_budget} (expected one of {', '.join(CONTEXT_BUDGETS)})")
+        self.context_selection = os.getenv("CONTEXT_SELECTION", "head_tail").lower()
+        if self.context_selection not in CONTEXT_SELECTIONS:
+            raise ValueError(f"Unknown context selection: {self.context_selection} (expected one of {', '.join(CONTEXT_SELECTIONS)})")
+        self.prompt_layout = os.getenv("PROMPT_LAYOUT", "inline").lower()
+        if self.prompt_layout not in PROMPT_LAYOUTS:
+            raise ValueError(f"Unknown prompt layout: {self.prompt_layout} (expected one of {', '.join(PROMPT_LAYOUTS)})")
+        blog_temperature = float(os.getenv("BLOG_TEMPERATURE", temperature))
+        self.stage_models: Dict[str, Tuple[str, float]] = {
+            "summary": (os.getenv("SUMMARY_MODEL") or self.model, float(os.getenv("SUMMARY_TEMPERATURE", temperature))),
+            "blog": (os.getenv("BLOG_MODEL") or self.model, blog_temperature),
+            "tweets": (os.getenv("TWEET_MODEL") or self.model, float(os.getenv("TWEET_TEMPERATURE", temperature + 0.1))),
+        }
+        if os.getenv("BLOG_DRAFT_MODEL"):
+            self.stage_models["draft"] = (os.getenv("BLOG_DRAFT_MODEL"), blog_temperature)
+        self.map_concurrency = int(os.getenv("SUMMARY_MAP_CONCURRENCY", "8"))
+        self.chunk_chars = int(os.getenv("SUMMARY_CHUNK_CHARS", os.getenv("MAX_CHARS_PER_DOCUMENT", "12000")))
+        self.max_chunks = int(os.getenv("SUMMARY_MAX_CHUNKS_PER_DOCUMENT", "16"))
+        self._shared_contexts: "OrderedDict[str, str]" = OrderedDict()
+        self._usage = Counter()
+        self._lock = threading.Lock()
     
-    def summarize_documents(self, docs: List[Document]) -> str:
-        context = self._build_context(docs)
+    def usage_stats(self) -> Dict:
+        """Tokens reported by the API so far, in total and per stage, with per-stage latency.
         
-        prompt = f"""You are analyzing a curated set of articles and reports about cryptocurrency, blockchain, and fintech.
+        Latency is measured per request from submission to the last token,
+        so it includes any time spent queued for rate limits.
+        """
+        with self._lock:
+            usage = Counter(self._usage)
+        stats = self._usage_totals(usage, "")
+        stats['stages'] = {}
+        for stage, (model, temperature) in self.stage_models.items():
+            stage_stats = self._usage_totals(usage, f"{stage}.")
+            seconds = usage[f"{stage}.seconds"]
+            stage_stats.update(
+                model=model,
+                temperature=temperature,
+                total_seconds=round(seconds, 3),
+                avg_latency_ms=round(seconds * 1000 / stage_stats['requests'], 1) if stage_stats['requests'] else 0.0,
+            )
+            stats['stages'][stage] = stage_stats
+        return stats
+    
+    @staticmethod
+    def _usage_totals(usage: Counter, prefix: str) -> Dict:
+        stats = {name: usage[prefix + name] for name in ('requests', 'prompt_tokens', 'cached_tokens', 'completion_tokens')}
+        stats['cached_ratio'] = round(stats['cached_tokens'] / stats['prompt_tokens'], 4) if stats['prompt_tokens'] else 0.0
+        return stats
+    
+    def _record_usage(self, stage: str, usage, seconds: float):
+        counts = {'requests': 1, 'seconds': seconds}
+        if usage is not None:
+            details = getattr(usage, 'prompt_tokens_details', None)
+            counts['prompt_tokens'] = getattr(usage, 'prompt_tokens', 0) or 0
+            counts['completion_tokens'] = getattr(usage, 'completion_tokens', 0) or 0
+            counts['cached_tokens'] = getattr(details, 'cached_tokens', 0) or 0
+        with self._lock:
+            for name, value in counts.items():
+                if name != 'seconds':
+                    self._usage[name] += value
+                self._usage[f"{stage}.{name}"] += value
+    
+    def _context_model(self, stage: str) -> str:
+        """Model whose tokenizer and context window budget the context of `stage`."""
+        if stage == "shared":
+            # The shared context has to fit the smallest window of any stage.
+            return min((model for model, _ in self.stage_models.values()), key=context_window)
+        return self.stage_models.get(stage, (self.model,))[0]
+    
+    def _summary_key(self, docs: List[Document]) -> str:
+        model, temperature = self.stage_models["summary"]
+        return SummaryCache.make_key(
+            docs,
+            model=model,
+            temperature=temperature,
+            prompt_version=SUMMARY_PROMPT_VERSION,
+            max_chars_per_document=os.getenv("MAX_CHARS_PER_DOCUMENT", "12000"),
+            max_total_context_chars=os.getenv("MAX_TOTAL_CONTEXT_CHARS", "50000"),
+            summary_mode=self.summary_mode,
+            chunk_chars=self.chunk_chars,
+            max_chunks=self.max_chunks,
+            context_budget=self.context_budget,
+            max_tokens_per_document=os.getenv("MAX_TOKENS_PER_DOCUMENT", "3000"),
+            max_context_tokens=os.getenv("MAX_CONTEXT_TOKENS", "0"),
+            context_selection=self.context_selection,
+            retrieval_chunk_chars=os.getenv("RETRIEVAL_CHUNK_CHARS", "1200"),
+            prompt_layout=self.prompt_layout,
+            context_model=self._context_model("shared" if self.prompt_layout == "prefix" else "summary"),
+        )
+    
+    def _note_key(self, doc: Document) -> str:
+        model, temperature = self.stage_models["summary"]
+        return SummaryCache.make_key(
+            [doc],
+            kind="note",
+            model=model,
+            temperature=temperature,
+            prompt_version=SUMMARY_PROMPT_VERSION,
+            chunk_chars=self.chunk_chars,
+            max_chunks=self.max_chunks,
+        )
+    
+    def _condense_key(self, notes: str) -> str:
+        model, temperature = self.stage_models["summary"]
+        return SummaryCache.make_text_key(
+            notes,
+            kind="condense",
+            model=model,
+            temperature=temperature,
+            prompt_version=SUMMARY_PROMPT_VERSION,
+        )
+    
+    def _summary_messages(self, context: str) -> List[Dict[str, str]]:
+        prompt = """You are analyzing a curated set of articles and reports about cryptocurrency, blockchain, and fintech.
 
 Your task is to create a comprehensive summary that:
 1. Identifies the main themes and topics across all documents
@@ -32,24 +241,17 @@ Your task is to create a comprehensive summary that:
 4. Maintains source attribution for all claims
 
 Documents to analyze:
-{context}
+"""
+        tail = """
 
 Provide a structured summary that will be used to generate original blog content. Focus on facts, data, and verifiable claims from these sources."""
 
-        resp = self.client.chat.completions.create(
-            model=self.model,
-            messages=[
-                {"role": "system", "content": "You are a careful analyst who only makes claims supported by the provided sources."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=self.temperature
+        return self._assemble(
+            "You are a careful analyst who only makes claims supported by the provided sources.",
+            prompt, context, tail
         )
-        
-        return resp.choices[0].message.content
     
-    def generate_blog_post(self, docs: List[Document], summary: str) -> str:
-        context = self._build_context(docs)
-        
+    def _blog_messages(self, context: str, summary: str) -> List[Dict[str, str]]:
         prompt = f"""Based on the following curated research documents, write an original, insightful weekly blog post.
 
 Requirements:
@@ -64,23 +266,41 @@ Research Summary:
 {summary}
 
 Source Documents:
-{context}
+"""
+
+        return self._assemble(
+            "You are a professional crypto/fintech writer. You only make claims supported by your sources and always cite them.",
+            prompt, context, "\n\nGenerate the blog post now:"
+        )
+    
+    def _refine_messages(self, context: str, summary: str, draft: str) -> List[Dict[str, str]]:
+        prompt = f"""Polish the draft weekly blog post below into the final post for a crypto/fintech audience.
+
+Requirements:
+1. Keep the structure: Headline, Executive Summary (2-3 sentences), Body (multiple sections), Key Takeaways
+2. Keep every inline citation in the format [Source: Document Title], and add one to any claim that lacks it
+3. Check the draft's claims against the sources; remove or flag any they do not support
+4. Sharpen the analysis and the wording; do not add claims of your own
 
-Generate the blog post now:"""
+Research Summary:
+{summary}
+
+Source Documents:
+"""
 
-        resp = self.client.chat.completions.create(
-            model=self.model,
-            messages=[
-                {"role": "system", "content": "You are a professional crypto/fintech writer. You only make claims supported by your sources and always cite them."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=self.temperature
+        return self._assemble(
+            "You are a senior crypto/fintech editor. You only keep claims supported by the sources and make sure they are cited.",
+            prompt, context, f"\n\nDraft:\n{draft}\n\nReturn only the polished blog post:"
         )
-        
-        return resp.choices[0].message.content
     
-    def generate_tweet_ideas(self, docs: List[Document], summary: str, count: int = 25) -> List[Dict[str, str]]:
-        context = self._build_context(docs)
+    def _tweet_messages(self, context: str, summary: str, count: int, style: Optional[str] = None,
+                        avoid: Optional[List[str]] = None) -> List[Dict[str, str]]:
+        focus = ""
+        if style:
+            focus += f"\nStyle focus for this batch: {style}\n"
+        if avoid:
+            listed = "\n".join(f"- {tweet}" for tweet in avoid)
+            focus += f"\nThese tweets already exist; do not repeat them or their angle:\n{listed}\n"
         
         prompt = f"""Based on the following research, generate EXACTLY {count} tweet ideas. Each tweet must be formatted as follows:
 
@@ -96,25 +316,274 @@ Requirements:
 - Varied in style: some data-driven, some opinion, some questions, some insights
 - Each tweet must be under 280 characters
 - Use the exact format above for each tweet
-
+{focus}
 Research Summary:
 {summary}
 
 Source Documents:
-{context}
+"""
 
-Now generate {count} tweets in the exact format specified:"""
-
-        resp = self.client.chat.completions.create(
-            model=self.model,
-            messages=[
-                {"role": "system", "content": "You are a social media strategist creating engaging crypto/fintech content based on research."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=self.temperature + 0.1
+        return self._assemble(
+            "You are a social media strategist creating engaging crypto/fintech content based on research.",
+            prompt, context, f"\n\nNow generate {count} tweets in the exact format specified:"
         )
+    
+    def _assemble(self, system: str, head: str, context: str, tail: str) -> List[Dict[str, str]]:
+        """Messages for a stage prompt of `head`, the documents and `tail`.
+        
+        In the prefix layout the documents move ahead of everything that
+        differs between stages, so summary, blog and tweet requests for a
+        week share a byte-identical prompt prefix the provider can cache.
+        """
+        if self.prompt_layout == "inline":
+            return [
+                {"role": "system", "content": system},
+                {"role": "user", "content": head + context + tail}
+            ]
+        return [
+            {"role": "system", "content": SHARED_SYSTEM_PROMPT},
+            {"role": "user", "content": f"Source documents for this week's research:\n{context}"},
+            {"role": "user", "content": f"{system}\n\n{head}(the source documents above){tail}"}
+        ]
+    
+    @staticmethod
+    def _tweet_shards(count: int) -> List[Tuple[int, Optional[str]]]:
+        """Split `count` into (size, style) shards of at most TWEET_SHARD_SIZE tweets."""
+        shard_size = max(1, int(os.getenv("TWEET_SHARD_SIZE", "10")))
+        if count <= shard_size:
+            return [(count, None)]
+        shards = -(-count // shard_size)
+        base, extra = divmod(count, shards)
+        return [
+            (base + (1 if i < extra else 0), TWEET_STYLES[i % len(TWEET_STYLES)])
+            for i in range(shards)
+        ]
+    
+    @staticmethod
+    def _dedupe_tweets(tweets: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        """Drop tweets whose words mostly overlap an earlier tweet's."""
+        kept = []
+        seen: List[set] = []
+        for tweet in tweets:
+            words = set(_TWEET_WORD_RE.findall(tweet['tweet'].lower()))
+            if not words:
+                continue
+            if any(len(words & other) / len(words | other) >= 0.7 for other in seen):
+                continue
+            kept.append(tweet)
+            seen.append(words)
+        return kept
+    
+    @staticmethod
+    def _estimate_tokens(messages: List[Dict[str, str]]) -> int:
+        # About four characters per token; only used to reserve rate-limit budget.
+        return sum(len(m['content']) for m in messages) // 4 + EXPECTED_OUTPUT_TOKENS
+    
+    def _stage_messages(self, stage: str, context: str, summary: str = "", count: int = 0) -> List[Dict[str, str]]:
+        if stage == "blog":
+            return self._blog_messages(context, summary)
+        if stage == "tweets":
+            return self._tweet_messages(context, summary, count)
+        return self._summary_messages(context)
+    
+    def _map_messages(self, doc: Document, chunk: str, part: int, parts: int) -> List[Dict[str, str]]:
+        where = f" (part {part} of {parts})" if parts > 1 else ""
+        prompt = f"""Summarize the following document{where} for a research brief on cryptocurrency, blockchain, and fintech.
+
+Keep every figure, date, name and claim that could support analysis, attributed as the document states them. Leave out boilerplate, navigation text and repetition.
+
+Document: {doc.title} (Source: {doc.source})
+
+{chunk}"""
+
+        return [
+            {"role": "system", "content": "You are a careful analyst who only makes claims supported by the provided sources."},
+            {"role": "user", "content": prompt}
+        ]
+    
+    def _condense_messages(self, notes: str) -> List[Dict[str, str]]:
+        prompt = f"""Condense the following document notes into shorter notes.
+
+Keep each document header line as it is, followed by that document's most important facts, figures and claims, so they can still be cited by title.
+
+{notes}"""
+
+        return [
+            {"role": "system", "content": "You are a careful analyst who only makes claims supported by the provided sources."},
+            {"role": "user", "content": prompt}
+        ]
+    
+    def _chunks(self, doc: Document) -> Tuple[List[Tuple[int, str]], int]:
+        """The numbered chunks of `doc` to map, and how many it has in all.
+
+        Beyond max_chunks only the first and last chunks are kept, like the
+        head/tail truncation of the direct context; the tail is held in a
+        bounded deque so the skipped middle is never kept in memory.
+        """
+        chunks = enumerate(split_chunks(doc.iter_text(), self.chunk_chars), 1)
+        if self.max_chunks <= 0:
+            kept = list(chunks)
+            return kept, len(kept)
+        head_count = (self.max_chunks + 1) // 2
+        head: List[Tuple[int, str]] = []
+        tail: "deque[Tuple[int, str]]" = deque(maxlen=self.max_chunks - head_count)
+        total = 0
+        for total, chunk in chunks:
+            (head if total <= head_count else tail).append((total, chunk))
+        return head + list(tail), total
+    
+    def _map_jobs(self, docs: List[Document], indices: List[int]) -> List[Tuple[int, List[Dict[str, str]]]]:
+        jobs = []
+        for i in indices:
+            chunks, total = self._chunks(docs[i])
+            for part, chunk in chunks:
+                jobs.append((i, self._map_messages(docs[i], chunk, part, total)))
+        return jobs
+    
+    @staticmethod
+    def _join_notes(notes: List[Optional[str]], jobs: List[Tuple[int, List[Dict[str, str]]]],
+                    results: List[str]) -> Dict[int, str]:
+        parts: Dict[int, List[str]] = {}
+        for (i, _), result in zip(jobs, results):
+            parts.setdefault(i, []).append(result.strip())
+        for i, doc_parts in parts.items():
+            notes[i] = "\n\n".join(doc_parts)
+        return {i: notes[i] for i in parts}
+    
+    @staticmethod
+    def _note_blocks(docs: List[Document], notes: List[str]) -> List[str]:
+        return [
+            f"\n--- Document {i}: {doc.title} (Source: {doc.source}) ---\n{note}\n"
+            for i, (doc, note) in enumerate(zip(docs, notes), 1)
+        ]
+    
+    @staticmethod
+    def _batches(blocks: List[str], limit: int) -> List[str]:
+        """Group consecutive note blocks into batches of at most `limit` chars."""
+        batches = []
+        current: List[str] = []
+        size = 0
+        for block in blocks:
+            if current and size + len(block) > limit:
+                batches.append("\n".join(current))
+                current, size = [], 0
+            current.append(block)
+            size += len(block)
+        if current:
+            batches.append("\n".join(current))
+        return batches
+    
+    @staticmethod
+    def _fits(blocks: List[str], limit: int) -> bool:
+        return len(blocks) <= 1 or sum(len(block) for block in blocks) <= limit
+    
+    def _shared_context(self, key: str) -> Optional[str]:
+        with self._lock:
+            context = self._shared_contexts.get(key)
+            if context is not None:
+                self._shared_contexts.move_to_end(key)
+            return context
+    
+    def _keep_shared_context(self, key: str, context: str):
+        with self._lock:
+            self._shared_contexts[key] = context
+            self._shared_contexts.move_to_end(key)
+            while len(self._shared_contexts) > SHARED_CONTEXT_ENTRIES:
+                self._shared_contexts.popitem(last=False)
+    
+    def _direct_context(self, docs: List[Document], stage: str, summary: str = "", count: int = 0) -> str:
+        relevance = self.context_selection == "relevance"
+        if self.context_budget != "tokens":
+            if relevance:
+                return self._build_relevant_context(
+                    docs, self._retrieval_query(docs, stage, summary), "chars", len,
+                    int(os.getenv("MAX_TOTAL_CONTEXT_CHARS", "50000")),
+                    int(os.getenv("MAX_CHARS_PER_DOCUMENT", "12000"))
+                )
+            return self._build_context(docs)
+        
+        model = self._context_model(stage)
+        tokenizer = get_tokenizer(model)
+        # Everything in the stage prompt except the documents, plus a few
+        # tokens of per-message framing.
+        fixed = sum(tokenizer.count(m['content']) + 4 for m in self._stage_messages(stage, "", summary, count))
+        if "draft" in self.stage_models and stage in ("blog", "shared"):
+            # The refine prompt also carries the draft.
+            fixed += STAGE_OUTPUT_TOKENS["blog"]
+        if stage in ("tweets", "shared"):
+            # Room for the tweets a top-up asks the model not to repeat.
+            fixed += TWEET_AVOID_LIMIT * TWEET_AVOID_TOKENS
+        budget = input_budget(model, stage, fixed)
+        if relevance:
+            return self._build_relevant_context(
+                docs, self._retrieval_query(docs, stage, summary), tokenizer.name, tokenizer.count,
+                budget, int(os.getenv("MAX_TOKENS_PER_DOCUMENT", "3000"))
+            )
+        return self._build_token_context(docs, tokenizer, budget)
+    
+    def _retrieval_query(self, docs: List[Document], stage: str, summary: str) -> str:
+        # Blog posts and tweets are written from the summary, so the chunks
+        # backing its claims matter most; the summary itself is ranked against
+        # its instructions and the document titles.
+        if stage != "summary" and summary:
+            return summary
+        instructions = self._summary_messages("")[-1]['content']
+        return instructions + "\n" + "\n".join(doc.title for doc in docs)
+    
+    def _build_relevant_context(self, docs: List[Document], query: str, measure_name: str, measure,
+                                budget: int, max_per_doc: int) -> str:
+        index = get_index(docs, int(os.getenv("RETRIEVAL_CHUNK_CHARS", "1200")), measure_name, measure)
+        headers = [f"\n--- Document {i}: {doc.title} (Source: {doc.source}) ---\n" for i, doc in enumerate(docs, 1)]
+        
+        chosen: Dict[int, List[int]] = {}
+        per_doc = [0] * len(docs)
+        used = 0
+        
+        def take(chunk_id: int):
+            nonlocal used
+            doc_index, chunk_index = index.chunks[chunk_id]
+            cost = index.sizes[chunk_id]
+            if doc_index not in chosen:
+                cost += measure(headers[doc_index])
+            if used + cost > budget or per_doc[doc_index] + index.sizes[chunk_id] > max_per_doc:
+                return
+            chosen.setdefault(doc_index, []).append(chunk_index)
+            per_doc[doc_index] += index.sizes[chunk_id]
+            used += cost
+        
+        # Every document keeps its lead chunk (title, dek, first facts) so
+        # coverage does not collapse onto the one best-matching article.
+        for chunk_id, (_, chunk_index) in enumerate(index.chunks):
+            if chunk_index == 0:
+                take(chunk_id)
+        for chunk_id in index.rank(query):
+            if index.chunks[chunk_id][1] != 0:
+                take(chunk_id)
+        
+        parts = []
+        trimmed = []
+        total_chunks = Counter(doc_index for doc_index, _ in index.chunks)
+        for doc_index in sorted(chosen):
+            wanted = sorted(chosen[doc_index])
+            texts = index.chunk_texts(docs[doc_index], wanted)
+            pieces = []
+            for previous, chunk_index in zip([-1] + wanted, wanted):
+                if chunk_index != previous + 1:
+                    pieces.append("[...]")
+                pieces.append(texts[chunk_index].strip())
+            if wanted[-1] != total_chunks[doc_index] - 1:
+                pieces.append("[...]")
+            if len(wanted) < total_chunks[doc_index]:
+                trimmed.append(docs[doc_index].title)
+            parts.append(headers[doc_index])
+            parts.append("\n\n".join(pieces))
+            parts.append("\n")
         
-        return self._parse_tweets(resp.choices[0].message.content)
+        skipped = len(docs) - len(chosen)
+        if skipped:
+            print(f"⚠️  Warning: {skipped} document(s) did not fit the context budget and were not included.")
+        self._warn_truncated(docs, trimmed)
+        return "\n".join(parts)
     
     def _build_context(self, docs: List[Document]) -> str:
         max_per_doc = int(os.getenv("MAX_CHARS_PER_DOCUMENT", "12000"))
@@ -133,18 +602,21 @@ Now generate {count} tweets in the exact format specified:"""
                 print(f"⚠️  Warning: Stopping at document {i} to avoid token limits. {len(docs) - i} documents not included.")
                 break
             
-            content = doc.content
-            orig_len = len(content)
+            orig_len = doc.length
             
-            if len(content) > max_per_doc:
+            if orig_len > max_per_doc:
+                # Only the head and tail are needed, so avoid materializing
+                # the full text of large documents.
                 start = max_per_doc // 2
                 end = max_per_doc - start - 50
                 content = (
-                    content[:start] + 
+                    doc.head(start) + 
                     f"\n\n[... {orig_len - max_per_doc} characters truncated from middle ...]\n\n" +
-                    content[-end:]
+                    doc.tail(end)
                 )
                 truncated.append(doc.title)
+            else:
+                content = doc.content
             
             if len(content) > remaining:
                 start = remaining // 2
@@ -160,12 +632,50 @@ Now generate {count} tweets in the exact format specified:"""
             parts.append("\n")
             total += header_len + len(content)
         
+        self._warn_truncated(docs, truncated)
+        return "\n".join(parts)
+    
+    def _build_token_context(self, docs: List[Document], tokenizer, budget: int) -> str:
+        max_per_doc = int(os.getenv("MAX_TOKENS_PER_DOCUMENT", "3000"))
+        
+        parts = []
+        total = 0
+        truncated = []
+        
+        for i, doc in enumerate(docs, 1):
+            header = f"\n--- Document {i}: {doc.title} (Source: {doc.source}) ---\n"
+            header_tokens = tokenizer.count(header)
+            
+            # Two more tokens for the newlines parts are joined with.
+            remaining = budget - total - header_tokens - 2
+            if remaining < 250 and i > 1:
+                print(f"⚠️  Warning: Stopping at document {i} to stay within {budget} context tokens. {len(docs) - i + 1} documents not included.")
+                break
+            
+            content, tokens, cut = pack_document(doc, tokenizer, max_per_doc)
+            if cut:
+                truncated.append(doc.title)
+            if tokens > remaining:
+                content, tokens = fit_tokens(tokenizer, content, remaining)
+            
+            parts.append(header)
+            parts.append(content)
+            parts.append("\n")
+            total += header_tokens + tokens + 2
+        
+        self._warn_truncated(docs, truncated)
+        return "\n".join(parts)
+    
+    @staticmethod
+    def _warn_truncated(docs: List[Document], truncated: List[str]):
         if truncated:
             print(f"⚠️  Warning: {len(truncated)} document(s) were truncated: {', '.join(truncated[:3])}")
             if len(truncated) > 3:
                 print(f"   ... and {len(truncated) - 3} more")
         
-        return "\n".join(parts)
+        partial = [f"{doc.title} ({doc.pages_skipped} pages)" for doc in docs if doc.pages_skipped]
+        if partial:
+            print(f"⚠️  Note: {len(partial)} PDF(s) were extracted within budget, skipping middle pages: {', '.join(partial[:3])}")
     
     def _parse_tweets(self, text: str) -> List[Dict[str, str]]:
         tweets = []
@@ -217,3 +727,339 @@ Now generate {count} tweets in the exact format specified:"""
                 })
         
         return cleaned
+
+    
+    @staticmethod
+    def _step(flow: Flow, results: Optional[List[str]]) -> Tuple[bool, object]:
+        """Advance `flow` with `results`; returns (finished, its result or next _Calls)."""
+        try:
+            return False, flow.send(results)
+        except StopIteration as done:
+            return True, done.value
+    
+    @staticmethod
+    def _call(messages: List[Dict[str, str]], stage: str, priority: Optional[int] = None) -> Flow:
+        results = yield _Calls([(messages, stage, priority)], 1)
+        return results[0]
+    
+    def _summary_flow(self, docs: List[Document]) -> Flow:
+        key = self._summary_key(docs)
+        summary = self.summary_cache.get(key)
+        if summary is not None:
+            return summary, True
+        
+        context = yield from self._context_flow(docs, "summary")
+        summary = yield from self._call(self._summary_messages(context), "summary")
+        self.summary_cache.put(key, summary)
+        return summary, False
+    
+    def _prepare_flow(self, docs: List[Document]) -> Flow:
+        summary, cached = yield from self._summary_flow(docs)
+        if self.prompt_layout == "prefix" or self.summary_mode == "map_reduce":
+            # The blog and tweet contexts are then memoized or cached, so
+            # running both stages concurrently does not build them twice.
+            yield from self._context_flow(docs, "blog", summary)
+        return summary, cached
+    
+    def _blog_flow(self, docs: List[Document], summary: str) -> Flow:
+        messages = yield from self._final_blog_messages_flow(docs, summary)
+        return (yield from self._call(messages, "blog"))
+    
+    def _final_blog_messages_flow(self, docs: List[Document], summary: str) -> Flow:
+        """The blog prompt, or the refine prompt around a fast model's draft when cascading."""
+        context = yield from self._context_flow(docs, "blog", summary)
+        messages = self._blog_messages(context, summary)
+        if "draft" in self.stage_models:
+            draft = yield from self._call(messages, "draft")
+            messages = self._refine_messages(context, summary, draft)
+        return messages
+    
+    def _tweets_flow(self, docs: List[Document], summary: str, count: int) -> Flow:
+        context = yield from self._context_flow(docs, "tweets", summary, count)
+        
+        # Small shards in parallel finish in about the time of one of them.
+        shards = self._tweet_shards(count)
+        replies = yield _Calls(
+            [(self._tweet_messages(context, summary, size, style), "tweets", None) for size, style in shards],
+            len(shards)
+        )
+        tweets = self._dedupe_tweets([tweet for reply in replies for tweet in self._parse_tweets(reply)])
+        
+        for _ in range(TWEET_TOPUP_ROUNDS):
+            missing = count - len(tweets)
+            if missing <= 0:
+                break
+            avoid = [t['tweet'][:280] for t in tweets[-TWEET_AVOID_LIMIT:]]
+            messages = self._tweet_messages(context, summary, missing, None, avoid)
+            reply = yield from self._call(messages, "tweets")
+            tweets = self._dedupe_tweets(tweets + self._parse_tweets(reply))
+        return tweets[:count]
+    
+    def _context_flow(self, docs: List[Document], stage: str, summary: str = "", count: int = 0) -> Flow:
+        if self.prompt_layout == "inline":
+            return (yield from self._stage_context_flow(docs, stage, summary, count))
+        
+        # Every stage gets the same context, built once per week, so their
+        # prompts share a prefix.
+        key = self._summary_key(docs)
+        context = self._shared_context(key)
+        if context is None:
+            context = yield from self._stage_context_flow(docs, "shared")
+            self._keep_shared_context(key, context)
+        return context
+    
+    def _stage_context_flow(self, docs: List[Document], stage: str, summary: str = "", count: int = 0) -> Flow:
+        if self.summary_mode == "direct":
+            return self._direct_context(docs, stage, summary, count)
+        
+        # Notes are cached per document content, so a week that gained one
+        # article costs one new map call; everything else is a cache hit.
+        keys = [self._note_key(doc) for doc in docs]
+        notes = [self.summary_cache.get(key) for key in keys]
+        missing = [i for i, note in enumerate(notes) if note is None]
+        if missing:
+            jobs = self._map_jobs(docs, missing)
+            results = yield _Calls([(messages, "summary", BATCH) for _, messages in jobs], self.map_concurrency)
+            for i, note in self._join_notes(notes, jobs, results).items():
+                self.summary_cache.put(keys[i], note)
+        
+        limit = int(os.getenv("MAX_TOTAL_CONTEXT_CHARS", "50000"))
+        blocks = self._note_blocks(docs, notes)
+        for _ in range(3):
+            if self._fits(blocks, limit):
+                break
+            blocks = yield from self._condense_flow(self._batches(blocks, limit))
+        return "\n".join(blocks)
+    
+    def _condense_flow(self, batches: List[str]) -> Flow:
+        keys = [self._condense_key(batch) for batch in batches]
+        notes = [self.summary_cache.get(key) for key in keys]
+        missing = [i for i, note in enumerate(notes) if note is None]
+        if missing:
+            results = yield _Calls(
+                [(self._condense_messages(batches[i]), "summary", BATCH) for i in missing], self.map_concurrency
+            )
+            for i, note in zip(missing, results):
+                notes[i] = note
+                self.summary_cache.put(keys[i], note)
+        return notes
+
+class LLMOrchestrator(BaseLLMOrchestrator):
+    def __init__(self, model: str = None, temperature: float = 0.3,
+                 summary_cache: Optional[SummaryCache] = None,
+                 completion_cache: Optional[CompletionCache] = None,
+                 summary_mode: Optional[str] = None,
+                 scheduler: Optional[RequestScheduler] = None):
+        super().__init__(model, temperature, summary_cache, completion_cache, summary_mode, scheduler)
+        self.client = OpenAI(api_key=self.api_key, max_retries=0)
+    
+    def summarize_documents(self, docs: List[Document]) -> str:
+        return self.summarize_cached(docs)[0]
+    
+    def summarize_cached(self, docs: List[Document]) -> Tuple[str, bool]:
+        """Return the summary and whether it came from the summary cache."""
+        return self._run(self._summary_flow(docs))
+    
+    def prepare(self, docs: List[Document]) -> Tuple[str, bool]:
+        """`summarize_cached`, plus building the document context blog posts and tweets share."""
+        return self._run(self._prepare_flow(docs))
+    
+    def generate_blog_post(self, docs: List[Document], summary: str) -> str:
+        return self._run(self._blog_flow(docs, summary))
+    
+    def generate_tweet_ideas(self, docs: List[Document], summary: str, count: int = 25) -> List[Dict[str, str]]:
+        return self._run(self._tweets_flow(docs, summary, count))
+    
+    def _context(self, docs: List[Document], stage: str, summary: str = "", count: int = 0) -> str:
+        return self._run(self._context_flow(docs, stage, summary, count))
+    
+    def _run(self, flow: Flow):
+        finished, value = self._step(flow, None)
+        while not finished:
+            finished, value = self._step(flow, self._complete_calls(value))
+        return value
+    
+    def _complete_calls(self, calls: _Calls) -> List[str]:
+        if len(calls.requests) == 1:
+            return [self._complete(*calls.requests[0])]
+        with ThreadPoolExecutor(max_workers=max(1, min(calls.concurrency, len(calls.requests)))) as pool:
+            return list(pool.map(lambda request: self._complete(*request), calls.requests))
+    
+    def _complete(self, messages: List[Dict[str, str]], stage: str,
+                  priority: Optional[int] = None) -> str:
+        model, temperature = self.stage_models[stage]
+        cache = self.completion_cache
+        if cache:
+            key = cache.make_key(model, messages, temperature)
+            cached = cache.get(key)
+            if cached is not None:
+                return cached
+        
+        start = time.perf_counter()
+        resp = self.scheduler.call(
+            lambda: self.client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature
+            ),
+            self._estimate_tokens(messages),
+            priority
+        )
+        self._record_usage(stage, getattr(resp, 'usage', None), time.perf_counter() - start)
+        content = resp.choices[0].message.content
+        if cache:
+            cache.put(key, content, model)
+        return content
+
+
+def pooled_http_client():
+    """Async HTTP client with a connection pool sized from the environment.
+    
+    Meant to be created once per process and shared, so requests reuse
+    kept-alive connections instead of paying a TLS handshake each time.
+    """
+    # Limits and timeouts come from whichever httpx build the installed
+    # OpenAI client runs on; it is not necessarily the `httpx` package.
+    Limits = type(openai.DEFAULT_CONNECTION_LIMITS)
+    max_connections = int(os.getenv("OPENAI_MAX_CONNECTIONS", "100"))
+    return openai.DefaultAsyncHttpxClient(
+        limits=Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=int(os.getenv("OPENAI_MAX_KEEPALIVE", str(min(20, max_connections)))),
+            keepalive_expiry=float(os.getenv("OPENAI_KEEPALIVE_EXPIRY", "30")),
+        ),
+        timeout=openai.Timeout(float(os.getenv("OPENAI_TIMEOUT", "600")), connect=5.0),
+    )
+
+
+class AsyncLLMOrchestrator(BaseLLMOrchestrator):
+    """LLMOrchestrator on the async OpenAI client, for use inside an event loop.
+    
+    Holds no per-request state, so one instance (and its connection pool)
+    can serve any number of concurrent requests on the same loop.
+    """
+    
+    def __init__(self, model: str = None, temperature: float = 0.3,
+                 summary_cache: Optional[SummaryCache] = None,
+                 completion_cache: Optional[CompletionCache] = None,
+                 summary_mode: Optional[str] = None,
+                 scheduler: Optional[RequestScheduler] = None,
+                 http_client=None):
+        super().__init__(model, temperature, summary_cache, completion_cache, summary_mode, scheduler)
+        self.client = AsyncOpenAI(api_key=self.api_key, http_client=http_client, max_retries=0)
+    
+    async def aclose(self):
+        await self.client.close()
+    
+    async def summarize_documents(self, docs: List[Document]) -> str:
+        return (await self.summarize_cached(docs))[0]
+    
+    async def summarize_cached(self, docs: List[Document]) -> Tuple[str, bool]:
+        return await self._run(self._summary_flow(docs))
+    
+    async def prepare(self, docs: List[Document]) -> Tuple[str, bool]:
+        return await self._run(self._prepare_flow(docs))
+    
+    async def generate_blog_post(self, docs: List[Document], summary: str) -> str:
+        return await self._run(self._blog_flow(docs, summary))
+    
+    async def stream_blog_post(self, docs: List[Document], summary: str) -> AsyncIterator[str]:
+        """Yield the blog post in pieces as the model produces them."""
+        messages = await self._run(self._final_blog_messages_flow(docs, summary))
+        async for piece in self._stream(messages, "blog"):
+            yield piece
+    
+    async def generate_tweet_ideas(self, docs: List[Document], summary: str, count: int = 25) -> List[Dict[str, str]]:
+        return await self._run(self._tweets_flow(docs, summary, count))
+    
+    async def _context(self, docs: List[Document], stage: str, summary: str = "", count: int = 0) -> str:
+        return await self._run(self._context_flow(docs, stage, summary, count))
+    
+    async def _run(self, flow: Flow):
+        # Between completions a flow hashes and reads documents from disk and
+        # touches the summary cache, so its steps run off the loop.
+        finished, value = await asyncio.to_thread(self._step, flow, None)
+        while not finished:
+            results = await self._complete_calls(value)
+            finished, value = await asyncio.to_thread(self._step, flow, results)
+        return value
+    
+    async def _complete_calls(self, calls: _Calls) -> List[str]:
+        semaphore = asyncio.Semaphore(max(1, calls.concurrency))
+        
+        async def complete(request) -> str:
+            async with semaphore:
+                return await self._complete(*request)
+        
+        return list(await asyncio.gather(*(complete(request) for request in calls.requests)))
+    
+    async def _complete(self, messages: List[Dict[str, str]], stage: str,
+                        priority: Optional[int] = None) -> str:
+        model, temperature = self.stage_models[stage]
+        cache = self.completion_cache
+        if cache:
+            key = cache.make_key(model, messages, temperature)
+            cached = await asyncio.to_thread(cache.get, key)
+            if cached is not None:
+                return cached
+        
+        start = time.perf_counter()
+        resp = await self.scheduler.acall(
+            lambda: self.client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature
+            ),
+            self._estimate_tokens(messages),
+            priority
+        )
+        self._record_usage(stage, getattr(resp, 'usage', None), time.perf_counter() - start)
+        content = resp.choices[0].message.content
+        if cache:
+            await asyncio.to_thread(cache.put, key, content, model)
+        return content
+    
+    async def _stream(self, messages: List[Dict[str, str]], stage: str) -> AsyncIterator[str]:
+        model, temperature = self.stage_models[stage]
+        cache = self.completion_cache
+        if cache:
+            key = cache.make_key(model, messages, temperature)
+            cached = await asyncio.to_thread(cache.get, key)
+            if cached is not None:
+                yield cached
+                return
+        
+        # Only opening the stream is scheduled; a failure mid-stream is not
+        # retried since pieces have already been handed out.
+        start = time.perf_counter()
+        estimated = self._estimate_tokens(messages)
+        stream = await self.scheduler.acall(
+            lambda: self.client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                stream=True,
+                stream_options={"include_usage": True}
+            ),
+            estimated
+        )
+        pieces = []
+        usage = None
+        try:
+            async for chunk in stream:
+                # Usage arrives on a final chunk without choices.
+                usage = getattr(chunk, 'usage', None) or usage
+                if not chunk.choices:
+                    continue
+                piece = chunk.choices[0].delta.content
+                if piece:
+                    pieces.append(piece)
+                    yield piece
+        finally:
+            # Release the connection even when the reader stops early, e.g.
+            # a client that disconnects mid-post.
+            await stream.close()
+        self.scheduler.settle(estimated, getattr(usage, 'total_tokens', None))
+        self._record_usage(stage, usage, time.perf_counter() - start)
+        if cache:
+            await asyncio.to_thread(cache.put, key, ''.join(pieces), model)
@@ -0,0 +1,267 @@
+"""Rate-limit-aware scheduling of OpenAI requests."""
+
+import asyncio
+import contextvars
+import heapq
+import itertools
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from openai import APIConnectionError, APITimeoutError
+
+INTERACTIVE = 0
+BATCH = 1
+PRIORITY_NAMES = {"interactive": INTERACTIVE, "batch": BATCH}
+
+_priority: contextvars.ContextVar = contextvars.ContextVar("request_priority", default=INTERACTIVE)
+
+# Status codes worth retrying: rate limits and transient server errors.
+RETRY_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+# Error codes that come back as a 429 but will not clear by waiting.
+NON_RETRY_CODES = {"insufficient_quota"}
+
+# Waiters that are not first in line re-check this often.
+_POLL_INTERVAL = 0.05
+
+
+@contextmanager
+def request_priority(priority):
+    """Run the calls made inside the block at `priority` ("interactive" or "batch")."""
+    if isinstance(priority, str):
+        priority = PRIORITY_NAMES[priority]
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class TokenBucket:
+    """Refills at `per_minute` units per minute up to `per_minute` units; 0 means unlimited."""
+
+    def __init__(self, per_minute: float, now: Optional[float] = None):
+        self.per_minute = per_minute
+        self.level = float(per_minute)
+        self._updated = time.monotonic() if now is None else now
+
+    def _refill(self, now: float):
+        self.level = min(self.per_minute, self.level + (now - self._updated) * self.per_minute / 60)
+        self._updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        if not self.per_minute:
+            return 0.0
+        self._refill(now)
+        # A request larger than the whole bucket waits for a full bucket.
+        amount = min(amount, self.per_minute)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) * 60 / self.per_minute
+
+    def consume(self, amount: float):
+        if self.per_minute:
+            self.level -= amount
+
+    def drain(self, now: float):
+        if self.per_minute:
+            self._refill(now)
+            self.level = min(self.level, 0.0)
+
+
+class RequestScheduler:
+    """Admits OpenAI requests under requests- and tokens-per-minute budgets.
+
+    Callers queue by (priority, arrival); only the head of the queue may
+    take from the buckets, so interactive calls overtake queued batch work
+    and nothing starves within a priority. Retryable failures (429s and
+    transient 5xx/connection errors) are retried with jittered exponential
+    backoff, never sooner than the server's retry-after, and a 429 also
+    empties the buckets so queued callers back off with it. An exhausted
+    quota is a 429 too, but fails immediately.
+
+    One scheduler serves both sync callers (threads) and async callers.
+    `clock`, `sleep` and `async_sleep` can be replaced, e.g. by a fake clock
+    in tests.
+    """
+
+    _default: Optional["RequestScheduler"] = None
+    _default_lock = threading.Lock()
+
+    def __init__(self, requests_per_minute: float = 0, tokens_per_minute: float = 0,
+                 max_retries: int = 5, base_delay: float = 1.0, max_delay: float = 60.0,
+                 clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep,
+                 async_sleep: Callable[[float], Awaitable[None]] = asyncio.sleep):
+        self.clock = clock
+        self.sleep = sleep
+        self.async_sleep = async_sleep
+        self.requests = TokenBucket(requests_per_minute, clock())
+        self.tokens = TokenBucket(tokens_per_minute, clock())
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._queue = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._blocked_until = 0.0
+        self._stats = {
+            'admitted': 0, 'retries': 0, 'rate_limited': 0, 'failed': 0,
+            'max_queue_depth': 0, 'wait_seconds': 0.0, 'max_wait_seconds': 0.0,
+        }
+
+    @classmethod
+    def default(cls) -> "RequestScheduler":
+        """Process-wide scheduler configured from the environment."""
+        with cls._default_lock:
+            if cls._default is None:
+                cls._default = cls(
+                    requests_per_minute=float(os.getenv("OPENAI_RPM", "0")),
+                    tokens_per_minute=float(os.getenv("OPENAI_TPM", "0")),
+                    max_retries=int(os.getenv("OPENAI_MAX_RETRIES", "5")),
+                )
+            return cls._default
+
+    def call(self, fn: Callable[[], Any], tokens: int, priority: Optional[int] = None) -> Any:
+        priority = _priority.get() if priority is None else priority
+        for attempt in range(self.max_retries + 1):
+            entry = self._enqueue(priority)
+            while True:
+                wait = self._try_admit(entry, tokens)
+                if wait is None:
+                    break
+                self.sleep(wait)
+            try:
+                result = fn()
+            except Exception as e:
+                delay = self._retry_delay(e, attempt)
+                if delay is None:
+                    raise
+                self.sleep(delay)
+                continue
+            self._settle(tokens, result)
+            return result
+
+    async def acall(self, fn: Callable[[], Awaitable[Any]], tokens: int, priority: Optional[int] = None) -> Any:
+        priority = _priority.get() if priority is None else priority
+        for attempt in range(self.max_retries + 1):
+            entry = self._enqueue(priority)
+            try:
+                while True:
+                    wait = self._try_admit(entry, tokens)
+                    if wait is None:
+                        break
+                    await self.async_sleep(wait)
+            except asyncio.CancelledError:
+                self._dequeue(entry)
+                raise
+            try:
+                result = await fn()
+            except Exception as e:
+                delay = self._retry_delay(e, attempt)
+                if delay is None:
+                    raise
+                await self.async_sleep(delay)
+                continue
+            self._settle(tokens, result)
+            return result
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats['queue_depth'] = len(self._queue)
+            stats['queued_interactive'] = sum(1 for entry in self._queue if entry[0] == INTERACTIVE)
+            stats['queued_batch'] = stats['queue_depth'] - stats['queued_interactive']
+            stats['avg_wait_seconds'] = round(stats['wait_seconds'] / stats['admitted'], 4) if stats['admitted'] else 0.0
+            stats['wait_seconds'] = round(stats['wait_seconds'], 4)
+            stats['max_wait_seconds'] = round(stats['max_wait_seconds'], 4)
+            stats['requests_per_minute'] = self.requests.per_minute
+            stats['tokens_per_minute'] = self.tokens.per_minute
+            return stats
+
+    def _enqueue(self, priority: int):
+        entry = (priority, next(self._seq), self.clock())
+        with self._lock:
+            heapq.heappush(self._queue, entry)
+            self._stats['max_queue_depth'] = max(self._stats['max_queue_depth'], len(self._queue))
+        return entry
+
+    def _dequeue(self, entry):
+        with self._lock:
+            if entry in self._queue:
+                self._queue.remove(entry)
+                heapq.heapify(self._queue)
+
+    def _try_admit(self, entry, tokens: int) -> Optional[float]:
+        """None once admitted, otherwise how long to wait before trying again."""
+        with self._lock:
+            if self._queue[0] is not entry:
+                return _POLL_INTERVAL
+            now = self.clock()
+            wait = max(self._blocked_until - now,
+                       self.requests.wait_time(1, now),
+                       self.tokens.wait_time(tokens, now))
+            if wait > 0:
+                return wait
+            heapq.heappop(self._queue)
+            self.requests.consume(1)
+            self.tokens.consume(tokens)
+            waited = now - entry[2]
+            self._stats['admitted'] += 1
+            self._stats['wait_seconds'] += waited
+            self._stats['max_wait_seconds'] = max(self._stats['max_wait_seconds'], waited)
+            return None
+
+    def settle(self, estimated: int, total_tokens: Optional[int]):
+        """Replace a request's token estimate with what it actually used.
+
+        Called automatically for plain responses; streamed responses report
+        usage only on their last chunk, so their readers call this then.
+        """
+        if total_tokens is None:
+            return
+        with self._lock:
+            self.tokens.consume(total_tokens - estimated)
+
+    def _settle(self, estimated: int, result: Any):
+        usage = getattr(result, 'usage', None)
+        self.settle(estimated, getattr(usage, 'total_tokens', None))
+
+    def _retry_delay(self, error: Exception, attempt: int) -> Optional[float]:
+        status_code = getattr(error, 'status_code', None)
+        retryable = status_code in RETRY_STATUS or isinstance(error, (APIConnectionError, APITimeoutError))
+        if getattr(error, 'code', None) in NON_RETRY_CODES:
+            retryable = False
+        if not retryable or attempt >= self.max_retries:
+            with self._lock:
+                self._stats['failed'] += 1
+            return None
+
+        backoff = random.uniform(0.5, 1.0) * min(self.max_delay, self.base_delay * 2 ** attempt)
+        retry_after = _retry_after(error)
+        delay = max(backoff, retry_after) if retry_after is not None else backoff
+        with self._lock:
+            self._stats['retries'] += 1
+            if status_code == 429:
+                self._stats['rate_limited'] += 1
+                now = self.clock()
+                self._blocked_until = max(self._blocked_until, now + delay)
+                self.requests.drain(now)
+                self.tokens.drain(now)
+        return delay
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    headers = getattr(getattr(error, 'response', None), 'headers', None) or {}
+    try:
+        if headers.get('retry-after-ms'):
+            return float(headers['retry-after-ms']) / 1000
+        if headers.get('retry-after'):
+            return float(headers['retry-after'])
+    except (TypeError, ValueError):
+        pass
+    return None
@@ -0,0 +1,122 @@
+"""Chunking and BM25 ranking of document text for context selection."""
+
+import math
+import re
+import threading
+from collections import Counter, OrderedDict
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple
+
+from .document_loaders import Document
+
+_TERM_RE = re.compile(r"[a-z0-9][a-z0-9$%.]*[a-z0-9%]|[a-z0-9]")
+
+STOPWORDS = frozenset("""
+a about above after again against all also am an and any are as at be because been before being below
+between both but by can could did do does doing down during each few for from further had has have having
+he her here hers herself him himself his how i if in into is it its itself just me more most my myself no
+nor not now of off on once only or other our ours ourselves out over own same she should so some such than
+that the their theirs them themselves then there these they this those through to too under until up very
+was we were what when where which while who whom why will with would you your yours yourself yourselves
+""".split())
+
+
+def split_chunks(pieces: Iterable[str], size: int) -> Iterator[str]:
+    """Re-cut streamed text into chunks of at most `size` chars, preferring paragraph breaks."""
+    buffer = ""
+    emitted = False
+    for piece in pieces:
+        buffer += piece
+        while len(buffer) >= size:
+            cut = buffer.rfind("\n\n", size // 2, size)
+            if cut <= 0:
+                cut = size
+            yield buffer[:cut]
+            emitted = True
+            buffer = buffer[cut:].lstrip("\n")
+    if buffer.strip() or not emitted:
+        yield buffer
+
+
+def terms(text: str) -> List[str]:
+    return [t for t in _TERM_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+class ChunkIndex:
+    """In-memory BM25 index over the chunks of a set of documents.
+
+    Only postings and chunk sizes are kept; chunk text is re-read from the
+    documents for the chunks that get selected, so an index over a large
+    week stays small.
+    """
+
+    K1 = 1.5
+    B = 0.75
+
+    def __init__(self, docs: List[Document], chunk_chars: int, measure: Callable[[str], int] = len):
+        self.chunk_chars = chunk_chars
+        self.chunks: List[Tuple[int, int]] = []  # (doc index, chunk index in doc)
+        self.sizes: List[int] = []
+        self._lengths: List[int] = []
+        self._postings: Dict[str, List[Tuple[int, int]]] = {}
+
+        for doc_index, doc in enumerate(docs):
+            for chunk_index, chunk in enumerate(split_chunks(doc.iter_text(), chunk_chars)):
+                chunk_id = len(self.chunks)
+                self.chunks.append((doc_index, chunk_index))
+                self.sizes.append(measure(chunk))
+                counts = Counter(terms(chunk))
+                self._lengths.append(sum(counts.values()))
+                for term, tf in counts.items():
+                    self._postings.setdefault(term, []).append((chunk_id, tf))
+
+        self._avg_length = (sum(self._lengths) / len(self._lengths)) if self._lengths else 0.0
+
+    def scores(self, query: str) -> List[float]:
+        n = len(self.chunks)
+        scores = [0.0] * n
+        for term in set(terms(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for chunk_id, tf in postings:
+                norm = self.K1 * (1 - self.B + self.B * self._lengths[chunk_id] / (self._avg_length or 1))
+                scores[chunk_id] += idf * tf * (self.K1 + 1) / (tf + norm)
+        return scores
+
+    def rank(self, query: str) -> List[int]:
+        scores = self.scores(query)
+        return sorted(range(len(scores)), key=lambda chunk_id: (-scores[chunk_id], chunk_id))
+
+    def chunk_texts(self, doc: Document, wanted: Iterable[int]) -> Dict[int, str]:
+        wanted = set(wanted)
+        texts = {}
+        for chunk_index, chunk in enumerate(split_chunks(doc.iter_text(), self.chunk_chars)):
+            if chunk_index in wanted:
+                texts[chunk_index] = chunk
+                if len(texts) == len(wanted):
+                    break
+        return texts
+
+
+_indexes: "OrderedDict[tuple, ChunkIndex]" = OrderedDict()
+_indexes_lock = threading.Lock()
+_INDEX_MAX_ENTRIES = 8
+
+
+def get_index(docs: List[Document], chunk_chars: int, measure_name: str = "chars",
+              measure: Callable[[str], int] = len) -> ChunkIndex:
+    """Index for this exact document set, built once and reused across prompts."""
+    key = (tuple(doc.content_hash() for doc in docs), chunk_chars, measure_name)
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is not None:
+            _indexes.move_to_end(key)
+            return index
+
+    index = ChunkIndex(docs, chunk_chars, measure)
+    with _indexes_lock:
+        _indexes[key] = index
+        while len(_indexes) > _INDEX_MAX_ENTRIES:
+            _indexes.popitem(last=False)
+    return index
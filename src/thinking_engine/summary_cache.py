@@ -0,0 +1,120 @@
+"""Cache of research summaries keyed by document set and prompt settings."""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .document_loaders import Document
+
+
+class SummaryCache:
+    """LRU cache of summaries, in memory with optional disk persistence.
+
+    Keys hash the document set (path, title, source and content hash of each
+    document, in order) together with everything else that shapes the summary
+    prompt, so any change to the inputs is a miss rather than a stale hit.
+    Map-reduce summarization also keeps its per-document notes here.
+    """
+
+    _default: Optional["SummaryCache"] = None
+    _default_lock = threading.Lock()
+
+    def __init__(self, max_entries: int = 1024, cache_dir: Optional[str] = None):
+        self.max_entries = max_entries
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def default(cls) -> "SummaryCache":
+        """Process-wide cache configured from the environment.
+
+        It is memory-only unless SUMMARY_CACHE_DIR is set.
+        """
+        with cls._default_lock:
+            if cls._default is None:
+                cls._default = cls(
+                    max_entries=int(os.getenv("SUMMARY_CACHE_MAX_ENTRIES", "1024")),
+                    cache_dir=os.getenv("SUMMARY_CACHE_DIR") or None,
+                )
+            return cls._default
+
+    @staticmethod
+    def make_key(docs: List[Document], **settings) -> str:
+        payload = {
+            'docs': [[doc.file_path, doc.title, doc.source, doc.content_hash()] for doc in docs],
+            'settings': settings,
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def make_text_key(text: str, **settings) -> str:
+        payload = {
+            'text': hashlib.sha256(text.encode('utf-8')).hexdigest(),
+            'settings': settings,
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            summary = self._entries.get(key)
+            if summary is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return summary
+
+        summary = self._read_disk(key)
+        with self._lock:
+            if summary is None:
+                self.misses += 1
+                return None
+            self._store(key, summary)
+            self.hits += 1
+            return summary
+
+    def put(self, key: str, summary: str):
+        with self._lock:
+            self._store(key, summary)
+        self._write_disk(key, summary)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries)}
+
+    def _store(self, key: str, summary: str):
+        self._entries[key] = summary
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _read_disk(self, key: str) -> Optional[str]:
+        if not self.cache_dir:
+            return None
+        path = self.cache_dir / f"{key}.json"
+        try:
+            summary = json.loads(path.read_text(encoding='utf-8'))['summary']
+            os.utime(path)  # mtime doubles as last access for eviction
+            return summary
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _write_disk(self, key: str, summary: str):
+        if not self.cache_dir:
+            return
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp = self.cache_dir / f"{key}.tmp"
+            tmp.write_text(json.dumps({'summary': summary}), encoding='utf-8')
+            os.replace(tmp, self.cache_dir / f"{key}.json")
+
+            files = sorted(self.cache_dir.glob("*.json"), key=lambda p: p.stat().st_mtime)
+            for stale in files[:max(0, len(files) - self.max_entries)]:
+                stale.unlink()
+        except OSError as e:
+            print(f"Warning: Could not persist summary cache entry: {e}")
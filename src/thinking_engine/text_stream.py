@@ -0,0 +1,99 @@
+"""Bounded-memory reading of large text files."""
+
+import codecs
+import os
+from typing import Iterator, Tuple
+
+CHUNK_SIZE = 256 * 1024
+
+_BOMS = [
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+]
+
+
+def sniff_encoding(file_path: str, sample_size: int = 64 * 1024) -> str:
+    """Pick a codec for a text file from its first bytes.
+
+    A BOM wins; otherwise the sample must decode as UTF-8 or the file is
+    read as cp1252. Either way reads use errors='replace', so a stray bad
+    byte further in costs one replacement character, not the whole file.
+    """
+    with open(file_path, 'rb') as f:
+        sample = f.read(sample_size)
+
+    for bom, encoding in _BOMS:
+        if sample.startswith(bom):
+            return encoding
+
+    try:
+        # final=False tolerates a multi-byte character cut off by the sample.
+        codecs.getincrementaldecoder('utf-8')().decode(sample, final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        return 'cp1252'
+
+
+def iter_text(file_path: str, encoding: str = 'utf-8', chunk_size: int = CHUNK_SIZE) -> Iterator[str]:
+    with open(file_path, 'r', encoding=encoding, errors='replace') as f:
+        for chunk in iter(lambda: f.read(chunk_size), ''):
+            yield chunk
+
+
+def read_head(file_path: str, n: int, encoding: str = 'utf-8') -> str:
+    if n <= 0:
+        return ""
+    with open(file_path, 'r', encoding=encoding, errors='replace') as f:
+        return f.read(n)
+
+
+def read_tail(file_path: str, n: int, encoding: str = 'utf-8') -> str:
+    if n <= 0:
+        return ""
+
+    # Every supported codec uses at most 4 bytes per character, and a CRLF
+    # pair collapses to no less than one character per 4 bytes, so the last
+    # 4n bytes always hold the last n characters.
+    tail_encoding, unit = _tail_codec(file_path, encoding)
+    with open(file_path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        start = max(0, size - 4 * n)
+        start -= start % unit
+        if start > 0:
+            f.seek(start)
+            data = f.read()
+            text = data[_char_start(data, tail_encoding):].decode(tail_encoding, errors='replace')
+            # Match the newline translation of the text-mode reads above.
+            return text.replace('\r\n', '\n').replace('\r', '\n')[-n:]
+    # Small file: at most 4n bytes, so reading it whole stays bounded.
+    with open(file_path, 'r', encoding=encoding, errors='replace') as f:
+        return f.read()[-n:]
+
+
+def count_chars(file_path: str, encoding: str = 'utf-8') -> int:
+    return sum(len(chunk) for chunk in iter_text(file_path, encoding))
+
+
+def _char_start(data: bytes, encoding: str) -> int:
+    # Skip the remainder of a character cut in half by the seek.
+    if encoding == 'utf-8':
+        i = 0
+        while i < min(3, len(data)) and data[i] & 0xC0 == 0x80:
+            i += 1
+        return i
+    if encoding in ('utf-16-le', 'utf-16-be') and len(data) >= 2:
+        high = data[1] if encoding == 'utf-16-le' else data[0]
+        return 2 if 0xDC <= high <= 0xDF else 0
+    return 0
+
+
+def _tail_codec(file_path: str, encoding: str) -> Tuple[str, int]:
+    if encoding == 'utf-8-sig':
+        return 'utf-8', 1
+    if encoding == 'utf-16':
+        with open(file_path, 'rb') as f:
+            bom = f.read(2)
+        return ('utf-16-be' if bom == codecs.BOM_UTF16_BE else 'utf-16-le'), 2
+    return encoding, 1
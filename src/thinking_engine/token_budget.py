@@ -0,0 +1,175 @@
+"""Token counting and token budgets for prompt context."""
+
+import functools
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import List, Tuple
+
+from .document_loaders import Document
+
+try:
+    import tiktoken
+except ImportError:  # optional: fall back to an estimate
+    tiktoken = None
+
+# Context windows by model prefix; the longest matching prefix wins.
+MODEL_CONTEXT_TOKENS = {
+    "gpt-4o": 128000,
+    "gpt-4.1": 1047576,
+    "gpt-4-turbo": 128000,
+    "gpt-4": 8192,
+    "gpt-3.5-turbo": 16385,
+    "o1": 200000,
+    "o3": 200000,
+    "o4": 200000,
+}
+DEFAULT_CONTEXT_TOKENS = 8192
+
+# Tokens kept free for the completion of each stage.
+STAGE_OUTPUT_TOKENS = {
+    "summary": 2048,
+    "blog": 4096,
+    "tweets": 4096,
+    # Context shared by every stage in the prefix prompt layout: room for the
+    # largest stage output plus the summary carried after the context.
+    "shared": 6144,
+}
+
+# Chars read per token when cutting a document's head or tail before
+# encoding; generous so the exact token cut always has enough text.
+_CHARS_PER_TOKEN_WINDOW = 8
+
+# Roughly cl100k/o200k-shaped pieces: a word with its leading space (long
+# words split), up to three digits, whitespace runs, single symbols.
+_ESTIMATE_RE = re.compile(r" ?[A-Za-z]{1,8}| ?\d{1,3}|\s+|[^\sA-Za-z\d]")
+
+
+class _EstimatedEncoding:
+    """Stand-in for a tiktoken encoding when tiktoken or its data is unavailable.
+
+    Splits text into token-sized pieces with a regex. Counts come out close
+    to, and usually slightly above, the real BPE counts for English prose
+    and numbers, which errs on the side of not overflowing the window.
+    """
+
+    name = "estimate"
+
+    def encode(self, text: str) -> List[str]:
+        return _ESTIMATE_RE.findall(text)
+
+    def decode(self, tokens: List[str]) -> str:
+        return ''.join(tokens)
+
+
+class Tokenizer:
+    def __init__(self, encoding):
+        self._encoding = encoding
+        self.name = encoding.name
+
+    def count(self, text: str) -> int:
+        return len(self._encoding.encode(text)) if text else 0
+
+    def head(self, text: str, n: int) -> str:
+        if n <= 0:
+            return ""
+        return self._encoding.decode(self._encoding.encode(text)[:n])
+
+    def tail(self, text: str, n: int) -> str:
+        if n <= 0:
+            return ""
+        return self._encoding.decode(self._encoding.encode(text)[-n:])
+
+
+@functools.lru_cache(maxsize=None)
+def get_tokenizer(model: str) -> Tokenizer:
+    """Tokenizer matching `model`, or a regex estimate if tiktoken cannot provide one."""
+    if tiktoken is not None:
+        try:
+            try:
+                return Tokenizer(tiktoken.encoding_for_model(model))
+            except KeyError:
+                return Tokenizer(tiktoken.get_encoding("o200k_base"))
+        except Exception as e:
+            # Encodings are downloaded on first use, which fails offline.
+            print(f"Warning: Could not load tokenizer for {model}, estimating token counts: {e}")
+    return Tokenizer(_EstimatedEncoding())
+
+
+def context_window(model: str) -> int:
+    override = os.getenv("MODEL_CONTEXT_TOKENS")
+    if override:
+        return int(override)
+    matches = [prefix for prefix in MODEL_CONTEXT_TOKENS if model.startswith(prefix)]
+    if not matches:
+        return DEFAULT_CONTEXT_TOKENS
+    return MODEL_CONTEXT_TOKENS[max(matches, key=len)]
+
+
+def input_budget(model: str, stage: str, prompt_tokens: int) -> int:
+    """Tokens left for document context in a `stage` prompt of `prompt_tokens` fixed tokens."""
+    budget = context_window(model) - STAGE_OUTPUT_TOKENS.get(stage, 2048) - prompt_tokens
+    cap = int(os.getenv("MAX_CONTEXT_TOKENS", "0"))
+    if cap > 0:
+        budget = min(budget, cap)
+    return max(0, budget)
+
+
+_packed: "OrderedDict[tuple, Tuple[str, int, bool]]" = OrderedDict()
+_packed_lock = threading.Lock()
+_PACKED_MAX_ENTRIES = 1024
+
+
+def pack_document(doc: Document, tokenizer: Tokenizer, max_tokens: int) -> Tuple[str, int, bool]:
+    """Return (text, tokens, truncated) for `doc` cut to at most `max_tokens`.
+
+    Long documents keep their head and tail, like the character budget.
+    Results are memoized by content hash, so building context for the same
+    week again costs no tokenization.
+    """
+    key = (doc.content_hash(), tokenizer.name, max_tokens)
+    with _packed_lock:
+        hit = _packed.get(key)
+        if hit is not None:
+            _packed.move_to_end(key)
+            return hit
+
+    window = max_tokens * _CHARS_PER_TOKEN_WINDOW
+    if doc.length <= 2 * window:
+        text = doc.content
+        tokens = tokenizer.count(text)
+        if tokens <= max_tokens:
+            result = (text, tokens, False)
+        else:
+            result = _cut_middle(tokenizer, text, text, tokens - max_tokens, max_tokens)
+    else:
+        # Only the head and tail are needed; never materialize the middle.
+        result = _cut_middle(tokenizer, doc.head(window), doc.tail(window), None, max_tokens)
+
+    with _packed_lock:
+        _packed[key] = result
+        while len(_packed) > _PACKED_MAX_ENTRIES:
+            _packed.popitem(last=False)
+    return result
+
+
+def fit_tokens(tokenizer: Tokenizer, text: str, max_tokens: int) -> Tuple[str, int]:
+    """Cut the middle out of already packed text so it fits `max_tokens`."""
+    tokens = tokenizer.count(text)
+    if tokens <= max_tokens:
+        return text, tokens
+    marker = "\n\n[... content truncated to fit context limit ...]\n\n"
+    keep = max(0, max_tokens - tokenizer.count(marker))
+    start = keep // 2
+    text = tokenizer.head(text, start) + marker + tokenizer.tail(text, keep - start)
+    return text, tokenizer.count(text)
+
+
+def _cut_middle(tokenizer: Tokenizer, head: str, tail: str, dropped, max_tokens: int) -> Tuple[str, int, bool]:
+    what = f"{dropped} tokens" if dropped is not None else "content"
+    marker = f"\n\n[... {what} truncated from middle ...]\n\n"
+    keep = max(0, max_tokens - tokenizer.count(marker))
+    start = keep // 2
+    text = tokenizer.head(head, start) + marker + tokenizer.tail(tail, keep - start)
+    return text, tokenizer.count(text), True
@@ -1,15 +1,16 @@
 """Tweet idea generation."""
 
+import asyncio
 import json
-from typing import List, Dict
+from typing import List, Dict, Union
 from pathlib import Path
 from .document_loaders import Document
-from .llm_orchestrator import LLMOrchestrator
+from .llm_orchestrator import AsyncLLMOrchestrator, LLMOrchestrator
 from .fact_checker import FactChecker
 
 
 class TweetGenerator:
-    def __init__(self, llm: LLMOrchestrator, count: int = 25):
+    def __init__(self, llm: Union[LLMOrchestrator, AsyncLLMOrchestrator], count: int = 25):
         self.llm = llm
         self.count = count
     
@@ -18,11 +19,33 @@ class TweetGenerator:
             raise ValueError("No documents provided for tweet generation")
         
         print("Analyzing documents...")
-        summary = self.llm.summarize_documents(docs)
+        summary, summary_cached = self.llm.summarize_cached(docs)
+        return self.generate_from_summary(docs, summary, summary_cached, output_dir)
+    
+    async def agenerate(self, docs: List[Document], output_dir: str) -> Dict:
+        if not docs:
+            raise ValueError("No documents provided for tweet generation")
         
+        print("Analyzing documents...")
+        summary, summary_cached = await self.llm.summarize_cached(docs)
+        return await self.agenerate_from_summary(docs, summary, summary_cached, output_dir)
+    
+    def generate_from_summary(self, docs: List[Document], summary: str, summary_cached: bool,
+                              output_dir: str) -> Dict:
         print(f"Generating {self.count} tweet ideas...")
         tweets = self.llm.generate_tweet_ideas(docs, summary, self.count)
         
+        return self._save(docs, tweets, summary_cached, output_dir)
+    
+    async def agenerate_from_summary(self, docs: List[Document], summary: str, summary_cached: bool,
+                                     output_dir: str) -> Dict:
+        print(f"Generating {self.count} tweet ideas...")
+        tweets = await self.llm.generate_tweet_ideas(docs, summary, self.count)
+        
+        return await asyncio.to_thread(self._save, docs, tweets, summary_cached, output_dir)
+    
+    def _save(self, docs: List[Document], tweets: List[Dict[str, str]], summary_cached: bool,
+              output_dir: str) -> Dict:
         print("Fact-checking tweet ideas...")
         checker = FactChecker(docs)
         fact_check = checker.check_tweet_ideas(tweets)
@@ -61,5 +84,6 @@ class TweetGenerator:
             'json_file': str(json_file),
             'txt_file': str(txt_file),
             'tweet_count': len(tweets),
-            'fact_check': fact_check
+            'fact_check': fact_check,
+            'summary_cached': summary_cached
         }
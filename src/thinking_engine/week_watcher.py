@@ -0,0 +1,151 @@
+"""Incremental ingestion of week folders."""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from .document_loaders import Document, DocumentLoader
+
+
+class WeekWatcher:
+    """Keeps the documents of one week folder up to date.
+
+    A manifest of (size, mtime) per file is compared against the folder on
+    every `refresh()`, and only added or changed files are re-extracted.
+    Refreshing costs one directory listing plus one stat per file, so it can
+    run on every request or from a background polling thread.
+    """
+
+    def __init__(self, loader: DocumentLoader, week_folder: str):
+        self.loader = loader
+        self.week_folder = week_folder
+        self.week_path = loader.base_path / week_folder
+        self._manifest: Dict[str, Tuple[int, int]] = {}
+        self._docs: Dict[str, Optional[Document]] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def refresh(self) -> Dict[str, List[str]]:
+        if not self.week_path.exists():
+            raise ValueError(f"Week folder not found: {self.week_path}")
+
+        with self._lock:
+            current = {}
+            for file_path in sorted(self.week_path.iterdir()):
+                try:
+                    st = file_path.stat()
+                except OSError:
+                    continue
+                if file_path.is_file():
+                    current[file_path.name] = (st.st_size, st.st_mtime_ns)
+
+            added = [name for name in current if name not in self._manifest]
+            changed = [name for name in current
+                       if name in self._manifest and current[name] != self._manifest[name]]
+            removed = [name for name in self._manifest if name not in current]
+
+            to_load = sorted(added + changed)
+            if to_load:
+                loaded = self.loader.load_files([self.week_path / name for name in to_load])
+                self._docs.update(zip(to_load, loaded))
+            for name in removed:
+                self._docs.pop(name, None)
+
+            self._manifest = current
+            return {'added': added, 'changed': changed, 'removed': removed}
+
+    def documents(self) -> List[Document]:
+        with self._lock:
+            return [self._docs[name] for name in sorted(self._docs) if self._docs[name]]
+
+    def load(self) -> List[Document]:
+        self.refresh()
+        return self.documents()
+
+    def manifest(self) -> Dict[str, Tuple[int, int]]:
+        with self._lock:
+            return dict(self._manifest)
+
+    def start(self, interval: float):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._poll, args=(interval,), daemon=True,
+                                        name=f"week-watcher-{self.week_folder}")
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _poll(self, interval: float):
+        while not self._stop.wait(interval):
+            try:
+                changes = self.refresh()
+            except Exception as e:
+                print(f"Warning: Failed to refresh {self.week_path}: {e}")
+                continue
+            if any(changes.values()):
+                print(f"Week {self.week_folder}: {len(changes['added'])} added, "
+                      f"{len(changes['changed'])} changed, {len(changes['removed'])} removed")
+
+
+class WeekRegistry:
+    """Process-wide set of WeekWatchers, one per week folder.
+
+    At most `max_weeks` weeks are kept; the least recently requested one is
+    dropped, and its watcher stopped, to make room for another. `stop()`
+    closes the registry.
+    """
+
+    def __init__(self, loader: DocumentLoader, poll_interval: Optional[float] = None,
+                 max_weeks: Optional[int] = None):
+        self.loader = loader
+        if poll_interval is None:
+            poll_interval = float(os.getenv("WEEK_WATCH_INTERVAL", "0"))
+        self.poll_interval = poll_interval
+        if max_weeks is None:
+            max_weeks = int(os.getenv("WEEK_REGISTRY_MAX_WEEKS", "8"))
+        self.max_weeks = max(1, max_weeks)
+        self._watchers: "OrderedDict[str, WeekWatcher]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, week_folder: str) -> WeekWatcher:
+        week_path = self.loader.base_path / week_folder
+        if not week_path.exists():
+            raise ValueError(f"Week folder not found: {week_path}")
+
+        evicted = []
+        with self._lock:
+            watcher = self._watchers.get(week_folder)
+            if watcher is None:
+                watcher = WeekWatcher(self.loader, week_folder)
+                self._watchers[week_folder] = watcher
+            self._watchers.move_to_end(week_folder)
+            while len(self._watchers) > self.max_weeks:
+                evicted.append(self._watchers.popitem(last=False)[1])
+        for old in evicted:
+            old.stop()
+        return watcher
+
+    def load(self, week_folder: str) -> List[Document]:
+        watcher = self.get(week_folder)
+        docs = watcher.load()
+        if self.poll_interval > 0:
+            watcher.start(self.poll_interval)
+        return docs
+
+    def weeks(self) -> List[str]:
+        with self._lock:
+            return list(self._watchers)
+
+    def stop(self):
+        with self._lock:
+            watchers = list(self._watchers.values())
+            self._watchers.clear()
+        for watcher in watchers:
+            watcher.stop()
@@ -0,0 +1,81 @@
+"""Shared test configuration, fixtures and fake OpenAI clients."""
+
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+from src.thinking_engine.completion_cache import CompletionCache
+from src.thinking_engine.document_loaders import Document
+from src.thinking_engine.summary_cache import SummaryCache
+
+
+def _response(content):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))], usage=None)
+
+
+def _client(completions):
+    return SimpleNamespace(chat=SimpleNamespace(completions=completions))
+
+
+class FakeCompletions:
+    """Records calls and how many were in flight at once; each takes `delay` seconds."""
+    
+    def __init__(self, reply="Summary", delay=0.0):
+        self.reply = reply
+        self.delay = delay
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+    
+    def create(self, **kwargs):
+        self._enter(kwargs)
+        try:
+            time.sleep(self.delay)
+        finally:
+            self._exit()
+        return _response(self.reply)
+    
+    def _enter(self, kwargs):
+        with self._lock:
+            self.calls.append(kwargs)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+    
+    def _exit(self):
+        with self._lock:
+            self.in_flight -= 1
+
+
+class FakeAsyncCompletions(FakeCompletions):
+    async def create(self, **kwargs):
+        self._enter(kwargs)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self._exit()
+        return _response(self.reply)
+
+
+@pytest.fixture(autouse=True)
+def isolated_caches(monkeypatch, tmp_path):
+    """Keep on-disk caches out of the checkout, whatever the developer's .env says."""
+    monkeypatch.setenv("EXTRACTION_CACHE_DIR", "")
+    monkeypatch.setenv("SUMMARY_CACHE_DIR", "")
+    monkeypatch.setenv("LLM_CACHE_DIR", str(tmp_path / "completions"))
+
+
+@pytest.fixture
+def docs():
+    return [Document("article-001-coindesk-bitcoin.md", "Bitcoin rose 15% this week.", "coindesk")]
+
+
+@pytest.fixture
+def api_key(monkeypatch):
+    """A fake API key and fresh process-wide caches for orchestrator tests."""
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    monkeypatch.setattr(SummaryCache, "_default", SummaryCache())
+    monkeypatch.setattr(CompletionCache, "_default", None)
+    monkeypatch.setattr(CompletionCache, "_default_loaded", True)
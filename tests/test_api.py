@@ -0,0 +1,44 @@
+"""Tests for the API's shared resources."""
+
+import asyncio
+
+import openai
+import pytest
+from src.thinking_engine import api
+from src.thinking_engine.completion_cache import CompletionCache
+from src.thinking_engine.llm_orchestrator import AsyncLLMOrchestrator, pooled_http_client
+
+pytestmark = pytest.mark.usefixtures("api_key")
+
+
+def test_lifespan_shares_one_orchestrator(monkeypatch):
+    """Test the orchestrator is created at startup, reused, and closed at shutdown."""
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    monkeypatch.setattr(CompletionCache, "_default_loaded", True)
+    monkeypatch.setattr(api, "_llm", None)
+    closed = []
+    
+    async def run():
+        async with api.lifespan(api.app):
+            llm = api._get_llm()
+            monkeypatch.setattr(llm, "aclose", lambda: asyncio.sleep(0, closed.append(llm)))
+            assert api._get_llm() is llm
+        return llm
+    
+    llm = asyncio.run(run())
+    assert closed == [llm]
+    assert api._llm is None
+
+
+def test_pooled_http_client_is_sized_from_the_environment(monkeypatch):
+    """Test the shared connection pool builds on the OpenAI client's transport."""
+    monkeypatch.setenv("OPENAI_MAX_CONNECTIONS", "7")
+    monkeypatch.setenv("OPENAI_TIMEOUT", "30")
+    client = pooled_http_client()
+    try:
+        assert isinstance(client, openai.DefaultAsyncHttpxClient)
+        assert client.timeout.read == 30 and client.timeout.connect == 5
+        llm = AsyncLLMOrchestrator(model="test-model", http_client=client)
+        assert llm.client._client is client
+    finally:
+        asyncio.run(client.aclose())
@@ -0,0 +1,99 @@
+"""Tests for the loader benchmark suite."""
+
+import pytest
+from openai import RateLimitError
+
+from benchmarks.bench_fact_checker import run_benchmark as run_fact_benchmark
+from benchmarks.bench_loaders import WEEK_FOLDER, generate_corpus, parse_mix, run_benchmark
+from benchmarks.fake_openai import FakeOpenAI, create_app, start_server
+from benchmarks.load_test import percentile, run_load
+from src.thinking_engine.completion_cache import CompletionCache
+from src.thinking_engine.document_loaders import Document, DocumentLoader
+from src.thinking_engine.llm_orchestrator import LLMOrchestrator
+from src.thinking_engine.rate_limiter import RequestScheduler
+from src.thinking_engine.summary_cache import SummaryCache
+
+
+def test_synthetic_corpus_loads_every_format(tmp_path):
+    """Test generated files of every format extract to non-empty text."""
+    generate_corpus(tmp_path, files=4, size_kb=4, mix=parse_mix("md,html,pdf,txt"))
+    
+    docs = DocumentLoader(base_path=str(tmp_path), cache_dir="").load_week_folder(WEEK_FOLDER)
+    
+    assert sorted(doc.file_type for doc in docs) == [".html", ".md", ".pdf", ".txt"]
+    assert all(len(doc.content) > 1000 for doc in docs)
+
+
+def test_run_benchmark_reports_metrics(tmp_path):
+    """Test the benchmark returns throughput, memory and per-format latency."""
+    generate_corpus(tmp_path, files=4, size_kb=2, mix=parse_mix("md=1,txt=1"))
+    
+    results = run_benchmark(tmp_path, repeat=1)
+    
+    assert results['files'] == 4
+    assert results['files_per_sec'] > 0
+    assert results['peak_traced_mb'] > 0
+    assert set(results['per_format']) == {".md", ".txt"}
+
+
+@pytest.fixture
+def fake_openai():
+    servers = []
+    
+    def start(**settings):
+        fake = FakeOpenAI(**dict({'latency_ms': 0, 'jitter_ms': 0, 'token_delay_ms': 0}, **settings))
+        server, url = start_server(create_app(fake))
+        servers.append(server)
+        return fake, url
+    
+    yield start
+    for server in servers:
+        server.should_exit = True
+
+
+def test_fake_openai_serves_the_orchestrator(fake_openai, monkeypatch):
+    """Test the orchestrator runs end to end against the fake server, including 429s."""
+    fake, url = fake_openai()
+    monkeypatch.setenv("OPENAI_API_KEY", "fake")
+    monkeypatch.setenv("OPENAI_BASE_URL", f"{url}/v1")
+    monkeypatch.setenv("PROMPT_LAYOUT", "prefix")
+    monkeypatch.setattr(CompletionCache, "_default", None)
+    monkeypatch.setattr(CompletionCache, "_default_loaded", True)
+    docs = [Document("article-001-coindesk-bitcoin.md", "Bitcoin rose 15% this week. " * 300, "coindesk")]
+    llm = LLMOrchestrator(model="gpt-4o", summary_cache=SummaryCache())
+    
+    summary = llm.summarize_documents(docs)
+    assert "[Source: " in llm.generate_blog_post(docs, summary)
+    assert len(llm.generate_tweet_ideas(docs, summary, count=5)) == 5
+    assert fake.stats['requests'] == 3
+    assert llm.usage_stats()['cached_tokens'] > 0
+    
+    _, limited_url = fake_openai(rate_limit_rate=1.0)
+    monkeypatch.setenv("OPENAI_BASE_URL", f"{limited_url}/v1")
+    limited = LLMOrchestrator(model="gpt-4o", summary_cache=SummaryCache(),
+                              scheduler=RequestScheduler(max_retries=0))
+    with pytest.raises(RateLimitError):
+        limited.summarize_documents(docs)
+
+
+def test_load_generator_reports_latency_and_errors(fake_openai):
+    """Test the load generator counts every request and splits out injected errors."""
+    fake, url = fake_openai(latency_ms=20, jitter_ms=10, rate_limit_rate=0.3, seed=1)
+    payload = {'model': "gpt-4o", 'messages': [{'role': "user", 'content': "Summarize the week."}]}
+    
+    results = run_load(url, [("v1/chat/completions", payload)], [1], concurrency=4, requests=20)
+    
+    overall = results['overall']
+    assert overall['requests'] == 20
+    assert overall['errors'] == fake.stats['rate_limited'] == overall['status_codes'].get('429', 0)
+    assert 0 < overall['latency']['p50_ms'] <= overall['latency']['p95_ms'] <= overall['latency']['p99_ms']
+    assert percentile([1.0, 2.0, 3.0, 4.0], 50) == 2.0
+
+
+def test_fact_check_benchmark_reports_per_size():
+    """Test the fact-check benchmark times every post size."""
+    results = run_fact_benchmark([4, 8], docs=3, doc_size_kb=2, repeat=1)
+    
+    assert [round(post['size_kb']) for post in results['posts']] == [4, 8]
+    assert all(post['seconds'] > 0 and post['citations'] > 0 for post in results['posts'])
+    assert results['per_kb_growth'] > 0
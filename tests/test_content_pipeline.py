@@ -0,0 +1,73 @@
+"""Tests for combined blog and tweet generation."""
+
+import asyncio
+
+import pytest
+from src.thinking_engine.content_pipeline import ContentPipeline
+from src.thinking_engine.llm_orchestrator import AsyncLLMOrchestrator, LLMOrchestrator
+from src.thinking_engine.summary_cache import SummaryCache
+from tests.conftest import FakeAsyncCompletions, FakeCompletions, _client
+
+pytestmark = pytest.mark.usefixtures("api_key")
+
+REPLY = "TWEET: Bitcoin is up 15% this week\nHASHTAGS: #Bitcoin"
+
+
+def test_async_pipeline_summarizes_once_and_overlaps(docs, tmp_path):
+    """Test the summary is shared and blog and tweets run concurrently."""
+    llm = AsyncLLMOrchestrator(model="test-model")
+    completions = FakeAsyncCompletions(reply=REPLY, delay=0.05)
+    llm.client = _client(completions)
+    pipeline = ContentPipeline(llm, tweet_count=1)
+
+    result = asyncio.run(pipeline.agenerate(docs, str(tmp_path / "blog-post.md"), str(tmp_path)))
+
+    # Summary, then blog and tweets side by side: two round trips, not three.
+    assert len(completions.calls) == 3
+    assert completions.max_in_flight == 2
+    assert (tmp_path / "blog-post.md").exists()
+    assert result['tweets']['tweet_count'] == 1
+    assert result['summary_cached'] is False
+    assert docs[0].is_loaded
+
+
+def test_sync_pipeline_overlaps(docs, tmp_path):
+    """Test the sync pipeline runs blog and tweets in parallel threads."""
+    llm = LLMOrchestrator(model="test-model")
+    completions = FakeCompletions(reply=REPLY, delay=0.05)
+    llm.client = _client(completions)
+    pipeline = ContentPipeline(llm, tweet_count=1)
+
+    result = pipeline.generate(docs, str(tmp_path / "blog-post.md"), str(tmp_path))
+
+    assert len(completions.calls) == 3
+    assert completions.max_in_flight == 2
+    assert (tmp_path / "tweet-ideas.json").exists()
+    assert result['blog']['output_file'] == str(tmp_path / "blog-post.md")
+
+
+@pytest.mark.parametrize("layout, mode", [("prefix", "direct"), ("inline", "map_reduce")])
+def test_pipeline_builds_shared_context_once(docs, tmp_path, monkeypatch, layout, mode):
+    """Test a cached summary does not make blog and tweets build the same context side by side."""
+    monkeypatch.setenv("PROMPT_LAYOUT", layout)
+    cache = SummaryCache()
+    llm = LLMOrchestrator(model="test-model", summary_cache=cache, summary_mode=mode)
+    cache.put(llm._summary_key(docs), "Summary")
+    completions = FakeCompletions(reply=REPLY, delay=0.05)
+    llm.client = _client(completions)
+    built = []
+    build = llm._stage_context_flow
+
+    def counting_build(docs, stage, *args):
+        built.append(stage)
+        return (yield from build(docs, stage, *args))
+
+    monkeypatch.setattr(llm, "_stage_context_flow", counting_build)
+
+    result = ContentPipeline(llm, tweet_count=1).generate(docs, str(tmp_path / "blog-post.md"), str(tmp_path))
+
+    assert result['summary_cached'] is True
+    notes = [call for call in completions.calls if "Summarize the following document" in call['messages'][-1]['content']]
+    assert len(notes) == (1 if mode == "map_reduce" else 0)
+    if layout == "prefix":
+        assert built == ["shared"]
@@ -1,8 +1,12 @@
 """Tests for document loaders."""
 
+import gc
+import multiprocessing
+import time
+from concurrent.futures import ThreadPoolExecutor
 import pytest
 from pathlib import Path
-from src.thinking_engine.document_loaders import DocumentLoader, Document
+from src.thinking_engine.document_loaders import DocumentLoader, Document, markdown_to_text
 
 
 def test_document_loader_initialization():
@@ -87,3 +91,234 @@ def test_list_week_folders(tmp_path):
     assert "week-2024-01-22" in folders
     assert "other-folder" not in folders
 
+
+
+def test_load_week_folder_parallel_preserves_order(tmp_path):
+    """Test parallel loading returns the same documents in the same order."""
+    week_folder = tmp_path / "week-2024-01-15"
+    week_folder.mkdir()
+    
+    for i in range(6):
+        (week_folder / f"article-00{i}-coindesk-test{i}.md").write_text(f"# Test {i}\n\nBody {i}")
+    
+    serial = DocumentLoader(base_path=str(tmp_path)).load_week_folder("week-2024-01-15")
+    parallel = DocumentLoader(base_path=str(tmp_path), workers=3).load_week_folder("week-2024-01-15")
+    
+    assert [d.file_path for d in parallel] == [d.file_path for d in serial]
+    assert [d.content for d in parallel] == [d.content for d in serial]
+
+
+def _hang_on_slow_files(self, file_path):
+    if "slow" in file_path:
+        time.sleep(60)
+    return Path(file_path).read_text()
+
+
+def test_parallel_load_terminates_hung_workers(tmp_path, monkeypatch):
+    """Test a file that exceeds the timeout is skipped and its worker process ended."""
+    monkeypatch.setattr(DocumentLoader, "_load_markdown", _hang_on_slow_files)
+    week_folder = tmp_path / "week-2024-01-15"
+    week_folder.mkdir()
+    (week_folder / "article-001-coindesk-slow.md").write_text("Never read")
+    for i in range(2, 5):
+        (week_folder / f"article-00{i}-coindesk-test{i}.md").write_text(f"Body {i}")
+    
+    loader = DocumentLoader(base_path=str(tmp_path), workers=2, file_timeout=1)
+    start = time.monotonic()
+    docs = loader.load_week_folder("week-2024-01-15")
+    
+    assert [d.content for d in docs] == ["Body 2", "Body 3", "Body 4"]
+    assert time.monotonic() - start < 30
+    assert multiprocessing.active_children() == []
+
+
+def test_extraction_cache_reuses_text(tmp_path):
+    """Test a repeat load of an unchanged week is served from the cache."""
+    week_folder = tmp_path / "week-2024-01-15"
+    week_folder.mkdir()
+    (week_folder / "article-001-coindesk-test.md").write_text("# Test 1\n\nBitcoin")
+    (week_folder / "article-002-theblock-test.html").write_text("<p>Test 2</p>")
+    cache_dir = tmp_path / "cache"
+    
+    first = DocumentLoader(base_path=str(tmp_path), cache_dir=str(cache_dir))
+    docs = first.load_week_folder("week-2024-01-15")
+    assert first.cache.stats()['misses'] == 2
+    
+    second = DocumentLoader(base_path=str(tmp_path), cache_dir=str(cache_dir))
+    cached_docs = second.load_week_folder("week-2024-01-15")
+    assert second.cache.stats()['hits'] == 2
+    assert second.cache.stats()['misses'] == 0
+    assert [d.content for d in cached_docs] == [d.content for d in docs]
+    
+    (week_folder / "article-002-theblock-test.html").write_text("<p>Test 2 changed</p>")
+    third = DocumentLoader(base_path=str(tmp_path), cache_dir=str(cache_dir))
+    changed = third.load_week_folder("week-2024-01-15")
+    assert changed[1].content == "Test 2 changed"
+    assert third.cache.stats()['misses'] == 1
+
+
+def test_extraction_cache_is_opt_in_and_writes_index_once(tmp_path, monkeypatch):
+    """Test no cache is used by default and a week load writes the cache index once."""
+    week_folder = tmp_path / "week-2024-01-15"
+    week_folder.mkdir()
+    for i in range(3):
+        (week_folder / f"article-00{i}-coindesk-test.md").write_text(f"# Test {i}")
+    monkeypatch.delenv("EXTRACTION_CACHE_DIR")
+    assert DocumentLoader(base_path=str(tmp_path)).cache is None
+    
+    loader = DocumentLoader(base_path=str(tmp_path), cache_dir=str(tmp_path / "cache"))
+    writes = []
+    original = loader.cache.flush
+    monkeypatch.setattr(loader.cache, "flush", lambda: writes.append(loader.cache._dirty) or original())
+    loader.load_week_folder("week-2024-01-15")
+    
+    assert writes == [True]
+    assert (tmp_path / "cache" / "index.json").exists()
+
+
+def test_extraction_cache_keeps_blobs_of_live_documents(tmp_path):
+    """Test eviction never deletes the text a loaded document still reads from."""
+    week_folder = tmp_path / "week-2024-01-15"
+    week_folder.mkdir()
+    for i in range(4):
+        (week_folder / f"article-00{i}-coindesk-test.md").write_text(f"# Test {i}\n\n" + "Bitcoin " * 200)
+    loader = DocumentLoader(base_path=str(tmp_path), cache_dir=str(tmp_path / "cache"))
+    loader.cache.max_bytes = 2000
+    
+    first = loader.load_document(str(week_folder / "article-000-coindesk-test.md"))
+    first.release()
+    loader.load_week_folder("week-2024-01-15")
+    
+    assert first.content.startswith("Test 0")
+    assert loader.cache.stats()['bytes'] > loader.cache.max_bytes
+    
+    del first
+    gc.collect()
+    loader.cache.put(str(week_folder / "article-003-coindesk-test.md"), "changed", variant="other")
+    assert loader.cache.stats()['bytes'] <= loader.cache.max_bytes
+
+
+def test_extraction_cache_is_safe_across_threads(tmp_path):
+    """Test weeks loaded side by side through one cache all come back whole while it evicts."""
+    weeks = [f"week-2024-0{month}-15" for month in range(1, 5)]
+    for month, week in enumerate(weeks, 1):
+        (tmp_path / week).mkdir()
+        for i in range(20):
+            (tmp_path / week / f"article-{i:03d}-coindesk-test.md").write_text(f"# Week {month} doc {i}\n\n" + "Bitcoin " * 50)
+    loader = DocumentLoader(base_path=str(tmp_path), cache_dir=str(tmp_path / "cache"))
+    loader.cache.max_bytes = 20000
+    
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        loaded = list(pool.map(loader.load_week_folder, weeks * 2))
+    
+    for n, docs in enumerate(loaded):
+        month = n % 4 + 1
+        assert [d.content.split("\n")[0] for d in docs] == [f"Week {month} doc {i}" for i in range(20)]
+
+
+def test_budgeted_pdf_extraction_skips_middle_pages(tmp_path, monkeypatch):
+    """Test budget mode reads only the front and back pages of a long PDF."""
+    from src.thinking_engine import document_loaders
+    
+    read = []
+    
+    class FakePage:
+        def __init__(self, n):
+            self.n = n
+        
+        def extract_text(self):
+            read.append(self.n)
+            return f"page {self.n:03d} " + "x" * 91
+    
+    class FakeReader:
+        def __init__(self, f):
+            self.pages = [FakePage(n) for n in range(200)]
+    
+    monkeypatch.setattr(document_loaders.PyPDF2, "PdfReader", FakeReader)
+    test_file = tmp_path / "report-001-delphi-long.pdf"
+    test_file.write_bytes(b"%PDF-1.4")
+    
+    loader = DocumentLoader(base_path=str(tmp_path), cache_dir="", pdf_char_budget=1000)
+    doc = loader.load_document(str(test_file))
+    
+    assert len(read) == 10
+    assert doc.pages_skipped == 190
+    assert doc.content.startswith("page 000 ")
+    assert doc.content.rstrip().endswith("x")
+    assert "page 199 " in doc.content
+    assert "[... 190 of 200 pages skipped ...]" in doc.content
+
+
+def test_list_documents_does_not_extract(tmp_path, monkeypatch):
+    """Test metadata listing never runs the extractors."""
+    week_folder = tmp_path / "week-2024-01-15"
+    week_folder.mkdir()
+    (week_folder / "article-001-coindesk-bitcoin-etf.md").write_text("# Test 1")
+    (week_folder / "report-002-delphi-outlook.pdf").write_bytes(b"%PDF-1.4 not really")
+    (week_folder / "notes.docx").write_text("unsupported")
+    
+    loader = DocumentLoader(base_path=str(tmp_path), cache_dir="")
+    
+    def fail(*args):
+        raise AssertionError("listing must not extract content")
+    
+    monkeypatch.setattr(loader, "_load_markdown", fail)
+    monkeypatch.setattr(loader, "_load_pdf", fail)
+    listing = loader.list_documents("week-2024-01-15")
+    
+    assert [item['file_type'] for item in listing] == [".md", ".pdf"]
+    assert listing[0]['title'] == "Coindesk Bitcoin Etf"
+    assert listing[0]['source'] == "coindesk"
+    assert listing[1]['size_bytes'] == len(b"%PDF-1.4 not really")
+
+
+def test_document_content_is_lazy(tmp_path):
+    """Test cached and plain text documents load content on first access."""
+    week_folder = tmp_path / "week-2024-01-15"
+    week_folder.mkdir()
+    (week_folder / "article-001-coindesk-test.md").write_text("# Title\n\n" + "a" * 5000 + "\n\nEND")
+    (week_folder / "article-002-theblock-test.txt").write_text("START " + "b" * 5000 + " FINISH")
+    
+    loader = DocumentLoader(base_path=str(tmp_path), cache_dir=str(tmp_path / "cache"))
+    md_doc, txt_doc = loader.load_week_folder("week-2024-01-15")
+    
+    for doc in (md_doc, txt_doc):
+        assert not doc.is_loaded
+        assert doc.length == len(doc.content)
+        doc.release()
+    
+    assert md_doc.head(5) == "Title"
+    assert md_doc.tail(3) == "END"
+    assert txt_doc.head(5) == "START"
+    assert txt_doc.tail(6) == "FINISH"
+    assert not md_doc.is_loaded and not txt_doc.is_loaded
+
+
+def test_fast_markdown_matches_rendered_output():
+    """Test single-pass Markdown stripping matches the render-and-parse path."""
+    week_path = Path("data") / "week-2025-01-15"
+    if not week_path.exists():
+        pytest.skip(f"Sample corpus not found at {week_path}")
+    
+    fast = DocumentLoader(cache_dir="", markdown_engine="fast")
+    rendered = DocumentLoader(cache_dir="", markdown_engine="render")
+    
+    for md_file in sorted(week_path.glob("*.md")):
+        assert fast._load_markdown(str(md_file)) == rendered._load_markdown(str(md_file)), md_file.name
+
+
+@pytest.mark.parametrize("md_content, expected", [
+    ("Revenue grew 5*3=15 times, and 2 * 3 too.", "Revenue grew 5*3=15 times, and 2 * 3 too."),
+    ("Some *em*, **strong** and _u_ in snake_case_name", "Some\nem\n,\nstrong\nand\nu\nin snake_case_name"),
+    ("See <https://example.com/a_b> or <news@example.com>.", "See\nhttps://example.com/a_b\nor\nnews@example.com\n."),
+    ("Intro\n\n```python\n# not a heading\nx = a*b*c\n- item\n```\n\nAfter",
+     "Intro\n# not a heading\nx = a*b*c\n- item\nAfter"),
+    ("Intro\n\n    # code\n    x = a*b*c &amp;\n\n    y = 1\n\nAfter", "Intro\n# code\nx = a*b*c &amp;\n\ny = 1\nAfter"),
+])
+def test_fast_markdown_edge_cases(tmp_path, md_content, expected):
+    """Test arithmetic, autolinks and code survive both Markdown engines alike."""
+    md_file = tmp_path / "article-001-coindesk-test.md"
+    md_file.write_text(md_content)
+    
+    assert markdown_to_text(md_content) == expected
+    assert DocumentLoader(cache_dir="")._load_markdown(str(md_file)) == expected
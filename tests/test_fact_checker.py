@@ -59,3 +59,48 @@ def test_check_tweet_ideas():
     assert isinstance(result, dict)
     assert 'has_issues' in result
 
+
+
+def test_claim_evidence_lists_matching_documents():
+    """Test uncited claims found in the sources come back with the documents backing them."""
+    doc1 = Document("article-001-coindesk-bitcoin.md", "Bitcoin ETF inflows reached a record this week.", "coindesk")
+    doc2 = Document("article-002-theblock-defi.md", "DeFi lending volumes were flat.", "theblock")
+    checker = FactChecker([doc1, doc2])
+    
+    result = checker.check_blog_post("Spot Bitcoin ETF inflows grew 40% to a record high this week.")
+    
+    assert result['evidence'] == [{
+        'claim': "Spot Bitcoin ETF inflows grew 40% to a record high this week",
+        'documents': ["article-001-coindesk-bitcoin.md"],
+    }]
+    assert not result['has_issues']
+    assert checker._claim_evidence("Stablecoin supply fell 5% as redemptions rose") == []
+
+
+def test_claim_index_is_shared_across_checkers(monkeypatch):
+    """Test the index is built once per document set and words split across reads still match."""
+    doc = Document("article-001-coindesk-bitcoin.md", "Stablecoin supply expanded", "coindesk")
+    monkeypatch.setattr(doc, "iter_text", lambda: iter(["Stablecoin sup", "ply expan", "ded"]))
+    
+    first = FactChecker([doc])
+    assert first._claim_evidence("stablecoin supply hit a high") == ["article-001-coindesk-bitcoin.md"]
+    assert FactChecker([doc]).index is first.index
+    assert set(first.index.postings) == {"stablecoin", "supply", "expanded"}
+
+
+def test_nearby_citation_window():
+    """Test claims count as cited only when a citation sits within 100 characters."""
+    checker = FactChecker([Document("test1.md", "Unrelated content", "coindesk", "Bitcoin News")])
+    filler = "x" * 150
+    
+    content = (
+        f"Bitcoin supply data shows 21 million coins [Source: Bitcoin News]. {filler}. "
+        f"Ethereum gas fees fell 30% over the month. {filler}. Solana fees fell 10% too"
+    )
+    result = checker.check_blog_post(content)
+    
+    assert result['issues'] == [{
+        'type': 'uncited_claims',
+        'claims': ["Ethereum gas fees fell 30% over the month", "Solana fees fell 10% too"],
+        'severity': 'low',
+    }]
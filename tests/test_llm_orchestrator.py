@@ -0,0 +1,386 @@
+"""Tests for LLM orchestration."""
+
+import asyncio
+import re
+from types import SimpleNamespace
+
+import pytest
+from src.thinking_engine.blog_generator import BlogGenerator
+from src.thinking_engine.completion_cache import CompletionCache, CompletionCacheMiss
+from src.thinking_engine.document_loaders import Document
+from src.thinking_engine import llm_orchestrator
+from src.thinking_engine.llm_orchestrator import AsyncLLMOrchestrator, LLMOrchestrator
+from src.thinking_engine.rate_limiter import RequestScheduler
+from src.thinking_engine.summary_cache import SummaryCache
+from tests.conftest import FakeAsyncCompletions, FakeCompletions, _client, _response
+
+
+pytestmark = pytest.mark.usefixtures("api_key")
+
+
+def test_sync_orchestrator_sends_prompt(docs):
+    """Test the sync orchestrator builds messages from the documents."""
+    llm = LLMOrchestrator(model="test-model")
+    completions = FakeCompletions()
+    llm.client = _client(completions)
+    
+    assert llm.summarize_documents(docs) == "Summary"
+    assert completions.calls[0]['model'] == "test-model"
+    assert "Bitcoin rose 15%" in completions.calls[0]['messages'][1]['content']
+
+
+def test_async_orchestrator_runs_generations_concurrently(docs):
+    """Test async generations overlap instead of blocking each other."""
+    llm = AsyncLLMOrchestrator(model="test-model")
+    completions = FakeAsyncCompletions(reply="TWEET: Bitcoin is up 15% this week\nHASHTAGS: #Bitcoin", delay=0.05)
+    llm.client = _client(completions)
+    
+    async def run():
+        return await asyncio.gather(
+            llm.summarize_documents(docs),
+            llm.generate_blog_post(docs, "summary"),
+            llm.generate_tweet_ideas(docs, "summary", count=1),
+        )
+    
+    summary, blog, tweets = asyncio.run(run())
+    
+    assert completions.max_in_flight == 3
+    assert tweets[0]['tweet'] == "Bitcoin is up 15% this week"
+    assert tweets[0]['hashtags'] == "#Bitcoin"
+
+
+def test_summary_cache_shared_across_orchestrators(docs, tmp_path):
+    """Test an identical document set reuses the cached summary."""
+    cache = SummaryCache(cache_dir=str(tmp_path))
+    first = LLMOrchestrator(model="test-model", summary_cache=cache)
+    first.client = _client(FakeCompletions())
+    second = LLMOrchestrator(model="test-model", summary_cache=cache)
+    completions = FakeCompletions()
+    second.client = _client(completions)
+    
+    assert first.summarize_cached(docs) == ("Summary", False)
+    assert second.summarize_cached(docs) == ("Summary", True)
+    assert completions.calls == []
+    
+    persisted = LLMOrchestrator(model="test-model", summary_cache=SummaryCache(cache_dir=str(tmp_path)))
+    assert persisted.summarize_cached(docs) == ("Summary", True)
+    
+    other_model = LLMOrchestrator(model="other-model", summary_cache=cache)
+    other_model.client = _client(FakeCompletions())
+    assert other_model.summarize_cached(docs) == ("Summary", False)
+
+
+def test_default_summary_cache_is_memory_only_unless_configured(monkeypatch, tmp_path):
+    """Test the process-wide summary cache only persists when SUMMARY_CACHE_DIR is set."""
+    monkeypatch.delenv("SUMMARY_CACHE_DIR")
+    monkeypatch.setattr(SummaryCache, "_default", None)
+    assert SummaryCache.default().cache_dir is None
+    
+    monkeypatch.setenv("SUMMARY_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(SummaryCache, "_default", None)
+    assert SummaryCache.default().cache_dir == tmp_path
+
+
+def test_completion_cache_record_then_replay(docs, tmp_path):
+    """Test recorded completions are replayed without calling the API."""
+    cache_dir = str(tmp_path / "completions")
+    llm = LLMOrchestrator(model="test-model", completion_cache=CompletionCache(cache_dir, mode="record"))
+    recording = FakeCompletions(reply="Recorded summary")
+    llm.client = _client(recording)
+    assert llm.generate_blog_post(docs, "summary") == "Recorded summary"
+    
+    replay = AsyncLLMOrchestrator(model="test-model", completion_cache=CompletionCache(cache_dir, mode="replay"))
+    replaying = FakeAsyncCompletions(reply="Live reply")
+    replay.client = _client(replaying)
+    
+    assert asyncio.run(replay.generate_blog_post(docs, "summary")) == "Recorded summary"
+    assert replaying.calls == []
+    with pytest.raises(CompletionCacheMiss):
+        asyncio.run(replay.generate_blog_post(docs, "a different summary"))
+
+
+def test_completion_cache_expires_entries(docs, tmp_path):
+    """Test entries older than the TTL are fetched again in record mode."""
+    cache = CompletionCache(str(tmp_path), mode="record", ttl=60)
+    llm = LLMOrchestrator(model="test-model", completion_cache=cache)
+    completions = FakeCompletions()
+    llm.client = _client(completions)
+    
+    llm.generate_blog_post(docs, "summary")
+    llm.generate_blog_post(docs, "summary")
+    assert len(completions.calls) == 1
+    
+    cache.ttl = -1
+    llm.generate_blog_post(docs, "summary")
+    assert len(completions.calls) == 2
+
+
+def test_map_reduce_summary_only_maps_new_documents(docs, tmp_path):
+    """Test per-document notes are cached and prompts carry notes, not raw text."""
+    cache = SummaryCache()
+    llm = LLMOrchestrator(model="test-model", summary_cache=cache, summary_mode="map_reduce")
+    completions = FakeCompletions(reply="Note")
+    llm.client = _client(completions)
+    docs = docs + [Document("article-002-theblock-defi.md", "DeFi TVL hit $90 billion.", "theblock")]
+    
+    llm.summarize_documents(docs)
+    assert len(completions.calls) == 3  # two map calls and the reduce
+    
+    docs.append(Document("article-003-delphi-l2.md", "Rollup fees fell 40%.", "delphi"))
+    completions.calls.clear()
+    llm.summarize_documents(docs)
+    assert len(completions.calls) == 2  # one map call for the new article and the reduce
+    
+    completions.calls.clear()
+    llm.generate_blog_post(docs, "summary")
+    prompt = completions.calls[0]['messages'][1]['content']
+    assert "--- Document 3: " in prompt
+    assert "Rollup fees fell 40%" not in prompt
+
+
+class FakeStream:
+    def __init__(self, chunks):
+        self._chunks = chunks
+        self.closed = False
+    
+    def __aiter__(self):
+        return self._chunks
+    
+    async def close(self):
+        self.closed = True
+
+
+class FakeStreamingCompletions(FakeAsyncCompletions):
+    async def create(self, stream=False, **kwargs):
+        self.calls.append(dict(kwargs, stream=stream))
+        if not stream:
+            return _response(self.reply)
+        
+        async def chunks():
+            for word in self.reply.split(' '):
+                await asyncio.sleep(self.delay)
+                yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=word + ' '))], usage=None)
+            yield SimpleNamespace(choices=[], usage=SimpleNamespace(prompt_tokens=400, completion_tokens=100, total_tokens=500))
+        self.stream = FakeStream(chunks())
+        return self.stream
+
+
+def test_map_reduce_caps_chunks_per_document(monkeypatch):
+    """Test a very long document only maps its first and last chunks."""
+    monkeypatch.setenv("SUMMARY_CHUNK_CHARS", "100")
+    monkeypatch.setenv("SUMMARY_MAX_CHUNKS_PER_DOCUMENT", "5")
+    llm = LLMOrchestrator(model="test-model", summary_cache=SummaryCache(), summary_mode="map_reduce")
+    completions = FakeCompletions(reply="Note")
+    llm.client = _client(completions)
+    content = "\n\n".join(f"Paragraph {i}: " + "x" * 80 for i in range(40))
+    doc = Document("article-001-coindesk-dump.md", content, "coindesk")
+    
+    llm.summarize_documents([doc])
+    
+    map_prompts = [call['messages'][-1]['content'] for call in completions.calls[:-1]]
+    parts = sorted(int(re.search(r"part (\d+) of 40", prompt).group(1)) for prompt in map_prompts)
+    assert parts == [1, 2, 3, 39, 40]
+    assert not any("Paragraph 20:" in prompt for prompt in map_prompts)
+
+
+def test_blog_stream_events(docs, tmp_path):
+    """Test the streamed blog post arrives token by token before the final fact-check."""
+    llm = AsyncLLMOrchestrator(model="test-model")
+    llm.client = _client(FakeStreamingCompletions(reply="Bitcoin rose 15% [Source: Coindesk Bitcoin]", delay=0.01))
+    output_path = tmp_path / "blog-post.md"
+    
+    async def run():
+        return [item async for item in BlogGenerator(llm).astream(docs, str(output_path))]
+    
+    events = asyncio.run(run())
+    names = [item['event'] for item in events]
+    
+    assert names[0] == "summary" and names[-2:] == ["metrics", "done"]
+    tokens = [item['data']['text'] for item in events if item['event'] == 'token']
+    assert len(tokens) == 6
+    assert output_path.read_text(encoding='utf-8').startswith(''.join(tokens))
+    metrics = events[-2]['data']
+    assert 0 < metrics['ttft_ms'] <= metrics['total_ms']
+    assert events[-1]['data']['output_file'] == str(output_path)
+
+
+def test_streamed_usage_settles_the_token_budget(docs):
+    """Test a streamed call's token reservation is corrected from its final usage chunk."""
+    scheduler = RequestScheduler(tokens_per_minute=100000, clock=lambda: 0.0)
+    llm = AsyncLLMOrchestrator(model="test-model", scheduler=scheduler)
+    llm.client = _client(FakeStreamingCompletions(reply="Bitcoin rose 15%"))
+    messages = [{"role": "user", "content": "Write the post. " * 50}]
+    
+    async def run():
+        return [piece async for piece in llm._stream(messages, "blog")]
+    
+    assert ''.join(asyncio.run(run())) == "Bitcoin rose 15% "
+    assert scheduler.tokens.level == 100000 - 500
+    assert llm.usage_stats()['prompt_tokens'] == 400
+
+
+def test_abandoned_stream_is_closed(docs):
+    """Test the API stream is closed when the reader stops before the end."""
+    llm = AsyncLLMOrchestrator(model="test-model")
+    completions = FakeStreamingCompletions(reply="Bitcoin rose 15% this week")
+    llm.client = _client(completions)
+    
+    async def run():
+        pieces = llm._stream([{"role": "user", "content": "Write the post."}], "blog")
+        first = await pieces.__anext__()
+        await pieces.aclose()
+        return first
+    
+    assert asyncio.run(run()) == "Bitcoin "
+    assert completions.stream.closed
+
+
+class ShardedTweetCompletions(FakeAsyncCompletions):
+    """Returns distinct tweets, one short shard, and a duplicate across shards."""
+    
+    async def create(self, **kwargs):
+        self._enter(kwargs)
+        call = len(self.calls)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self._exit()
+        prompt = kwargs['messages'][-1]['content']
+        count = int(re.search(r"generate EXACTLY (\d+)", prompt).group(1))
+        lines = []
+        if "Style focus" in prompt:
+            lines.append("TWEET: Bitcoin ETF inflows hit a record this week\nHASHTAGS: #Bitcoin\n")
+            if "batch: data-driven" not in prompt:
+                count -= 2
+        lines += [f"TWEET: {' '.join(f'idea{call}x{i}w{k}' for k in range(5))}\nHASHTAGS: #DeFi\n"
+                  for i in range(count - len(lines))]
+        return _response("\n".join(lines))
+
+
+def test_tweet_generation_shards_dedupes_and_tops_up(docs, monkeypatch):
+    """Test large counts run as parallel shards and only missing tweets are re-requested."""
+    monkeypatch.setenv("TWEET_SHARD_SIZE", "10")
+    llm = AsyncLLMOrchestrator(model="test-model")
+    completions = ShardedTweetCompletions(delay=0.05)
+    llm.client = _client(completions)
+    
+    tweets = asyncio.run(llm.generate_tweet_ideas(docs, "summary", count=25))
+    
+    assert len(tweets) == 25
+    assert sum("ETF inflows" in t['tweet'] for t in tweets) == 1
+    # Three shards in parallel plus one top-up round, not four sequential calls.
+    assert len(completions.calls) == 4
+    assert completions.max_in_flight == 3
+    top_up = completions.calls[-1]['messages'][-1]['content']
+    assert "generate EXACTLY 6 tweet ideas" in top_up
+    assert "do not repeat them" in top_up
+
+
+def test_tweet_top_up_lists_only_recent_tweets(docs, monkeypatch):
+    """Test a top-up names at most TWEET_AVOID_LIMIT of the tweets already written."""
+    monkeypatch.setenv("TWEET_SHARD_SIZE", "10")
+    monkeypatch.setattr(llm_orchestrator, "TWEET_AVOID_LIMIT", 5)
+    llm = AsyncLLMOrchestrator(model="test-model")
+    completions = ShardedTweetCompletions()
+    llm.client = _client(completions)
+    
+    tweets = asyncio.run(llm.generate_tweet_ideas(docs, "summary", count=25))
+    
+    top_up = completions.calls[-1]['messages'][-1]['content']
+    # 19 distinct tweets came back from the shards; only the last five are listed.
+    assert all(f"- {t['tweet']}\n" in top_up for t in tweets[14:19])
+    assert not any(t['tweet'] in top_up for t in tweets[:14])
+
+
+def test_stages_share_prompt_prefix(docs, monkeypatch):
+    """Test summary, blog and tweet prompts open with identical messages."""
+    monkeypatch.setenv("PROMPT_LAYOUT", "prefix")
+    llm = LLMOrchestrator(model="test-model")
+    completions = FakeCompletions(reply="TWEET: Bitcoin is up 15% this week\nHASHTAGS: #Bitcoin")
+    llm.client = _client(completions)
+    
+    summary = llm.summarize_documents(docs)
+    llm.generate_blog_post(docs, summary)
+    llm.generate_tweet_ideas(docs, summary, count=1)
+    
+    prefixes = [call['messages'][:2] for call in completions.calls]
+    assert len(prefixes) == 3 and prefixes[0] == prefixes[1] == prefixes[2]
+    assert "Bitcoin rose 15%" in prefixes[0][1]['content']
+    assert "Bitcoin rose 15%" not in completions.calls[1]['messages'][-1]['content']
+
+
+def test_usage_stats_count_cached_prompt_tokens(docs):
+    """Test cached prompt tokens reported by the API are aggregated."""
+    llm = LLMOrchestrator(model="test-model")
+    completions = FakeCompletions()
+    usage = SimpleNamespace(prompt_tokens=2000, completion_tokens=100, total_tokens=2100,
+                            prompt_tokens_details=SimpleNamespace(cached_tokens=1536))
+    completions.create = lambda **kwargs: SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content="Post"))], usage=usage
+    )
+    llm.client = _client(completions)
+    
+    llm.generate_blog_post(docs, "summary")
+    llm.generate_blog_post(docs, "another summary")
+    
+    stats = llm.usage_stats()
+    assert stats['requests'] == 2
+    assert stats['prompt_tokens'] == 4000 and stats['cached_tokens'] == 3072
+    assert stats['cached_ratio'] == 0.768
+
+
+def test_stage_models_and_draft_refine_cascade(docs, monkeypatch):
+    """Test each stage calls its own model and the blog model polishes a fast draft."""
+    monkeypatch.setenv("SUMMARY_MODEL", "fast-model")
+    monkeypatch.setenv("BLOG_DRAFT_MODEL", "fast-model")
+    monkeypatch.setenv("TWEET_TEMPERATURE", "0.9")
+    llm = LLMOrchestrator(model="large-model")
+    completions = FakeCompletions()
+    usage = SimpleNamespace(prompt_tokens=100, completion_tokens=10, total_tokens=110, prompt_tokens_details=None)
+    
+    def create(**kwargs):
+        completions.calls.append(kwargs)
+        reply = "Draft post" if len(completions.calls) == 2 else "Final post"
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=reply))], usage=usage)
+    
+    completions.create = create
+    llm.client = _client(completions)
+    
+    summary = llm.summarize_documents(docs)
+    assert llm.generate_blog_post(docs, summary) == "Final post"
+    llm.generate_tweet_ideas(docs, summary, count=1)
+    
+    assert [call['model'] for call in completions.calls[:4]] == ["fast-model", "fast-model", "large-model", "large-model"]
+    assert "Draft:\nDraft post" in completions.calls[2]['messages'][-1]['content']
+    assert completions.calls[3]['temperature'] == 0.9
+    stages = llm.usage_stats()['stages']
+    assert stages['summary']['model'] == "fast-model" and stages['summary']['requests'] == 1
+    assert stages['draft']['requests'] == 1 and stages['blog']['requests'] == 1
+    assert stages['blog']['prompt_tokens'] == 100 and stages['blog']['avg_latency_ms'] >= 0
+
+
+def test_sync_and_async_orchestrators_send_the_same_requests(docs, monkeypatch):
+    """Test both clients run the same flow: map-reduce notes, shared prefix, draft cascade and tweets."""
+    monkeypatch.setenv("PROMPT_LAYOUT", "prefix")
+    monkeypatch.setenv("BLOG_DRAFT_MODEL", "fast-model")
+    reply = "TWEET: Bitcoin is up 15% this week\nHASHTAGS: #Bitcoin"
+    
+    sync = LLMOrchestrator(model="test-model", summary_cache=SummaryCache(), summary_mode="map_reduce")
+    sync_calls = FakeCompletions(reply=reply)
+    sync.client = _client(sync_calls)
+    summary = sync.summarize_documents(docs)
+    sync.generate_blog_post(docs, summary)
+    sync.generate_tweet_ideas(docs, summary, count=1)
+    
+    async def run_async():
+        llm = AsyncLLMOrchestrator(model="test-model", summary_cache=SummaryCache(), summary_mode="map_reduce")
+        llm.client = _client(async_calls)
+        summary = await llm.summarize_documents(docs)
+        await llm.generate_blog_post(docs, summary)
+        await llm.generate_tweet_ideas(docs, summary, count=1)
+    
+    async_calls = FakeAsyncCompletions(reply=reply)
+    asyncio.run(run_async())
+    
+    assert [call['model'] for call in sync_calls.calls] == ["test-model"] * 2 + ["fast-model"] + ["test-model"] * 2
+    assert async_calls.calls == sync_calls.calls
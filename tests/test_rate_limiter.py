@@ -0,0 +1,139 @@
+"""Tests for the OpenAI request scheduler."""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from src.thinking_engine.rate_limiter import BATCH, INTERACTIVE, RequestScheduler
+
+
+class FakeRateLimit(Exception):
+    status_code = 429
+
+    def __init__(self, retry_after):
+        super().__init__("rate limited")
+        self.response = SimpleNamespace(headers={'retry-after': str(retry_after)})
+
+
+class FakeClock:
+    """Monotonic time that only moves when the scheduler sleeps."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+    async def async_sleep(self, seconds):
+        # Yield to the loop a few times before time jumps, so tasks started
+        # meanwhile get to queue as they would during a real wait.
+        self.sleeps.append(seconds)
+        wake = self.now + seconds
+        for _ in range(10):
+            await asyncio.sleep(0)
+        self.now = max(self.now, wake)
+
+    def scheduler(self, **kwargs):
+        return RequestScheduler(clock=self, sleep=self.sleep, async_sleep=self.async_sleep, **kwargs)
+
+
+def test_token_budget_delays_requests():
+    """Test a drained tokens-per-minute bucket delays the next request."""
+    clock = FakeClock()
+    scheduler = clock.scheduler(tokens_per_minute=6000)
+    scheduler.call(lambda: "first", 6000)
+    assert clock.sleeps == []
+
+    assert scheduler.call(lambda: "second", 50) == "second"
+    assert clock.sleeps == [pytest.approx(0.5)]
+    assert scheduler.stats()['admitted'] == 2
+
+
+def test_retry_after_is_honored():
+    """Test a 429 is retried no sooner than its retry-after."""
+    clock = FakeClock()
+    scheduler = clock.scheduler(base_delay=0.01)
+    attempts = []
+
+    def flaky():
+        attempts.append(clock())
+        if len(attempts) == 1:
+            raise FakeRateLimit(0.2)
+        return "ok"
+
+    assert scheduler.call(flaky, 10) == "ok"
+    assert attempts == [0.0, pytest.approx(0.2)]
+    stats = scheduler.stats()
+    assert stats['retries'] == 1 and stats['rate_limited'] == 1
+
+
+def test_non_retryable_errors_raise():
+    """Test errors that are not rate limits or transient fail immediately."""
+    scheduler = RequestScheduler()
+
+    def broken():
+        raise ValueError("bad request")
+
+    with pytest.raises(ValueError):
+        scheduler.call(broken, 10)
+    assert scheduler.stats()['failed'] == 1
+
+
+def test_exhausted_quota_is_not_retried():
+    """Test a 429 for an exhausted quota fails at once instead of backing off."""
+    clock = FakeClock()
+    scheduler = clock.scheduler()
+    error = FakeRateLimit(0.2)
+    error.code = "insufficient_quota"
+    attempts = []
+
+    def broke():
+        attempts.append(clock())
+        raise error
+
+    with pytest.raises(FakeRateLimit):
+        scheduler.call(broke, 10)
+    assert len(attempts) == 1 and clock.sleeps == []
+    stats = scheduler.stats()
+    assert stats['failed'] == 1 and stats['retries'] == 0
+
+
+def test_settle_replaces_the_estimate():
+    """Test the token bucket is charged what a request used, not its estimate."""
+    clock = FakeClock()
+    scheduler = clock.scheduler(tokens_per_minute=6000)
+    scheduler.call(lambda: SimpleNamespace(usage=SimpleNamespace(total_tokens=500)), 2000)
+    assert scheduler.tokens.level == 5500
+
+    scheduler.call(lambda: iter(()), 1000)
+    assert scheduler.tokens.level == 4500
+    scheduler.settle(1000, 100)
+    assert scheduler.tokens.level == 5400
+
+
+def test_interactive_overtakes_queued_batch():
+    """Test interactive calls are admitted ahead of batch calls queued earlier."""
+    clock = FakeClock()
+    scheduler = clock.scheduler(tokens_per_minute=6000)
+    scheduler.call(lambda: None, 6000)
+    order = []
+
+    async def call(name, priority):
+        async def fn():
+            order.append(name)
+        await scheduler.acall(fn, 100, priority)
+
+    async def run():
+        batch = asyncio.create_task(call("batch", BATCH))
+        await asyncio.sleep(0)
+        assert scheduler.stats()['queued_batch'] == 1
+        await asyncio.gather(batch, call("interactive", INTERACTIVE))
+
+    asyncio.run(run())
+    assert order == ["interactive", "batch"]
+    assert scheduler.stats()['max_queue_depth'] == 2
@@ -0,0 +1,68 @@
+"""Tests for chunk retrieval."""
+
+import pytest
+from src.thinking_engine.document_loaders import Document
+from src.thinking_engine.llm_orchestrator import LLMOrchestrator
+from src.thinking_engine.retrieval import ChunkIndex, split_chunks
+from src.thinking_engine.summary_cache import SummaryCache
+
+pytestmark = pytest.mark.usefixtures("api_key")
+
+FILLER = "Markets were quiet as traders waited for the holiday week to end.\n\n"
+FACT = "Stablecoin supply reached $160 billion, led by USDC issuance.\n\n"
+
+
+@pytest.fixture
+def docs():
+    body = FILLER * 40 + FACT + FILLER * 40
+    return [
+        Document("article-001-coindesk-stablecoins.md", body, "coindesk"),
+        Document("article-002-theblock-defi.md", "DeFi lending volumes were flat.\n\n" + FILLER * 20, "theblock"),
+    ]
+
+
+def test_split_chunks_prefers_paragraph_breaks():
+    """Test chunks stay within size and are cut between paragraphs."""
+    chunks = list(split_chunks(iter([FILLER * 10]), 300))
+    assert all(len(chunk) <= 300 for chunk in chunks)
+    assert all(chunk.endswith("end.") for chunk in chunks[:-1])
+    assert "".join(chunks).replace("\n", "") == (FILLER * 10).replace("\n", "")
+
+
+def test_bm25_ranks_matching_chunk_first(docs):
+    """Test the chunk holding the query terms outranks filler."""
+    index = ChunkIndex(docs, 300)
+    best = index.rank("stablecoin supply USDC")[0]
+    doc_index, chunk_index = index.chunks[best]
+    assert FACT.strip() in index.chunk_texts(docs[doc_index], [chunk_index])[chunk_index]
+
+
+def test_relevance_selection_keeps_middle_facts(docs, monkeypatch):
+    """Test relevance selection finds facts that head/tail truncation drops."""
+    monkeypatch.setenv("MAX_TOTAL_CONTEXT_CHARS", "2500")
+    monkeypatch.setenv("MAX_CHARS_PER_DOCUMENT", "2000")
+    monkeypatch.setenv("RETRIEVAL_CHUNK_CHARS", "300")
+    summary = "Stablecoin supply hit a record, driven by USDC."
+
+    head_tail = LLMOrchestrator(model="test-model", summary_cache=SummaryCache())
+    assert "$160 billion" not in head_tail._direct_context(docs, "blog", summary)
+
+    monkeypatch.setenv("CONTEXT_SELECTION", "relevance")
+    relevance = LLMOrchestrator(model="test-model", summary_cache=SummaryCache())
+    context = relevance._direct_context(docs, "blog", summary)
+    assert "$160 billion" in context
+    assert "DeFi lending volumes" in context
+    assert len(context) <= 2500 + 100
+
+
+def test_default_layout_ranks_stage_context_against_summary(docs, monkeypatch):
+    """Test blog and tweet context is selected for the summary under the default prompt layout."""
+    monkeypatch.setenv("MAX_TOTAL_CONTEXT_CHARS", "2500")
+    monkeypatch.setenv("MAX_CHARS_PER_DOCUMENT", "2000")
+    monkeypatch.setenv("RETRIEVAL_CHUNK_CHARS", "300")
+    monkeypatch.setenv("CONTEXT_SELECTION", "relevance")
+    llm = LLMOrchestrator(model="test-model", summary_cache=SummaryCache())
+
+    assert llm.prompt_layout == "inline"
+    assert "$160 billion" in llm._context(docs, "blog", "Stablecoin supply hit a record, driven by USDC.")
+    assert "$160 billion" not in llm._context(docs, "tweets", "DeFi lending volumes were flat.")
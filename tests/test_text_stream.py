@@ -0,0 +1,72 @@
+"""Tests for streaming text reading."""
+
+import tracemalloc
+from src.thinking_engine.document_loaders import DocumentLoader
+from src.thinking_engine import text_stream
+
+
+def test_large_text_file_head_tail_bounded_memory(tmp_path):
+    """Test head, tail and length of a large file do not load it whole."""
+    test_file = tmp_path / "article-001-coindesk-dump.txt"
+    line = "Bitcoin é " * 10 + "\n"
+    with open(test_file, "w", encoding="utf-8") as f:
+        f.write("HEAD ")
+        for _ in range(100_000):
+            f.write(line)
+        f.write(" TAIL")
+    
+    loader = DocumentLoader(base_path=str(tmp_path), cache_dir="")
+    tracemalloc.start()
+    doc = loader.load_document(str(test_file))
+    head = doc.head(6000)
+    tail = doc.tail(6000)
+    length = doc.length
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    
+    assert not doc.is_loaded
+    assert head.startswith("HEAD ")
+    assert tail.endswith(" TAIL")
+    assert len(tail) == 6000
+    assert length == 5 + len(line) * 100_000 + 5
+    assert peak < 4 * 1024 * 1024
+
+
+def test_bad_bytes_do_not_fail_the_file(tmp_path):
+    """Test invalid bytes are replaced instead of failing the load."""
+    test_file = tmp_path / "article-001-coindesk-mixed.txt"
+    test_file.write_bytes(("Ethereum " * 10000).encode("utf-8") + b"\xff\xfe bad " + b"DeFi end")
+    
+    doc = DocumentLoader(base_path=str(tmp_path), cache_dir="").load_document(str(test_file))
+    
+    assert doc.content.startswith("Ethereum")
+    assert "�" in doc.content
+    assert doc.tail(8) == "DeFi end"
+
+
+def test_sniff_encoding(tmp_path):
+    """Test encoding detection from BOMs and invalid UTF-8."""
+    utf16 = tmp_path / "a.txt"
+    utf16.write_text("Stablecoins grew", encoding="utf-16")
+    latin = tmp_path / "b.txt"
+    latin.write_bytes("Café résumé".encode("cp1252"))
+    
+    assert text_stream.sniff_encoding(str(utf16)) == "utf-16"
+    assert text_stream.read_tail(str(utf16), 4, "utf-16") == "grew"
+    assert text_stream.sniff_encoding(str(latin)) == "cp1252"
+    assert text_stream.read_head(str(latin), 4, "cp1252") == "Café"
+
+
+def test_tail_translates_newlines_like_content(tmp_path):
+    """Test the tail of a CRLF or CR file matches the end of its content."""
+    for newline in ("\r\n", "\r"):
+        test_file = tmp_path / "article-001-coindesk-crlf.txt"
+        test_file.write_bytes(newline.join(f"Line {i}" for i in range(5000)).encode("utf-8"))
+        
+        doc = DocumentLoader(base_path=str(tmp_path), cache_dir="").load_document(str(test_file))
+        
+        short, long, length = doc.tail(12), doc.tail(30000), doc.length
+        assert not doc.is_loaded
+        assert short == doc.content[-12:]
+        assert long == doc.content[-30000:]
+        assert length == len(doc.content)
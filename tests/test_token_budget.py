@@ -0,0 +1,86 @@
+"""Tests for token budgeting."""
+
+import pytest
+from src.thinking_engine import token_budget
+from src.thinking_engine.completion_cache import CompletionCache
+from src.thinking_engine.document_loaders import Document
+from src.thinking_engine.llm_orchestrator import TWEET_AVOID_LIMIT, LLMOrchestrator
+from src.thinking_engine.summary_cache import SummaryCache
+from src.thinking_engine.token_budget import Tokenizer, input_budget, pack_document
+
+
+@pytest.fixture
+def tokenizer(monkeypatch):
+    # Use the estimate so results do not depend on tiktoken data being present.
+    monkeypatch.setattr(token_budget, "tiktoken", None)
+    token_budget.get_tokenizer.cache_clear()
+    yield token_budget.get_tokenizer("gpt-4o")
+    token_budget.get_tokenizer.cache_clear()
+
+
+def test_estimated_tokenizer_round_trips(tokenizer):
+    """Test the fallback tokenizer counts pieces and cuts without losing text."""
+    text = "Bitcoin rose 15% to $62,450 this week."
+    assert tokenizer.name == "estimate"
+    assert tokenizer.count(text) == 13
+    assert tokenizer.head(text, 3) + tokenizer.tail(text, tokenizer.count(text) - 3) == text
+
+
+def test_input_budget_reserves_output(monkeypatch):
+    """Test the budget is the window minus the stage's output and prompt tokens."""
+    assert input_budget("gpt-4o-mini", "blog", 1000) == 128000 - 4096 - 1000
+    assert input_budget("unknown-model", "summary", 0) == 8192 - 2048
+    monkeypatch.setenv("MAX_CONTEXT_TOKENS", "5000")
+    assert input_budget("gpt-4o", "tweets", 1000) == 5000
+
+
+def test_pack_document_is_exact_and_memoized(tokenizer, monkeypatch):
+    """Test long documents are cut to the token budget once per content hash."""
+    doc = Document("article-001-coindesk-bitcoin.md", "Bitcoin rose 15% this week. " * 500, "coindesk")
+    text, tokens, truncated = pack_document(doc, tokenizer, 200)
+    assert truncated
+    assert tokens == tokenizer.count(text) <= 200
+    assert text.startswith("Bitcoin rose") and text.endswith("this week. ")
+
+    def fail(self, text):
+        raise AssertionError("document was tokenized again")
+    monkeypatch.setattr(Tokenizer, "count", fail)
+    assert pack_document(doc, tokenizer, 200) == (text, tokens, truncated)
+
+
+def test_token_context_stays_within_window(tokenizer, monkeypatch):
+    """Test token-budgeted context never exceeds what the window leaves for it."""
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    monkeypatch.setenv("CONTEXT_BUDGET", "tokens")
+    monkeypatch.setenv("MODEL_CONTEXT_TOKENS", "5000")
+    monkeypatch.setattr(CompletionCache, "_default_loaded", True)
+    llm = LLMOrchestrator(model="gpt-4o", summary_cache=SummaryCache())
+    docs = [
+        Document(f"article-{i:03d}-coindesk-bitcoin.md", f"Report {i}: ETH fell 3.5% to $2,410. " * 400, "coindesk")
+        for i in range(5)
+    ]
+
+    context = llm._direct_context(docs, "summary")
+    prompt_tokens = sum(tokenizer.count(m['content']) + 4 for m in llm._summary_messages(context))
+    assert prompt_tokens <= 5000 - 2048
+    assert "--- Document 1:" in context
+
+
+def test_tweet_context_leaves_room_for_top_up(tokenizer, monkeypatch):
+    """Test a top-up prompt listing the most tweets it may still fits the window."""
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    monkeypatch.setenv("CONTEXT_BUDGET", "tokens")
+    monkeypatch.setenv("MODEL_CONTEXT_TOKENS", "12000")
+    monkeypatch.setattr(CompletionCache, "_default_loaded", True)
+    llm = LLMOrchestrator(model="gpt-4o", summary_cache=SummaryCache())
+    docs = [
+        Document(f"article-{i:03d}-coindesk-bitcoin.md", f"Report {i}: ETH fell 3.5% to $2,410. " * 400, "coindesk")
+        for i in range(5)
+    ]
+    tweet = ("Bitcoin ETF inflows hit $1.2B as ETH fell 3.5%; " * 6)[:280]
+
+    context = llm._direct_context(docs, "tweets", "summary", 30)
+    messages = llm._tweet_messages(context, "summary", 29, None, [tweet] * TWEET_AVOID_LIMIT)
+    prompt_tokens = sum(tokenizer.count(m['content']) + 4 for m in messages)
+    assert prompt_tokens <= 12000 - 4096
+    assert "--- Document 1:" in context
@@ -0,0 +1,73 @@
+"""Tests for incremental week ingestion."""
+
+import os
+import pytest
+from src.thinking_engine.document_loaders import DocumentLoader
+from src.thinking_engine.week_watcher import WeekWatcher, WeekRegistry
+
+
+def test_refresh_only_reloads_changed_files(tmp_path, monkeypatch):
+    """Test only added and changed files are extracted on refresh."""
+    week_folder = tmp_path / "week-2024-01-15"
+    week_folder.mkdir()
+    (week_folder / "article-001-coindesk-a.md").write_text("# A")
+    (week_folder / "article-002-theblock-b.md").write_text("# B")
+    
+    loader = DocumentLoader(base_path=str(tmp_path), cache_dir="")
+    watcher = WeekWatcher(loader, "week-2024-01-15")
+    
+    assert [d.content for d in watcher.load()] == ["A", "B"]
+    
+    extracted = []
+    original = loader.load_document
+    monkeypatch.setattr(loader, "load_document", lambda p: extracted.append(p) or original(p))
+    
+    (week_folder / "article-002-theblock-b.md").write_text("# B2")
+    os.utime(week_folder / "article-002-theblock-b.md", ns=(1, 1))
+    (week_folder / "article-003-delphi-c.md").write_text("# C")
+    (week_folder / "article-001-coindesk-a.md").unlink()
+    
+    changes = watcher.refresh()
+    
+    assert changes == {
+        'added': ["article-003-delphi-c.md"],
+        'changed': ["article-002-theblock-b.md"],
+        'removed': ["article-001-coindesk-a.md"],
+    }
+    assert len(extracted) == 2
+    assert [d.content for d in watcher.documents()] == ["B2", "C"]
+    
+    assert watcher.refresh() == {'added': [], 'changed': [], 'removed': []}
+    assert len(extracted) == 2
+
+
+def test_registry_rejects_missing_week(tmp_path):
+    """Test the registry reports unknown week folders."""
+    registry = WeekRegistry(DocumentLoader(base_path=str(tmp_path), cache_dir=""), poll_interval=0)
+    
+    with pytest.raises(ValueError):
+        registry.load("week-2024-01-15")
+
+
+def test_registry_drops_least_recently_used_week(tmp_path):
+    """Test the registry stops and forgets the oldest week beyond its bound."""
+    for day in ("08", "15", "22"):
+        week_folder = tmp_path / f"week-2024-01-{day}"
+        week_folder.mkdir()
+        (week_folder / "article-001-coindesk-a.md").write_text(f"# {day}")
+    registry = WeekRegistry(DocumentLoader(base_path=str(tmp_path), cache_dir=""), poll_interval=60, max_weeks=2)
+    
+    registry.load("week-2024-01-08")
+    oldest = registry.get("week-2024-01-08")
+    registry.load("week-2024-01-15")
+    dropped = registry.get("week-2024-01-15")
+    registry.load("week-2024-01-08")
+    registry.load("week-2024-01-22")
+    
+    assert registry.weeks() == ["week-2024-01-08", "week-2024-01-22"]
+    assert dropped._thread is None
+    assert oldest._thread is not None
+    
+    registry.stop()
+    assert registry.weeks() == []
+    assert oldest._thread is None